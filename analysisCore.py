@@ -0,0 +1,841 @@
+# Author: Gustav Lundborg
+# Date: 25-03-2024
+# Revision date: 17-10-2026
+
+# The analysis core: the Stock objects, the requests to the API and everything calculated from them.
+# It has no GUI, so it can be imported by the GUI (stockAnalyser.py), the batch run, the backtest and the service
+
+import datetime
+import fundamentalStore
+import instrumentation
+import math
+import metricEngine
+from getBusinessDayDates import NEW_YORK_TIME_ZONE, OPEN_TIME, business_day_one_month_ago, last_business_day, \
+    last_closed_business_day, next_business_day, session_close_time, sessions_back
+import polygonClient
+import priceStore
+import seriesStore
+import sp500Constituents
+import rateLimiter
+import re
+import screener
+import streamingIndicators
+import sys
+import threading
+import time
+
+INDEX_SYMBOL = 'SPY'  # This is the ticker for the index (SPDR S&P 500 ETF Trust)
+SYMBOL_PATTERN = re.compile(r'[A-Z][A-Z0-9.\-]{0,9}')  # f.e AAPL, BRK.B, or S000 in the mock server's universe
+unable_to_get_data = False  # If there was a problem getting data from the API this will be set to True
+stock_dict = {}  # main dictionary holding all of the objects of the class Stock
+metric_table = screener.MetricTable(['beta_value'])  # the metrics of every stock in 'stock_dict', for screening and ranking them
+# The attributes of a Stock put in 'metric_table' (its streaming indicators are put there too)
+SCREENER_METRICS = ['beta_value', 'stock_return', 'highest_price', 'lowest_price', 'pe_value', 'ps_value', 'equity_ratio']
+# benchmark symbol -> (trading day its data is for, when it expires or None, its Index object), shared by every analysis
+benchmark_dict = {}
+benchmark_symbol_list = [INDEX_SYMBOL, 'QQQ', 'IWM']  # symbols that can be used as the benchmark for the beta value
+indicator_set_dict = {}  # symbol -> IndicatorSet fed with its stored series (and the live price of a session in progress)
+# Sessions of closing prices kept for each stock: the longest lookback, so every lookback comes from the one history
+HISTORY_SESSION_COUNT = max(metricEngine.LOOKBACK_WINDOWS.values())
+WEEKS_PER_YEAR = 52
+error_handler = None  # Function that gets the error messages (f.e to show them in the GUI); printed if there is none
+worker_state = threading.local()  # the job number and cancel event of the analysis running on this thread
+
+
+class Stock:
+    """
+    Represents a stock and provides methods to gather both technical and fundamental data,
+    calculate various metrics, and interact with the Polygon.io API.
+
+    Attributes:
+        symbol (str): The ticker symbol of the stock.
+        company_name (str): The full name of the company.
+        highest_price (float): The highest price of the stock within a specified period.
+        lowest_price (float): The lowest price of the stock within a specified period.
+        stock_return (float): The return of the stock calculated based on historical prices.
+        beta_value (float): The beta value of the stock, indicating its volatility relative to a market index.
+        closing_price_list (list): A list of the last 30 daily closing prices for the stock.
+        closing_date_list (list): The trading day (datetime.date) of each closing price.
+        indicator_dict (dict): Name of each streaming indicator (f.e 'rsi_14') -> its value on the newest bar.
+        window_metric_dict (dict): Bar size (f.e 'daily', 'weekly', '5 min') -> lookback (f.e '1Y') ->
+            the return, highest and lowest price, volatility and beta value over that lookback.
+        has_beta_value (bool): Flag indicating whether the beta value has been calculated.
+        pe_value (float): The price-to-earnings (P/E) ratio of the stock.
+        ps_value (float): The price-to-sales (P/S) ratio of the stock.
+        equity_ratio (float): The equity ratio of the stock.
+    """
+
+    def __init__(self, symbol):
+        """Initializes the class and declares each attributed that is used"""
+        self.symbol = symbol
+        self.company_name = self.get_company_name()
+        self.highest_price = ""
+        self.lowest_price = ""
+        self.stock_return = ""
+        self.beta_value = ""
+        self.closing_price_list = []
+        self.closing_date_list = []
+        self.window_metric_dict = {}
+        self.indicator_dict = {}
+        self.has_beta_value = False
+
+        self.pe_value = ""
+        self.ps_value = ""
+        self.equity_ratio = ""
+
+    def get_technical_data(self):
+        """Calls each function that is used to gather the technical data for the stock"""
+
+        self.calculate_closing_price_list()
+        if unable_to_get_data:
+            return  # return nothing
+        self.stock_return = self.calculate_stock_return()
+        self.highest_price, self.lowest_price = self.get_price_extremes()
+
+    @instrumentation.timed('indicators')
+    def calculate_indicators(self, index=None):
+        """
+        Gets the streaming indicators (see streamingIndicators.IndicatorSet) on the newest bar.
+        They are kept up to date with the stored series, so only the bars they haven't seen are fed;
+        if the closing prices hold today's session it is fed as a live bar (with the price of the Index 'index')
+        """
+        indicator_set = update_indicators(self.symbol)
+        if indicator_set is None:
+            return  # return nothing (the error has been reported)
+
+        if self.closing_date_list and self.closing_date_list[-1] >= indicator_set.last_date:
+            index_price = None
+            if index is not None and index.closing_date_list and index.closing_date_list[-1] == self.closing_date_list[-1]:
+                index_price = index.closing_price_list[-1]
+            feed_live_price(indicator_set, self.closing_date_list[-1], self.closing_price_list[-1], index_price)
+
+        self.indicator_dict = indicator_set.values()
+
+    def calculate_beta_value(self, index):
+        """
+        Calculates the beta value against the Index object 'index' (which has its technical data):
+        the covariance of the stock's and the index's daily returns divided by the variance of the index's.
+        The index prices are lined up with the stock's trading days first
+        """
+        index_price_dict = dict(zip(index.closing_date_list, index.closing_price_list))
+        index_prices = [index_price_dict.get(date, math.nan) for date in self.closing_date_list]
+
+        self.beta_value = float(metricEngine.calculate_beta_values(
+            metricEngine.to_price_matrix(self.closing_price_list), index_prices)[0])
+        self.has_beta_value = not math.isnan(self.beta_value)  # too few common trading days gives no beta value
+
+    def calculate_closing_price_list(self):
+        """
+        Gets a list of the last 30 daily closing prices for the stock.
+        The closed sessions are read from the price store if it holds every one of them. Otherwise the stored
+        series of the stock is brought up to date, which only requests the sessions it is missing.
+        Either way, if the market is open today the price candle of today's session is added on top
+        """
+        global unable_to_get_data
+        from_date = business_day_one_month_ago()
+        to_date = last_business_day()
+
+        stored_closing_prices = priceStore.get_closing_prices(self.symbol, from_date, last_closed_business_day())
+        if stored_closing_prices is not None:
+            self.closing_date_list, self.closing_price_list = stored_closing_prices  # no request to the API needed
+        else:
+            series = update_price_series(self.symbol)
+            if series is None:
+                return  # return nothing (the error has been reported)
+
+            # the series' window holds the newest closed sessions; the month is counted from the last business day
+            window_bars = [(date, closing_price) for date, closing_price
+                           in zip(series.window_dates(), series.window_closing_prices()) if date >= from_date]
+            self.closing_date_list = [date for date, closing_price in window_bars]
+            self.closing_price_list = [closing_price for date, closing_price in window_bars]
+
+        if to_date > last_closed_business_day():  # today's session, which is never stored
+            todays_price_candles = request_daily_bars(self.symbol, to_date, to_date)
+            if todays_price_candles is None:
+                return  # return nothing (the error has been reported)
+
+            for date, closing_price in todays_price_candles:
+                self.closing_date_list.append(date)
+                self.closing_price_list.append(closing_price)
+
+        if not self.closing_price_list:
+            unable_to_get_data = True
+            report_error("Unable to get the daily closing prices; try another stock")
+
+    def get_price_history(self):
+        """
+        Returns (dates, closing prices) of the whole stored history of the stock (HISTORY_SESSION_COUNT sessions),
+        with today's session on top if the closing prices already hold it.
+        It is the same series the last month comes from, so it costs no extra request.
+        Returns None if the data couldn't be gathered
+        """
+        series = update_price_series(self.symbol)
+        if series is None:
+            return None  # return None (the error has been reported)
+
+        date_list = list(series.date_list)
+        closing_price_list = list(series.closing_price_list)
+        for date, closing_price in zip(self.closing_date_list, self.closing_price_list):
+            if not date_list or date > date_list[-1]:  # today's session, which is never stored
+                date_list.append(date)
+                closing_price_list.append(closing_price)
+        return date_list, closing_price_list
+
+    def calculate_window_metrics(self, index, intraday=False):
+        """
+        Calculates the return, price extremes, volatility and beta value against the Index object 'index'
+        over every lookback in metricEngine.LOOKBACK_WINDOWS (daily bars) and WEEKLY_LOOKBACK_WINDOWS (weekly bars).
+        Every lookback is a slice of the one stored history of the stock and the index,
+        so more lookbacks cost neither requests nor another pass over the prices.
+        If 'intraday' is True the last session is added in every bar size of metricEngine.INTRADAY_BAR_MINUTES
+        """
+        stock_history = self.get_price_history()
+        index_history = index.get_price_history()
+        if stock_history is None or index_history is None:
+            return  # return nothing (the error has been reported)
+
+        date_list, closing_price_list = stock_history
+        index_price_dict = dict(zip(*index_history))
+        index_prices = [index_price_dict.get(date, math.nan) for date in date_list]
+        price_matrix = metricEngine.to_price_matrix([closing_price_list, index_prices])  # the stock, then the index
+
+        self.window_metric_dict['daily'] = first_row_metrics(metricEngine.calculate_window_metrics(
+            price_matrix[:1], price_matrix[1], metricEngine.LOOKBACK_WINDOWS))
+
+        week_list, weekly_price_matrix = metricEngine.resample_to_weeks(date_list, price_matrix)
+        self.window_metric_dict['weekly'] = first_row_metrics(metricEngine.calculate_window_metrics(
+            weekly_price_matrix[:1], weekly_price_matrix[1], metricEngine.WEEKLY_LOOKBACK_WINDOWS, WEEKS_PER_YEAR))
+
+        if intraday:
+            self.calculate_intraday_metrics(index)
+
+    def calculate_intraday_metrics(self, index):
+        """
+        Calculates the metrics of the last session against the Index object 'index' in every intraday bar size
+        (metricEngine.INTRADAY_BAR_MINUTES). Every bar size is made from the same minute bars,
+        so it costs one request for the stock (and one for the index, shared by every stock)
+        """
+        date = last_business_day()
+        stock_minute_bars = request_minute_bars(self.symbol, date)
+        index_minute_bars = request_minute_bars(index.symbol, date)
+        if not stock_minute_bars or not index_minute_bars:
+            return  # no minute bars (yet); any error has been reported
+
+        index_price_dict = dict(index_minute_bars)
+        minute_list = [minute for minute, closing_price in stock_minute_bars]
+        price_matrix = metricEngine.to_price_matrix([[closing_price for minute, closing_price in stock_minute_bars],
+                                                     [index_price_dict.get(minute, math.nan) for minute in minute_list]])
+
+        for bar_minutes in metricEngine.INTRADAY_BAR_MINUTES:
+            bar_minute_array, bar_price_matrix = metricEngine.resample_to_bar_size(minute_list, price_matrix, bar_minutes)
+            bars_per_year = metricEngine.TRADING_DAYS_PER_YEAR * metricEngine.MINUTES_PER_SESSION / bar_minutes
+            session_window = {'1D': bar_price_matrix.shape[1] - 1}  # every bar of the session
+            self.window_metric_dict[f"{bar_minutes} min"] = first_row_metrics(metricEngine.calculate_window_metrics(
+                bar_price_matrix[:1], bar_price_matrix[1], session_window, bars_per_year))
+
+    def calculate_stock_return(self):
+        """Calculates the stock return by dividing the latest price by the oldest price"""
+        price_matrix = metricEngine.to_price_matrix(self.closing_price_list)
+        return float(metricEngine.calculate_returns(price_matrix)[0])
+
+    def get_price_extremes(self):
+        """Gets the highest and lowest price from the closing price list (which stays in date order)"""
+        highest_prices, lowest_prices = metricEngine.calculate_price_extremes(
+            metricEngine.to_price_matrix(self.closing_price_list))
+        return float(highest_prices[0]), float(lowest_prices[0])
+
+    def get_fundamental_data(self):
+        """
+        Gets the relevant fundamental data from the polygon.io API,
+        calculates each fundamental data point and assigns it to the class's attributes.
+        """
+        response_financials = polygonClient.get_financials(self.symbol)
+        response_tickers = polygonClient.get_ticker_details(self.symbol)
+
+        if response_successful(response_financials) and response_successful(response_tickers):
+            global unable_to_get_data
+
+            try:
+                latest_quarter = 0
+                financial_data = response_financials.json()['results'][latest_quarter]['financials']
+
+                eps = financial_data['income_statement']['basic_earnings_per_share']['value']
+                total_revenue = financial_data['income_statement']['revenues']['value']
+                assets = financial_data['balance_sheet']['assets']['value']
+                equity = financial_data['balance_sheet']['equity']['value']
+
+                ticker_data = response_tickers.json()
+                market_cap = ticker_data['results']['market_cap']
+                latest_price = self.get_latest_price(ticker_data['results'])
+
+                self.pe_value = latest_price / eps
+                self.ps_value = market_cap / total_revenue
+                self.equity_ratio = equity / assets
+            except KeyError:
+                report_error("Unable to find latest financial data; try another stock")
+                unable_to_get_data = True
+            except Exception as e:
+                unable_to_get_data = True
+                report_error(e)
+
+    def get_latest_price(self, ticker_results):
+        """
+        Gets the latest price of the stock without a new request to the API when possible.
+        Uses the closing prices if a technical analysis has already loaded them,
+        otherwise the market cap divided by the number of shares from the ticker details ('ticker_results').
+        Only if neither is available are the daily closing prices requested
+        """
+        if self.closing_price_list:
+            return self.closing_price_list[-1]  # already loaded by the technical analysis
+
+        shares_outstanding = ticker_results.get('weighted_shares_outstanding')
+        if shares_outstanding:
+            return ticker_results['market_cap'] / shares_outstanding
+
+        self.calculate_closing_price_list()
+        return self.closing_price_list[-1]
+
+    def get_company_name(self):
+        """
+        Gets the full name of the company from the API (polygon.io)
+        The financials response is shared with 'get_fundamental_data', so it is only requested once
+        """
+
+        response_financials = polygonClient.get_financials(self.symbol)
+
+        if response_successful(response_financials):
+            global unable_to_get_data
+            try:
+                latest_quarter = 0
+                company_name = response_financials.json()['results'][latest_quarter]['company_name']
+                return company_name  # returns the full company name of the stock
+            except Exception as e:
+                unable_to_get_data = True
+                report_error(e)
+
+
+class Index(Stock):
+    """
+    Subclass of Stock;
+    used to specify Indices which dont need to display a full company name in this program
+    """
+
+    def get_company_name(self):
+        """
+        Used to override the get_company_name method from Stock as to avoid
+        requesting the API for data that is never used for the index
+        """
+        pass
+
+
+def timestamp_to_date(timestamp):
+    """Turns a timestamp from the API (milliseconds since the Epoch) into the trading day it belongs to"""
+    return datetime.datetime.fromtimestamp(timestamp / 1000, datetime.timezone.utc).date()
+
+
+def request_daily_bars(symbol, from_date, to_date):
+    """
+    Requests the daily price candles of 'symbol' from 'from_date' to 'to_date' from the API.
+    Returns a list of (trading day, closing price), oldest first, or None if the data couldn't be gathered
+    """
+    global unable_to_get_data
+    response = polygonClient.get_daily_bars(symbol, from_date, to_date)
+
+    if not response_successful(response):
+        return None  # return None (the error has been reported)
+
+    try:
+        price_candles = response.json().get('results', [])  # no 'results' means there were no sessions in the range
+        return [(timestamp_to_date(price_candle['t']), price_candle['c']) for price_candle in price_candles]
+    except KeyError:
+        unable_to_get_data = True
+        report_error("Unable to get the daily closing prices; try another stock")
+    except Exception as e:
+        unable_to_get_data = True
+        show_error_message(e)
+    return None
+
+
+def request_minute_bars(symbol, date):
+    """
+    Requests the one-minute price candles of 'symbol' in the session on 'date' from the API.
+    Returns a list of (minute of the session, 0 being the open, closing price) for the regular trading hours,
+    oldest first, or None if the data couldn't be gathered
+    """
+    global unable_to_get_data
+    response = polygonClient.get_minute_bars(symbol, date)
+
+    if not response_successful(response):
+        return None  # return None (the error has been reported)
+
+    # without time zone data Eastern Standard Time is assumed, which is an hour off in the summer
+    market_time_zone = NEW_YORK_TIME_ZONE or datetime.timezone(datetime.timedelta(hours=-5))
+    open_minute = OPEN_TIME.hour * 60 + OPEN_TIME.minute
+    close_time = session_close_time(date)
+    session_minutes = close_time.hour * 60 + close_time.minute - open_minute
+
+    try:
+        minute_bars = []
+        for price_candle in response.json().get('results', []):
+            candle_time = datetime.datetime.fromtimestamp(price_candle['t'] / 1000, market_time_zone)
+            minute = candle_time.hour * 60 + candle_time.minute - open_minute
+            if 0 <= minute < session_minutes:  # pre-market and after-hours trades are left out
+                minute_bars.append((minute, price_candle['c']))
+        return minute_bars
+    except KeyError:
+        unable_to_get_data = True
+        report_error("Unable to get the intraday prices; try another stock")
+    except Exception as e:
+        unable_to_get_data = True
+        show_error_message(e)
+    return None
+
+
+def first_row_metrics(window_metric_dict):
+    """Turns the metric arrays from metricEngine.calculate_window_metrics into the plain numbers of their first row"""
+    return {window_name: {metric: value if metric == 'bar_count' else float(value[0])
+                          for metric, value in metric_dict.items()}
+            for window_name, metric_dict in window_metric_dict.items()}
+
+
+def get_history_start():
+    """Returns the first trading day the stored series hold: HISTORY_SESSION_COUNT sessions back"""
+    return sessions_back(last_business_day(), HISTORY_SESSION_COUNT)
+
+
+def series_needs_rebuild(series):
+    """
+    Checks if the stored series doesn't reach back to the start of the history
+    (f.e it was stored when only one month was kept, or it hasn't been updated in years)
+    """
+    history_start = get_history_start()
+    return (series.history_from_date is None or series.history_from_date > history_start
+            or series.last_date() is None or series.last_date() < history_start)
+
+
+def get_missing_series_range(series):
+    """Returns (from date, to date) of the closed sessions in the history the series is missing, or None"""
+    to_date = last_closed_business_day()
+
+    if series_needs_rebuild(series):
+        fetch_from_date = get_history_start()  # the history is rebuilt; get all of it in one request
+    else:
+        fetch_from_date = next_business_day(series.last_date())
+
+    if fetch_from_date > to_date:
+        return None  # up to date
+    return fetch_from_date, to_date
+
+
+def update_price_series(symbol):
+    """
+    Brings the stored series of 'symbol' up to the last closed session and drops the history older than
+    HISTORY_SESSION_COUNT sessions. Only the sessions the series is missing are requested, so a series that is
+    up to date costs no request, a daily refresh costs one small request and the whole history costs one request.
+    The series of the index (SPY) is updated first, so the series can keep its beta value up to date.
+    Returns the series, or None if the data couldn't be gathered
+    """
+    index_series = None
+    if symbol != INDEX_SYMBOL:
+        index_series = update_price_series(INDEX_SYMBOL)
+        if index_series is None:
+            return None  # return None (the error has been reported)
+
+    series = seriesStore.load_series(symbol)
+    missing_range = get_missing_series_range(series)
+
+    if missing_range is not None:
+        price_candles = request_daily_bars(symbol, *missing_range)
+        if price_candles is None:
+            return None  # return None (the error has been reported)
+
+        if series_needs_rebuild(series):
+            series = seriesStore.reset_series(symbol)
+        index_price_dict = dict(zip(index_series.date_list, index_series.closing_price_list)) if index_series else {}
+        for date, closing_price in price_candles:
+            if series.last_date() is None or date > series.last_date():
+                series.append(date, closing_price, index_price_dict.get(date))
+
+    history_start = get_history_start()
+    series.trim_history(history_start)
+    series.history_from_date = history_start
+    if missing_range is not None:
+        seriesStore.save_series(series)
+    return series
+
+
+def update_indicators(symbol):
+    """
+    Brings the indicators of 'symbol' up to its stored series: only the bars they haven't seen are fed
+    (the whole history the first time), and a live bar they hold is revised to the session's closing price.
+    Returns the IndicatorSet, or None if the data couldn't be gathered
+    """
+    series = update_price_series(symbol)
+    if series is None or series.last_date() is None:
+        return None  # return None (the error has been reported)
+
+    indicator_set = indicator_set_dict.get(symbol)
+    if indicator_set is None or indicator_set.last_date < series.first_date():
+        indicator_set = streamingIndicators.IndicatorSet(symbol)  # fed from the start of the history
+        indicator_set_dict[symbol] = indicator_set
+
+    new_bar_list = []
+    closed_live_bar = None
+    for bar in zip(reversed(series.date_list), reversed(series.closing_price_list), reversed(series.index_price_list)):
+        if indicator_set.last_date is not None and bar[0] <= indicator_set.last_date:
+            if bar[0] == indicator_set.last_date and not indicator_set.newest_bar_closed:
+                closed_live_bar = bar  # the session that was live has closed
+            break  # the newest bars are checked first, so only the new ones are gone through
+        new_bar_list.append(bar)
+
+    if closed_live_bar is not None:
+        indicator_set.revise(closed_live_bar[1], closed_live_bar[2], closed=True)
+    for date, closing_price, index_price in reversed(new_bar_list):
+        indicator_set.update(date, closing_price, index_price)
+    return indicator_set
+
+
+def feed_live_price(indicator_set, date, price, index_price=None):
+    """Feeds the latest price of the session in progress on 'date' to 'indicator_set' (revising it after the first)"""
+    if indicator_set.last_date == date:
+        if not indicator_set.newest_bar_closed:
+            indicator_set.revise(price, index_price)
+    elif date > indicator_set.last_date:
+        indicator_set.update(date, price, index_price, closed=False)
+
+
+def get_snapshot_price(ticker_snapshot):
+    """Returns the latest price in the snapshot of one stock, or None if it hasn't traded yet"""
+    return ((ticker_snapshot.get('lastTrade') or {}).get('p') or (ticker_snapshot.get('min') or {}).get('c')
+            or (ticker_snapshot.get('day') or {}).get('c') or None)
+
+
+def refresh_live_indicators(symbol_list):
+    """
+    Updates the indicators of every symbol in 'symbol_list' with the latest prices of the session in progress,
+    from one snapshot request for the whole market; each stock then costs O(1).
+    Returns a dictionary: symbol -> the values of its indicators (symbols without data are left out)
+    """
+    value_dict = {}
+    today = last_business_day()
+    latest_price_dict = {}
+
+    if today > last_closed_business_day():  # the session is in progress
+        response = polygonClient.get_market_snapshot()
+        if response_successful(response):
+            for ticker_snapshot in response.json().get('tickers') or []:
+                latest_price_dict[ticker_snapshot.get('ticker')] = get_snapshot_price(ticker_snapshot)
+
+    index_price = latest_price_dict.get(INDEX_SYMBOL)
+    for symbol in symbol_list:
+        indicator_set = update_indicators(symbol)
+        if indicator_set is None:
+            continue  # the error has been reported
+        if latest_price_dict.get(symbol) is not None:
+            feed_live_price(indicator_set, today, latest_price_dict[symbol], index_price)
+        value_dict[symbol] = indicator_set.values()
+
+    return value_dict
+
+
+def register_benchmark(symbol):
+    """Adds 'symbol' (f.e 'DIA') to the benchmarks the beta value can be calculated against"""
+    if symbol not in benchmark_symbol_list:
+        benchmark_symbol_list.append(symbol)
+
+
+def get_benchmark(symbol=INDEX_SYMBOL):
+    """
+    Returns the Index object for the benchmark 'symbol' with its technical data.
+    Every beta calculation reuses the same object: for the whole trading day once its session has closed, and
+    while the session is in progress only as long as the stocks' bar of today (polygonClient.OPEN_SESSION_BARS_TTL),
+    so the stocks' returns are never paired with an older (or missing) bar of the index.
+    Returns None if the data couldn't be gathered
+    """
+    if symbol not in benchmark_symbol_list:
+        report_error(f"{symbol} is not a registered benchmark")
+        return None  # return None (the benchmark is unknown)
+
+    trading_day = last_business_day()
+    if symbol in benchmark_dict:
+        fetched_trading_day, expires_at, index = benchmark_dict[symbol]
+        if fetched_trading_day == trading_day and (expires_at is None or time.time() < expires_at):
+            return index  # already up to date, no request needed
+
+    index = Index(symbol)
+    index.get_technical_data()
+    if unable_to_get_data:
+        return None  # return None (the data couldn't be gathered)
+
+    expires_at = None
+    if trading_day > last_closed_business_day():  # today's bar keeps changing until the session closes
+        expires_at = time.time() + polygonClient.OPEN_SESSION_BARS_TTL
+    benchmark_dict[symbol] = (trading_day, expires_at, index)
+    return index
+
+
+def load_grouped_daily_prices(from_date=None, to_date=None):
+    """
+    Fills the price store with the daily price candles of every stock, one request per business day,
+    for the days from 'from_date' to 'to_date' (by default the last month) that aren't stored yet.
+    Only closed sessions are stored, so today's candle is never stored while it can still change.
+    Returns True if every day could be stored
+    """
+    from_date = from_date or business_day_one_month_ago()
+    to_date = min(to_date or last_business_day(), last_closed_business_day())
+
+    date_list = priceStore.missing_dates(from_date, to_date)
+    response_list = polygonClient.fetch_many(polygonClient.get_grouped_daily, [(date,) for date in date_list])
+
+    for date, response in zip(date_list, response_list):
+        if not response_successful(response):
+            return False  # return False (the rest of the days are left for the next time)
+
+        price_candles = response.json().get('results') or []
+        if price_candles:  # an empty day (f.e an unexpected market closure) is asked for again next time
+            priceStore.store_grouped_daily(date, price_candles)
+
+    return True
+
+
+def update_fundamentals(symbol_list):
+    """
+    Stores every quarterly and annual report of each symbol in 'symbol_list' (see fundamentalStore),
+    several requests at a time. Only the symbols whose reports were stored longer ago than
+    polygonClient.FINANCIALS_TTL are requested again. Returns the symbols whose reports couldn't be gathered
+    """
+    global unable_to_get_data
+
+    stale_symbol_list = [symbol for symbol in symbol_list
+                         if fundamentalStore.is_stale(symbol, polygonClient.FINANCIALS_TTL)]
+    response_list = polygonClient.fetch_many(polygonClient.get_financial_history,
+                                             [(symbol,) for symbol in stale_symbol_list])
+    failed_symbol_list = []
+
+    for symbol, response in zip(stale_symbol_list, response_list):
+        if not response_successful(response):
+            failed_symbol_list.append(symbol)  # the error has been reported
+            continue
+
+        try:
+            fundamentalStore.store_financials(symbol, response.json().get('results') or [])
+        except Exception as e:
+            unable_to_get_data = True
+            show_error_message(e)
+            failed_symbol_list.append(symbol)
+
+    return failed_symbol_list
+
+
+def prefetch_stock_data(symbol_list, technical=True, fundamental=True):
+    """
+    Requests the data the analyses of every symbol in 'symbol_list' will need, several requests at a time.
+    The responses are kept for the run, so the analyses afterwards don't wait for a round trip each.
+    Errors are left for the analysis of each stock to report
+    """
+    if technical:
+        from_date = business_day_one_month_ago()
+        to_date = last_business_day()
+        argument_list = []
+
+        for symbol in symbol_list:
+            if priceStore.get_closing_prices(symbol, from_date, last_closed_business_day()) is None:
+                missing_range = get_missing_series_range(seriesStore.load_series(symbol))
+                if missing_range is not None:
+                    argument_list.append((symbol, *missing_range))
+            # else the closed sessions are read from the price store, no request needed
+            if to_date > last_closed_business_day():
+                argument_list.append((symbol, to_date, to_date))  # today's session
+
+        polygonClient.fetch_many(polygonClient.get_daily_bars, argument_list)
+
+    # the financials are always needed, the company name of every Stock comes from them
+    polygonClient.fetch_many(polygonClient.get_financials, [(symbol,) for symbol in symbol_list])
+    if fundamental:
+        polygonClient.fetch_many(polygonClient.get_ticker_details, [(symbol,) for symbol in symbol_list])
+
+
+def response_successful(response):
+    """
+    Checks if a response is successful by asking for its status code.
+    Takes in the parameter 'response' as the response
+    """
+    global unable_to_get_data
+
+    instrumentation.record_response_checked(response.status_code)
+    if response.status_code == 200:  # status code 200 == successful request
+        return True  # return true
+    elif response.status_code == 429:
+        '''
+        The rate limiter should keep this from happening, 
+        but if the API key is used somewhere else at the same time the limit can still be reached.
+        Every token is marked as used, so the following requests wait a full period in the queue
+        '''
+        unable_to_get_data = True
+        rateLimiter.rate_limiter.drain()
+        report_error("You have surpassed the rate limit for retrieving data; the next requests will wait for it.")
+        return False  # returns False to avoid gathering data from a failed response
+    else:
+        report_error(f"Failed to retrieve data. Status code: {response.status_code}")
+        unable_to_get_data = True
+        return False  # returns False to avoid gathering data from a failed response
+
+
+def show_error_message(error):
+    report_error(f"There was an error when gathering the data; {error}")
+
+
+def set_error_handler(handler):
+    """
+    Sends every error message to the function 'handler' (f.e to draw it in an error window, or to collect
+    the errors of a batch run). None prints them to the standard error instead
+    """
+    global error_handler
+    error_handler = handler
+
+
+def report_error(error_message):
+    """Passes the error message on to the error handler, or prints it if there is none"""
+    instrumentation.record_error(error_message)
+    if error_handler is None:
+        print(error_message, file=sys.stderr)
+    else:
+        error_handler(str(error_message))
+
+
+def is_valid_symbol(stock_symbol):
+    """
+    Checks if the parameter 'stock_symbol' is written like a ticker symbol: capital letters,
+    and digits, dots or dashes after the first letter (f.e BRK.B)
+    """
+    return SYMBOL_PATTERN.fullmatch(stock_symbol) is not None
+
+
+def is_in_sp500(stock_symbol):
+    """
+    Checks if the parameter 'stock symbol' is in the S&P 500.
+    The symbols are loaded from the local snapshot the first time they are needed
+    """
+    if sp500Constituents.is_member(stock_symbol):
+        return True  # return True (the stock_symbol is in the S&P 500)
+    elif not sp500Constituents.get_sp500_symbols():
+        report_error("The list of S&P 500 stocks couldn't be loaded; check the internet connection")
+        return False  # return False (there is no list to check against)
+    else:
+        report_error("This ticker is not in the S&P 500")
+        return False  # return False (the stock_symbol is not in the S&P 500)
+
+
+def analysis_stopped():
+    """Checks if the running analysis should stop: the data couldn't be gathered or the user cancelled it"""
+    cancel_event = getattr(worker_state, 'cancel_event', None)
+    return unable_to_get_data or (cancel_event is not None and cancel_event.is_set())
+
+
+def clear_data_error():
+    """
+    Resets 'unable_to_get_data' before a new analysis.
+    There's no need to refuse the analysis while near the rate limit;
+    the rate limiter queues the requests and lets them through as soon as the limit allows
+    """
+    global unable_to_get_data
+    unable_to_get_data = False
+
+
+def rate_limit_status():
+    """Returns a text describing how many requests are queued and how long a new request has to wait"""
+    queue_depth = rateLimiter.rate_limiter.queue_depth()
+    expected_wait = round(rateLimiter.rate_limiter.expected_wait(), 1)
+
+    if expected_wait == 0 and queue_depth == 0:
+        return "Requests to the API can be made right away"
+    return f"{queue_depth} requests queued; new requests wait about {expected_wait} seconds"
+
+
+def add_analysed_stock(stock):
+    """
+    Keeps the analysed Stock object 'stock' in 'stock_dict' and puts its metrics in 'metric_table',
+    so the rankings and screens include it right away without sorting every stock again
+    """
+    stock_dict[stock.symbol] = stock
+
+    value_dict = {name: getattr(stock, name) for name in SCREENER_METRICS}
+    if not stock.has_beta_value:
+        value_dict['beta_value'] = None
+    value_dict.update(stock.indicator_dict)
+    metric_table.update(stock.symbol, value_dict)
+
+
+def get_stocks_ranked_by_beta():
+    """Returns the Stock objects in 'stock_dict' that have a beta value, the highest beta value first"""
+    return [stock_dict[symbol] for symbol in metric_table.query()]
+
+
+def screen_stocks(filter_text, sort_text, limit=None):
+    """
+    Returns the Stock objects in 'stock_dict' passing 'filter_text' (f.e "beta > 1.2 and pe < 15", see
+    screener.compile_filter), ordered by 'sort_text' (f.e "beta desc, pe") and only the first 'limit' if it is given.
+    Raises a ValueError if the filter or the sort keys can't be understood
+    """
+    sort_key_list = screener.parse_sort_keys(sort_text, metric_table) or [('beta_value', True)]
+    return [stock_dict[symbol] for symbol in metric_table.query(filter_text or None, sort_key_list, limit)]
+
+
+def run_technical_analysis(stock_symbol, benchmark_symbol=INDEX_SYMBOL):
+    """
+    The main function that runs the technical analysis,
+    it takes the stock's symbol and optionally the benchmark's symbol (SPY by default) as parameters
+    it gets the technical data from the benchmark and the current stock and returns the stock (None if it failed).
+    The benchmark's data is shared between analyses and only requested once per trading day
+    Inbetween each function that gathers data from the API; it checks if it was unable to get data
+    (or if the analysis was cancelled) through this process
+    if so it will return out of the function, so it doesn't waste any more requests to the API.
+    """
+    index = get_benchmark(benchmark_symbol)
+    if index is None or analysis_stopped():
+        return None  # return None
+
+    current_stock = ""
+    if stock_symbol in stock_dict:  # if the stock already exists as an object
+        current_stock = stock_dict[stock_symbol]
+    else:
+        current_stock = Stock(stock_symbol)
+
+    if analysis_stopped():
+        return None  # return None
+    current_stock.get_technical_data()
+    if analysis_stopped():
+        return None  # return None
+    current_stock.calculate_beta_value(index)
+    if analysis_stopped():
+        return None  # return None
+    current_stock.calculate_window_metrics(index)  # from the stored history, no extra request
+    current_stock.calculate_indicators(index)
+
+    add_analysed_stock(current_stock)
+    return current_stock
+
+
+def run_fundamental_analysis(stock_symbol):
+    """
+    The main function that runs the fundamental analysis,
+    it takes the stock's symbol as a parameter
+    it gets the fundamental data from the current stock and returns the stock (None if it failed)
+    Inbetween each function that gathers data from the API; it checks if it was unable to get data
+    (or if the analysis was cancelled) through this process
+    if so it will return out of the function, so it doesn't waste any more requests to the API.
+    """
+    current_stock = ""
+    if stock_symbol in stock_dict:  # if the stock already exists as an object
+        current_stock = stock_dict[stock_symbol]
+    else:
+        current_stock = Stock(stock_symbol)
+
+    if analysis_stopped():
+        return None  # return None
+    current_stock.get_fundamental_data()
+    if analysis_stopped():
+        return None  # return None
+
+    add_analysed_stock(current_stock)
+    return current_stock
@@ -0,0 +1,390 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+# Runs the analyses without the GUI: from the command line, or as a local HTTP service answering in JSON.
+# Every client of one service shares its warm caches, its rate limiter and its background refresher
+
+import analysisCore
+import argparse
+import concurrent.futures
+import http.server
+import instrumentation
+import json
+import math
+import numbers
+import os
+import polygonClient
+import requests
+import sys
+import threading
+import time
+import traceback
+import urllib.parse
+from dotenv import load_dotenv
+
+load_dotenv()
+SERVICE_HOST = os.getenv('SERVICE_HOST', '127.0.0.1')  # Only reachable from this computer by default
+SERVICE_PORT = int(os.getenv('SERVICE_PORT', '8600'))
+ANALYSIS_KINDS = ['technical', 'fundamental']
+# How many seconds an analysis is served before the refresher runs it again. The daily bars of a session in
+# progress and the market cap expire from the caches after this long; a refresh after the close costs no request
+REFRESH_AFTER = {
+    'technical': polygonClient.OPEN_SESSION_BARS_TTL,
+    'fundamental': polygonClient.TICKER_DETAILS_TTL,
+}
+REFRESH_CHECK_SECONDS = 60  # How often the refresher looks for analyses to run again
+TECHNICAL_FIELDS = ['beta_value', 'stock_return', 'highest_price', 'lowest_price']
+FUNDAMENTAL_FIELDS = ['pe_value', 'ps_value', 'equity_ratio']
+
+
+def to_json_value(value):
+    """
+    Returns 'value' with everything JSON can't hold replaced: numpy numbers become Python numbers,
+    and NaN, infinity and the "" of a metric that was never calculated become None (null)
+    """
+    if isinstance(value, dict):
+        return {str(key): to_json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(item) for item in value]
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return float(value) if math.isfinite(value) else None
+    if value == "":
+        return None
+    return value
+
+
+def encode_json(value):
+    """Returns 'value' as the UTF-8 bytes of a JSON document"""
+    return json.dumps(to_json_value(value), allow_nan=False, default=str).encode()
+
+
+def stock_to_dict(stock, kind):
+    """Returns the result of the 'kind' ('technical' or 'fundamental') analysis of the Stock object 'stock'"""
+    result = {'symbol': stock.symbol, 'company_name': stock.company_name}
+    if kind == 'technical':
+        result.update({name: getattr(stock, name) for name in TECHNICAL_FIELDS})
+        if not stock.has_beta_value:
+            result['beta_value'] = None
+        result['indicators'] = stock.indicator_dict
+        result['windows'] = stock.window_metric_dict
+    else:
+        result.update({name: getattr(stock, name) for name in FUNDAMENTAL_FIELDS})
+    return result
+
+
+def stock_to_summary(stock):
+    """Returns the metrics of the Stock object 'stock' used by the rankings and screens"""
+    summary = {'symbol': stock.symbol, 'company_name': stock.company_name}
+    summary.update({name: getattr(stock, name) for name in TECHNICAL_FIELDS + FUNDAMENTAL_FIELDS})
+    if not stock.has_beta_value:
+        summary['beta_value'] = None
+    return summary
+
+
+class AnalysisError(Exception):
+    """
+    An analysis or query that can't be answered.
+
+    Attributes:
+        status_code (int): The HTTP status code it is answered with (400, 404 or 502).
+        An unexpected error is answered with 500.
+    """
+
+    def __init__(self, status_code, message):
+        """Initializes the error with its HTTP status code and message"""
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class AnalysisService:
+    """
+    Keeps the result of every analysis it has run, so asking for a stock again is answered from memory.
+    The results are kept as ready-to-send JSON, and the refresher runs an analysis again in the background once
+    it gets old (the old result is served until the new one is done).
+    The analyses run one at a time on one worker: the core keeps whether the data could be gathered in one
+    module-level flag. The requests they make still go through the shared caches and rate limiter, and clients
+    asking for a stock that is already being analysed wait for that analysis instead of starting another.
+
+    Attributes:
+        result_dict (dict): (kind, symbol) -> (the result as JSON bytes, when it was analysed).
+        in_flight_dict (dict): (kind, symbol) -> the Future of the analysis that is running or queued.
+        error_messages (list): The errors reported by the analysis that is running.
+        started_at (float): When the service was started.
+    """
+
+    def __init__(self):
+        """Initializes the service with no results and sends the errors of the core to the running analysis"""
+        self.result_dict = {}
+        self.in_flight_dict = {}
+        self.error_messages = []
+        self.started_at = time.time()
+        self.lock = threading.Lock()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='analysis')
+        self.stop_event = threading.Event()
+        analysisCore.set_error_handler(self.error_messages.append)
+
+    def get_analysis(self, symbol, kind):
+        """
+        Returns the result of the 'kind' analysis of 'symbol' as JSON bytes, from memory if it has been analysed.
+        Raises an AnalysisError if the symbol isn't valid or the analysis failed
+        """
+        symbol = symbol.upper()
+        if kind not in ANALYSIS_KINDS or not analysisCore.is_valid_symbol(symbol):
+            raise AnalysisError(400, f"'{symbol}' isn't a ticker symbol")
+
+        stored_result = self.result_dict.get((kind, symbol))
+        if stored_result is not None:
+            return stored_result[0]
+        return self.submit_analysis(symbol, kind).result()
+
+    def submit_analysis(self, symbol, kind):
+        """Queues the 'kind' analysis of 'symbol' unless it is already queued; returns its Future"""
+        with self.lock:
+            future = self.in_flight_dict.get((kind, symbol))
+            if future is None:
+                future = self.executor.submit(self.run_analysis, symbol, kind)
+                self.in_flight_dict[(kind, symbol)] = future
+            return future
+
+    def run_analysis(self, symbol, kind):
+        """Runs on the worker: analyses 'symbol' and keeps the result. Returns it as JSON bytes"""
+        try:
+            analysisCore.clear_data_error()
+            self.error_messages.clear()
+            if not analysisCore.is_in_sp500(symbol):
+                raise AnalysisError(404, '; '.join(self.error_messages))
+
+            if kind == 'technical':
+                stock = analysisCore.run_technical_analysis(symbol)
+            else:
+                stock = analysisCore.run_fundamental_analysis(symbol)
+            if stock is None:
+                raise AnalysisError(502, '; '.join(self.error_messages) or "Unable to get the data")
+
+            analysed_at = time.time()
+            result = dict(stock_to_dict(stock, kind), analysed_at=analysed_at)
+            self.result_dict[(kind, symbol)] = (encode_json(result), analysed_at)
+            return self.result_dict[(kind, symbol)][0]
+        finally:
+            with self.lock:
+                self.in_flight_dict.pop((kind, symbol), None)
+
+    def get_ranking(self, limit=None):
+        """Returns the analysed stocks with a beta value, the highest first (only the first 'limit' if given)"""
+        stock_list = analysisCore.get_stocks_ranked_by_beta()[:limit]
+        return encode_json([stock_to_summary(stock) for stock in stock_list])
+
+    def get_screen(self, filter_text, sort_text, limit=None):
+        """
+        Returns the analysed stocks passing 'filter_text', ordered by 'sort_text' (see analysisCore.screen_stocks).
+        Raises an AnalysisError if the filter or the sort keys can't be understood
+        """
+        try:
+            stock_list = analysisCore.screen_stocks(filter_text, sort_text, limit)
+        except ValueError as error:
+            raise AnalysisError(400, str(error))
+        return encode_json([stock_to_summary(stock) for stock in stock_list])
+
+    def get_status(self):
+        """Returns how many results are kept, how many analyses are queued and the rate limiter's status"""
+        return encode_json({
+            'uptime': time.time() - self.started_at,
+            'results': {kind: sum(1 for result_kind, _ in self.result_dict if result_kind == kind)
+                        for kind in ANALYSIS_KINDS},
+            'in_flight': len(self.in_flight_dict),
+            'rate_limit': analysisCore.rate_limit_status(),
+        })
+
+    def refresh_stale_results(self):
+        """Queues the analyses whose results are older than REFRESH_AFTER; returns how many were queued"""
+        now = time.time()
+        stale_list = [key for key, (_, analysed_at) in list(self.result_dict.items())
+                      if now - analysed_at > REFRESH_AFTER[key[0]]]
+        for kind, symbol in stale_list:
+            self.submit_analysis(symbol, kind)
+        return len(stale_list)
+
+    def run_refresher(self):
+        """Checks for old results every REFRESH_CHECK_SECONDS until the service is stopped"""
+        while not self.stop_event.wait(REFRESH_CHECK_SECONDS):
+            self.refresh_stale_results()
+
+    def start_refresher(self):
+        """Starts the refresher on a background thread"""
+        threading.Thread(target=self.run_refresher, name='refresher', daemon=True).start()
+
+    def stop(self):
+        """Stops the refresher and waits for the queued analyses"""
+        self.stop_event.set()
+        self.executor.shutdown(wait=True)
+
+
+def get_limit(query):
+    """Returns the 'limit' of a parsed query string as an int, or None if it isn't given"""
+    if 'limit' not in query:
+        return None
+    try:
+        return max(0, int(query['limit'][0]))
+    except ValueError:
+        raise AnalysisError(400, "'limit' has to be a whole number")
+
+
+class ServiceRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Answers the requests to the service in JSON:
+    /technical/<symbol>, /fundamental/<symbol>, /ranking?limit=, /screen?filter=&sort=&limit= and /status,
+    and the metrics in the Prometheus text format on /metrics
+    """
+
+    protocol_version = 'HTTP/1.1'  # the connections are kept alive, so a client asking again skips the handshake
+    disable_nagle_algorithm = True  # the headers and the body are written separately; neither waits for an ACK
+
+    def do_GET(self):
+        """Answers one request; the service is 'self.server.service'"""
+        service = self.server.service
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        part_list = [part for part in url.path.split('/') if part]
+
+        try:
+            if len(part_list) == 2 and part_list[0] in ANALYSIS_KINDS:
+                body = service.get_analysis(urllib.parse.unquote(part_list[1]), part_list[0])
+            elif part_list == ['ranking']:
+                body = service.get_ranking(get_limit(query))
+            elif part_list == ['screen']:
+                body = service.get_screen(query.get('filter', [''])[0], query.get('sort', [''])[0], get_limit(query))
+            elif part_list == ['status']:
+                body = service.get_status()
+            elif part_list == ['metrics']:
+                self.send_body(200, instrumentation.render_prometheus().encode(), 'text/plain; version=0.0.4')
+                return
+            else:
+                raise AnalysisError(404, f"There is nothing at {url.path}")
+        except AnalysisError as error:
+            self.send_body(error.status_code, encode_json({'error': str(error)}))
+            return
+        except Exception as error:  # f.e an analysis failing on data it didn't expect; the connection is kept
+            traceback.print_exc()
+            instrumentation.record_error(f"{url.path}: {error!r}")
+            self.send_body(500, encode_json({'error': f"The request failed: {error!r}"}))
+            return
+
+        self.send_body(200, body)
+
+    def send_body(self, status_code, body, content_type='application/json'):
+        """Sends the response 'body' (bytes) with the status code 'status_code'"""
+        self.send_response(status_code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """The requests aren't logged, there are metrics for them"""
+        pass
+
+
+def start_service(host=SERVICE_HOST, port=SERVICE_PORT):
+    """
+    Starts the service with its refresher and serves it on http://'host':'port' from a background thread.
+    Returns the server; its service is 'server.service'
+    """
+    server = http.server.ThreadingHTTPServer((host, port), ServiceRequestHandler)
+    server.daemon_threads = True
+    server.service = AnalysisService()
+    server.service.start_refresher()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def request_service(url, path, params=None):
+    """Asks the running service at 'url' for 'path'; returns the body of its answer, or exits if it failed"""
+    try:
+        response = requests.get(url.rstrip('/') + path, params=params, timeout=600)
+    except requests.RequestException as error:
+        sys.exit(f"The service at {url} couldn't be reached; {error}")
+    if response.status_code != 200:
+        sys.exit(response.json().get('error', f"Status code: {response.status_code}"))
+    return response.content
+
+
+def run_command(arguments):
+    """
+    Runs a command of the command line: through the service at '--url' if it is given, so the warm caches
+    are shared, otherwise in this process. Returns the answers as JSON bytes, one per symbol or query
+    """
+    if arguments.command in ANALYSIS_KINDS:
+        if arguments.url:
+            return [request_service(arguments.url, f"/{arguments.command}/{symbol}") for symbol in arguments.symbols]
+        service = AnalysisService()
+        try:
+            return [service.get_analysis(symbol, arguments.command) for symbol in arguments.symbols]
+        except AnalysisError as error:
+            sys.exit(str(error))
+
+    params = {'limit': arguments.top} if arguments.top is not None else {}
+    if arguments.command == 'screen':
+        params.update({'filter': arguments.filter, 'sort': arguments.sort})
+    if arguments.url:
+        return [request_service(arguments.url, f"/{'ranking' if arguments.command == 'rank' else 'screen'}", params)]
+
+    service = AnalysisService()
+    try:
+        for symbol in arguments.symbols:  # there are no analysed stocks in a new process
+            service.get_analysis(symbol, 'technical')
+            if arguments.command == 'screen':
+                service.get_analysis(symbol, 'fundamental')
+        if arguments.command == 'rank':
+            return [service.get_ranking(arguments.top)]
+        return [service.get_screen(arguments.filter, arguments.sort, arguments.top)]
+    except AnalysisError as error:
+        sys.exit(str(error))
+
+
+def main():
+    """Reads the command line arguments and serves the service or runs one command"""
+    parser = argparse.ArgumentParser(description="Analyse stocks from the command line or serve the analyses in JSON")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="serve the analyses on a local HTTP port")
+    serve_parser.add_argument('--host', default=SERVICE_HOST, help="the address to listen on")
+    serve_parser.add_argument('--port', type=int, default=SERVICE_PORT, help="the port to listen on")
+
+    url_help = "the running service to ask (f.e http://127.0.0.1:8600), so its warm caches are used"
+    for kind in ANALYSIS_KINDS:
+        kind_parser = subparsers.add_parser(kind, help=f"print the {kind} analysis of each symbol")
+        kind_parser.add_argument('symbols', nargs='+', help="the ticker symbols")
+        kind_parser.add_argument('--url', help=url_help)
+
+    rank_parser = subparsers.add_parser('rank', help="print the analysed stocks, the highest beta value first")
+    screen_parser = subparsers.add_parser('screen', help="print the analysed stocks passing a filter")
+    screen_parser.add_argument('filter', help="f.e \"beta > 1.2 and pe < 15\"")
+    screen_parser.add_argument('--sort', default='beta desc', help="the sort keys, f.e \"beta desc, pe\"")
+    for query_parser in [rank_parser, screen_parser]:
+        query_parser.add_argument('--symbols', nargs='+', default=[],
+                                  help="without --url, the symbols to analyse first (a new process has none)")
+        query_parser.add_argument('--top', type=int, help="how many stocks to show at most")
+        query_parser.add_argument('--url', help=url_help)
+    arguments = parser.parse_args()
+
+    if arguments.command != 'serve':
+        for body in run_command(arguments):
+            print(body.decode())
+        return
+
+    instrumentation.start_from_environment()  # the Prometheus endpoint on its own port, if METRICS_PORT is set
+    server = start_service(arguments.host, arguments.port)
+    print(f"Serving the analyses on http://{arguments.host}:{arguments.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        server.service.stop()
+
+
+if __name__ == '__main__':
+    main()
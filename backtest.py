@@ -0,0 +1,221 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import analysisCore
+import argparse
+import concurrent.futures
+import datetime
+import metricEngine
+import numpy
+import os
+import pandas
+import priceStore
+from analysisCore import INDEX_SYMBOL
+from getBusinessDayDates import SESSIONS_PER_MONTH, last_closed_business_day, sessions_back
+
+DEFAULT_OUTPUT_PATH = 'backtest_results.csv'  # One row per holding period
+DEFAULT_TOP_COUNT = 20  # How many of the highest ranked stocks the portfolio holds
+DEFAULT_REBALANCE_SESSIONS = SESSIONS_PER_MONTH  # Sessions between two rankings
+DEFAULT_HISTORY_YEARS = 5
+# The closing prices a ranking is calculated over: the same month (both ends included) a Stock's technical analysis uses
+LOOKBACK_SESSIONS = SESSIONS_PER_MONTH + 1
+RANKING_METRICS = ['beta_value', 'stock_return']
+CHUNKS_PER_WORKER = 4  # the periods are split in more chunks than workers, so a slow chunk doesn't hold up the rest
+
+
+def calculate_ranking_values(price_matrix, index_prices, rank_by):
+    """
+    Calculates the metric 'rank_by' ('beta_value' or 'stock_return') of every row with the same functions
+    a Stock's technical analysis uses, so the backtest ranks the stocks the way 'sort_stocks_by_beta' does
+    """
+    if rank_by == 'beta_value':
+        return metricEngine.calculate_beta_values(price_matrix, index_prices)
+    return metricEngine.calculate_returns(price_matrix)
+
+
+def forward_fill(price_matrix):
+    """
+    Returns the price matrix with each missing price replaced by the row's last known price before it,
+    so a stock that stops trading during a holding period keeps its last price instead of dropping out.
+    Prices before a row's first known price stay numpy.nan
+    """
+    column_numbers = numpy.arange(price_matrix.shape[1])
+    last_known_columns = numpy.maximum.accumulate(numpy.where(~numpy.isnan(price_matrix), column_numbers, 0), axis=1)
+    return numpy.take_along_axis(price_matrix, last_known_columns, axis=1)
+
+
+def calculate_rank_correlation(first_values, second_values):
+    """
+    Returns the Spearman rank correlation between two arrays (only the positions where both are known),
+    or numpy.nan if fewer than three positions are
+    """
+    valid = ~numpy.isnan(first_values) & ~numpy.isnan(second_values)
+    if valid.sum() < 3:
+        return numpy.nan
+
+    first_ranks = numpy.argsort(numpy.argsort(first_values[valid]))
+    second_ranks = numpy.argsort(numpy.argsort(second_values[valid]))
+    return float(numpy.corrcoef(first_ranks, second_ranks)[0, 1])
+
+
+def get_rebalance_periods(date_list, rebalance_sessions):
+    """
+    Splits the stored trading days 'date_list' into holding periods:
+    (first day of the lookback, the day the stocks are ranked and bought, the day they are sold),
+    with a new ranking every 'rebalance_sessions' sessions once the first lookback is stored
+    """
+    period_list = []
+    for position in range(LOOKBACK_SESSIONS - 1, len(date_list) - 1, rebalance_sessions):
+        end_position = min(position + rebalance_sessions, len(date_list) - 1)
+        period_list.append((date_list[position - LOOKBACK_SESSIONS + 1], date_list[position], date_list[end_position]))
+    return period_list
+
+
+def evaluate_periods(period_list, price_store_path, rank_by, top_count, descending, benchmark_symbol):
+    """
+    Runs in a worker process: ranks every stored stock at the start of each period in 'period_list'
+    (see get_rebalance_periods) and measures how the top 'top_count' did until the end of the period.
+    The prices are read from the memory-mapped price store at 'price_store_path', so every worker
+    shares the operating system's copy of them instead of getting the matrix sent over.
+    Returns one result (a dictionary) per period
+    """
+    priceStore.PRICE_STORE_PATH = price_store_path
+    symbol_list = priceStore.get_symbol_list()
+    date_list, price_matrix = priceStore.get_price_matrix(None, period_list[0][0], period_list[-1][2])
+    filled_price_matrix = forward_fill(numpy.asarray(price_matrix, dtype=float))
+    column_dict = {date: column for column, date in enumerate(date_list)}
+
+    benchmark_row = priceStore.symbol_row_dict.get(benchmark_symbol)
+    if benchmark_row is None:
+        raise ValueError(f"The prices of the benchmark {benchmark_symbol} aren't stored")
+    excluded_rows = [priceStore.symbol_row_dict[symbol] for symbol in analysisCore.benchmark_symbol_list
+                     if symbol in priceStore.symbol_row_dict]  # the indices are never held
+
+    result_list = []
+    for window_start_date, rebalance_date, end_date in period_list:
+        window_start, rebalance, end = column_dict[window_start_date], column_dict[rebalance_date], column_dict[end_date]
+        window_matrix = price_matrix[:, window_start:rebalance + 1]
+
+        ranking_values = calculate_ranking_values(window_matrix, window_matrix[benchmark_row], rank_by)
+        ranking_values[excluded_rows] = numpy.nan
+        ranking_values[numpy.isnan(price_matrix[:, rebalance])] = numpy.nan  # can't be bought on the day
+        ranked_rows = metricEngine.rank_by_value(ranking_values, descending)
+        ranked_count = int((~numpy.isnan(ranking_values)).sum())
+        top_rows = ranked_rows[:min(top_count, ranked_count)]
+
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            holding_returns = filled_price_matrix[:, end] / filled_price_matrix[:, rebalance] - 1
+        ranked = ~numpy.isnan(ranking_values)
+
+        result_list.append({
+            'rebalance_date': rebalance_date,
+            'end_date': end_date,
+            'session_count': end - rebalance,
+            'ranked_count': ranked_count,
+            'portfolio_return': float(numpy.nanmean(holding_returns[top_rows])) if len(top_rows) else numpy.nan,
+            'universe_return': float(numpy.nanmean(holding_returns[ranked])) if ranked_count else numpy.nan,
+            'benchmark_return': float(holding_returns[benchmark_row]),
+            'rank_correlation': calculate_rank_correlation(ranking_values, holding_returns),
+            'holdings': ' '.join(symbol_list[row] for row in top_rows),
+        })
+    return result_list
+
+
+def split_into_chunks(item_list, chunk_count):
+    """Splits 'item_list' into at most 'chunk_count' consecutive chunks of about the same length"""
+    chunk_size = max(1, -(-len(item_list) // chunk_count))  # rounded up
+    return [item_list[start:start + chunk_size] for start in range(0, len(item_list), chunk_size)]
+
+
+def run_backtest(from_date, to_date, rank_by='beta_value', top_count=DEFAULT_TOP_COUNT,
+                 rebalance_sessions=DEFAULT_REBALANCE_SESSIONS, descending=True, benchmark_symbol=INDEX_SYMBOL,
+                 worker_count=None):
+    """
+    Replays the stored daily prices from 'from_date' to 'to_date': every 'rebalance_sessions' sessions every stored
+    stock is ranked by 'rank_by' over the month before (the highest first, unless 'descending' is False)
+    and an equally weighted portfolio of the top 'top_count' is held until the next ranking.
+    The periods are split between 'worker_count' processes (by default one per core; 1 runs them in this process).
+    Returns a table with one row per period, or None if fewer than two rankings fit in the stored days
+    """
+    date_list = priceStore.get_price_matrix([benchmark_symbol], from_date, to_date)[0]
+    period_list = get_rebalance_periods(date_list, rebalance_sessions)
+    if len(period_list) < 2:
+        return None
+
+    worker_count = worker_count or os.cpu_count() or 1
+    chunk_list = split_into_chunks(period_list, worker_count * CHUNKS_PER_WORKER)
+    arguments = (priceStore.PRICE_STORE_PATH, rank_by, top_count, descending, benchmark_symbol)
+
+    if worker_count == 1:
+        chunk_result_list = [evaluate_periods(chunk, *arguments) for chunk in chunk_list]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=worker_count) as executor:
+            futures = [executor.submit(evaluate_periods, chunk, *arguments) for chunk in chunk_list]
+            chunk_result_list = [future.result() for future in futures]
+
+    return pandas.DataFrame([result for chunk_results in chunk_result_list for result in chunk_results])
+
+
+def summarise_backtest(result_table):
+    """
+    Returns the total and yearly return of the portfolio, the whole ranked universe and the benchmark,
+    how often the portfolio beat the benchmark and the mean rank correlation between the ranking and the returns
+    """
+    session_count = result_table['session_count'].sum()
+    summary_dict = {}
+    for name in ['portfolio', 'universe', 'benchmark']:
+        total_return = float((1 + result_table[f'{name}_return'].fillna(0)).prod() - 1)
+        summary_dict[f'{name}_total_return'] = total_return
+        summary_dict[f'{name}_yearly_return'] = (1 + total_return) ** (metricEngine.TRADING_DAYS_PER_YEAR / session_count) - 1
+
+    summary_dict['periods_beating_benchmark'] = float(
+        (result_table['portfolio_return'] > result_table['benchmark_return']).mean())
+    summary_dict['mean_rank_correlation'] = float(result_table['rank_correlation'].mean())
+    return summary_dict
+
+
+def main():
+    """Reads the command line arguments, runs the backtest and writes its periods and summary"""
+    parser = argparse.ArgumentParser(description="Backtest a portfolio of the stocks ranked highest by beta value")
+    parser.add_argument('--from', dest='from_date', type=datetime.date.fromisoformat,
+                        help=f"first day (YYYY-MM-DD) of the backtest (default: {DEFAULT_HISTORY_YEARS} years back)")
+    parser.add_argument('--to', dest='to_date', type=datetime.date.fromisoformat,
+                        help="last day (YYYY-MM-DD) of the backtest (default: the last closed session)")
+    parser.add_argument('--rank-by', default='beta_value', choices=RANKING_METRICS, help="the metric the stocks are ranked by")
+    parser.add_argument('--lowest', action='store_true', help="hold the lowest ranked stocks instead of the highest")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP_COUNT, help="how many stocks the portfolio holds")
+    parser.add_argument('--rebalance', type=int, default=DEFAULT_REBALANCE_SESSIONS,
+                        help="sessions between two rankings")
+    parser.add_argument('--benchmark', default=INDEX_SYMBOL, help="the benchmark for the beta value and the returns")
+    parser.add_argument('--workers', type=int, help="processes to split the periods between (default: one per core)")
+    parser.add_argument('--load-prices', action='store_true',
+                        help="first store the prices of the days that are missing (one request per trading day)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_PATH, help="where the result of every period is written")
+    arguments = parser.parse_args()
+
+    to_date = arguments.to_date or last_closed_business_day()
+    from_date = arguments.from_date or sessions_back(to_date, DEFAULT_HISTORY_YEARS * metricEngine.TRADING_DAYS_PER_YEAR)
+
+    if arguments.load_prices:
+        error_messages = []
+        analysisCore.set_error_handler(error_messages.append)
+        if not analysisCore.load_grouped_daily_prices(from_date, to_date):
+            print(f"Unable to load the prices of every trading day: {'; '.join(error_messages)}")
+            return
+
+    result_table = run_backtest(from_date, to_date, arguments.rank_by, arguments.top, arguments.rebalance,
+                                not arguments.lowest, arguments.benchmark, arguments.workers)
+    if result_table is None:
+        print(f"Too few stored trading days from {from_date} to {to_date}; run with --load-prices first")
+        return
+
+    result_table.to_csv(arguments.output, index=False)
+    print(f"{len(result_table)} periods from {result_table['rebalance_date'].iloc[0]} "
+          f"to {result_table['end_date'].iloc[-1]}, written to {arguments.output}")
+    for name, value in summarise_backtest(result_table).items():
+        value_text = f"{value:.3f}" if name == 'mean_rank_correlation' else f"{value:.2%}"
+        print(f"{name.replace('_', ' '):<28}{value_text:>10}")
+
+
+if __name__ == '__main__':
+    main()
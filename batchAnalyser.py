@@ -0,0 +1,383 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import analysisCore
+import argparse
+import datetime
+import fundamentalStore
+import instrumentation
+import json
+import metricEngine
+import numpy
+import os
+import pandas
+import priceStore
+import screener
+import sp500Constituents
+import time
+from analysisCore import INDEX_SYMBOL, Stock, get_benchmark
+from getBusinessDayDates import business_day_one_month_ago, last_business_day
+
+DEFAULT_CHECKPOINT_PATH = 'batch_checkpoint.json'  # Progress of the batch run, one result per analysed symbol
+DEFAULT_OUTPUT_PATH = 'batch_results.csv'  # The result table of the whole batch run
+PREFETCH_CHUNK_SIZE = 50  # How many symbols have their data requested concurrently before they are analysed
+RESULT_COLUMNS = ['symbol', 'company_name', 'beta_value', 'stock_return', 'highest_price', 'lowest_price',
+                  'pe_value', 'ps_value', 'equity_ratio', 'error']
+WINDOW_METRICS = ['stock_return', 'volatility', 'beta_value']  # written for every lookback with --windows
+
+
+def read_symbol_file(path):
+    """Reads the symbols from the file 'path', one symbol per line (empty lines and lines starting with # are skipped)"""
+    symbol_list = []
+
+    with open(path) as symbol_file:
+        for line in symbol_file:
+            symbol = line.strip().upper()
+            if symbol and not symbol.startswith('#'):
+                symbol_list.append(symbol)
+    return symbol_list
+
+
+def load_checkpoint(path):
+    """Returns the results saved by an earlier run (symbol -> result), or an empty dictionary if there are none"""
+    if not os.path.exists(path):
+        return {}
+
+    with open(path) as checkpoint_file:
+        return json.load(checkpoint_file)
+
+
+def save_checkpoint(path, results):
+    """
+    Saves the results gathered so far to 'path'.
+    It is written to a temporary file first, so a crash while saving can't destroy the earlier checkpoint
+    """
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'w') as checkpoint_file:
+        json.dump(results, checkpoint_file, indent=1)
+    os.replace(temporary_path, path)
+
+
+def window_metric_columns(window_metric_dict):
+    """Flattens the WINDOW_METRICS of every bar size and lookback into result columns, f.e 'daily_1Y_beta_value'"""
+    return {f"{bar_size.replace(' ', '')}_{window_name}_{metric}": metrics[metric]
+            for bar_size, window_metrics in window_metric_dict.items()
+            for window_name, metrics in window_metrics.items()
+            for metric in WINDOW_METRICS}
+
+
+def analyse_symbol(symbol, benchmark, error_messages, technical=True, fundamental=True, windows=False,
+                   intraday=False):
+    """
+    Runs the technical and/or fundamental analysis for 'symbol' without the GUI.
+    'benchmark' is the Index the beta value is calculated against and
+    'error_messages' the list the error handler appends to.
+    With 'windows' the metrics of every lookback and bar size are added as well ('intraday' adds the last session's)
+    Returns a dictionary with the result; the 'error' key is set if some of the data couldn't be gathered
+    """
+    analysisCore.clear_data_error()
+    error_messages.clear()
+    result = dict.fromkeys(RESULT_COLUMNS)
+    result['symbol'] = symbol
+
+    stock = analysisCore.stock_dict.get(symbol) or Stock(symbol)
+
+    if technical and not analysisCore.unable_to_get_data:
+        stock.get_technical_data()
+        if not analysisCore.unable_to_get_data:
+            stock.calculate_beta_value(benchmark)
+            result['beta_value'] = stock.beta_value
+            result['stock_return'] = stock.stock_return
+            result['highest_price'] = stock.highest_price
+            result['lowest_price'] = stock.lowest_price
+            if windows or intraday:
+                stock.calculate_window_metrics(benchmark, intraday)
+                result.update(window_metric_columns(stock.window_metric_dict))
+
+    if fundamental and not analysisCore.unable_to_get_data:
+        stock.get_fundamental_data()
+        if not analysisCore.unable_to_get_data:
+            result['pe_value'] = stock.pe_value
+            result['ps_value'] = stock.ps_value
+            result['equity_ratio'] = stock.equity_ratio
+
+    result['company_name'] = stock.company_name
+    if analysisCore.unable_to_get_data:
+        result['error'] = '; '.join(error_messages) or "Unable to get the data"
+    else:
+        analysisCore.add_analysed_stock(stock)
+
+    return result
+
+
+def write_result_table(results, path):
+    """Writes every result to the CSV file 'path', the highest beta value first"""
+    window_columns = list(dict.fromkeys(column for result in results.values() for column in result
+                                        if column not in RESULT_COLUMNS))
+    result_table = pandas.DataFrame(list(results.values()), columns=RESULT_COLUMNS + window_columns)
+    result_table = result_table.sort_values('beta_value', ascending=False, na_position='last')
+    result_table.to_csv(path, index=False)
+    return result_table
+
+
+def run_batch(symbol_list, checkpoint_path=DEFAULT_CHECKPOINT_PATH, output_path=DEFAULT_OUTPUT_PATH,
+              benchmark_symbol=INDEX_SYMBOL, technical=True, fundamental=True, retry_failed=False, bulk_prices=False,
+              windows=False, intraday=False):
+    """
+    Analyses every symbol in 'symbol_list' and writes one result table to 'output_path'.
+    If 'bulk_prices' is True the closing prices of every stock are first loaded with one request per trading day
+    (the grouped daily endpoint) instead of one request per symbol.
+    'windows' and 'intraday' add the metrics of every lookback and bar size (see analyse_symbol).
+    The progress is saved to 'checkpoint_path' after each symbol, so a run that was stopped
+    picks up where it left off. Symbols that failed are only analysed again if 'retry_failed' is True.
+    The data for each chunk of symbols is requested concurrently (bounded by the rate limiter) before
+    the chunk is analysed. The rate limiter spaces out the requests, so the run can be left unattended
+    """
+    error_messages = []
+    analysisCore.set_error_handler(error_messages.append)
+
+    results = load_checkpoint(checkpoint_path)
+    remaining_symbols = [symbol for symbol in symbol_list
+                         if symbol not in results or (retry_failed and results[symbol]['error'])]
+    print(f"{len(symbol_list) - len(remaining_symbols)} symbols already done, {len(remaining_symbols)} to analyse")
+
+    if technical and bulk_prices:
+        analysisCore.clear_data_error()
+        if not analysisCore.load_grouped_daily_prices():
+            print(f"Unable to load every trading day in bulk, the rest is requested per symbol: "
+                  f"{'; '.join(error_messages)}")
+
+    benchmark = None
+    if technical:
+        analysisCore.clear_data_error()
+        benchmark = get_benchmark(benchmark_symbol)
+        if benchmark is None:
+            print(f"Unable to get the data for the benchmark {benchmark_symbol}: {'; '.join(error_messages)}")
+            return None  # every beta value needs the benchmark; nothing can be done
+
+    for number, symbol in enumerate(remaining_symbols, start=1):
+        if (number - 1) % PREFETCH_CHUNK_SIZE == 0:
+            analysisCore.prefetch_stock_data(remaining_symbols[number - 1:number - 1 + PREFETCH_CHUNK_SIZE],
+                                              technical, fundamental)
+
+        result = analyse_symbol(symbol, benchmark, error_messages, technical, fundamental, windows, intraday)
+        results[symbol] = result
+        save_checkpoint(checkpoint_path, results)
+
+        status = result['error'] or "done"
+        print(f"[{number}/{len(remaining_symbols)}] {symbol}: {status}")
+
+    return write_result_table(results, output_path)
+
+
+def run_vectorised_technical_analysis(symbol_list, output_path=DEFAULT_OUTPUT_PATH, benchmark_symbol=INDEX_SYMBOL):
+    """
+    Calculates the technical metrics of every symbol at once from the price store
+    (filled with one request per trading day), instead of one Stock object at a time.
+    Writes the result table ranked by beta value to 'output_path' and returns it, or None if the prices couldn't be loaded
+    """
+    error_messages = []
+    analysisCore.set_error_handler(error_messages.append)
+    analysisCore.clear_data_error()
+
+    if not analysisCore.load_grouped_daily_prices():
+        print(f"Unable to load the prices of every trading day: {'; '.join(error_messages)}")
+        return None
+
+    date_list, price_matrix = priceStore.get_price_matrix(symbol_list + [benchmark_symbol],
+                                                          business_day_one_month_ago(), last_business_day())
+    metric_dict = metricEngine.calculate_technical_metrics(price_matrix[:-1], price_matrix[-1])
+
+    result_table = pandas.DataFrame(metric_dict)
+    result_table.insert(0, 'symbol', symbol_list)
+    result_table = result_table.iloc[metricEngine.rank_by_value(metric_dict['beta_value'])]
+    result_table.to_csv(output_path, index=False)
+    print(f"Ranked {len(symbol_list)} symbols over {len(date_list)} trading days")
+    return result_table
+
+
+def run_valuation_screen(symbol_list, output_path=DEFAULT_OUTPUT_PATH, as_of_date=None):
+    """
+    Stores every quarterly and annual report of each symbol (only reports older than a week are requested again)
+    and the prices of the week up to 'as_of_date' (by default the last business day), then calculates the
+    P/E value, P/S value, equity ratio and trailing twelve months EPS of every symbol at once, from the stored data.
+    Writes the values on the last stored trading day to 'output_path', the lowest positive P/E value first,
+    and returns the table, or None if the prices couldn't be loaded
+    """
+    error_messages = []
+    analysisCore.set_error_handler(error_messages.append)
+    analysisCore.clear_data_error()
+    as_of_date = as_of_date or last_business_day()
+
+    failed_symbol_list = analysisCore.update_fundamentals(symbol_list)
+    if not analysisCore.load_grouped_daily_prices(as_of_date - datetime.timedelta(days=7), as_of_date):
+        print(f"Unable to load the prices of every trading day: {'; '.join(error_messages)}")
+        return None
+
+    date_list, valuation_dict = fundamentalStore.get_valuation_series(
+        symbol_list, as_of_date - datetime.timedelta(days=7), as_of_date)
+    if not date_list:
+        print(f"No prices are stored for the week up to {as_of_date}")
+        return None
+
+    result_table = pandas.DataFrame({name: matrix[:, -1] for name, matrix in valuation_dict.items()})
+    result_table.insert(0, 'symbol', symbol_list)
+    result_table['error'] = ["Unable to get the financial reports" if symbol in failed_symbol_list else None
+                             for symbol in symbol_list]
+    positive_pe_values = numpy.where(result_table['pe_value'] > 0, result_table['pe_value'], numpy.nan)
+    result_table = result_table.iloc[metricEngine.rank_by_value(positive_pe_values, descending=False)]
+    result_table.to_csv(output_path, index=False)
+    print(f"Valued {len(symbol_list)} symbols on {date_list[-1]} ({len(failed_symbol_list)} without reports)")
+    return result_table
+
+
+def screen_result_table(result_path, filter_text=None, sort_text='beta desc', limit=None):
+    """
+    Screens the result table written by an earlier run ('result_path') with 'filter_text'
+    (f.e "beta > 1.2 and pe < 15"), orders it by 'sort_text' (f.e "beta desc, pe") and prints the first 'limit' rows.
+    Makes no request. Returns the screened table, or None if the filter or the sort keys can't be understood
+    """
+    result_table = pandas.read_csv(result_path)
+    metric_table = screener.MetricTable()
+    metric_column_list = [column for column in result_table.columns
+                          if pandas.api.types.is_numeric_dtype(result_table[column])]
+    for row in result_table.to_dict('records'):
+        metric_table.update(row['symbol'], {column: row[column] for column in metric_column_list})
+
+    try:
+        sort_key_list = screener.parse_sort_keys(sort_text, metric_table) or [('beta_value', True)]
+        symbol_list = metric_table.query(filter_text, sort_key_list, limit)
+    except ValueError as e:
+        print(e)
+        return None
+
+    screened_table = result_table.set_index('symbol').loc[symbol_list].reset_index()
+    print(screened_table.to_string(index=False))
+    print(f"{len(symbol_list)} of {len(result_table)} symbols pass")
+    return screened_table
+
+
+def refresh_price_series(symbol_list, output_path=DEFAULT_OUTPUT_PATH):
+    """
+    Brings the stored series of every symbol up to the last closed session (at most one small request each)
+    and writes a result table with the return, extremes and beta value each series keeps up to date
+    """
+    error_messages = []
+    analysisCore.set_error_handler(error_messages.append)
+    row_list = []
+
+    for symbol in symbol_list:
+        analysisCore.clear_data_error()
+        error_messages.clear()
+        row = dict.fromkeys(RESULT_COLUMNS)
+        row['symbol'] = symbol
+
+        series = analysisCore.update_price_series(symbol)
+        if series is None or not series.closing_price_list:
+            row['error'] = '; '.join(error_messages) or "No closing prices"
+        else:
+            row['stock_return'] = series.stock_return()
+            row['highest_price'], row['lowest_price'] = series.price_extremes()
+            row['beta_value'] = series.beta_value()
+        row_list.append(row)
+
+    return write_result_table({row['symbol']: row for row in row_list}, output_path)
+
+
+def refresh_indicators(symbol_list, output_path=DEFAULT_OUTPUT_PATH, every=None):
+    """
+    Writes a table with the streaming indicators of every symbol to 'output_path'.
+    The first pass feeds each stock's stored history once; with 'every' (seconds) it keeps running and
+    each later pass only feeds the latest prices (one snapshot request for the whole list while the market is open)
+    """
+    error_messages = []
+    analysisCore.set_error_handler(error_messages.append)
+
+    while True:
+        started_at = time.monotonic()
+        analysisCore.clear_data_error()
+        value_dict = analysisCore.refresh_live_indicators(symbol_list)
+
+        result_table = pandas.DataFrame.from_dict(value_dict, orient='index')
+        result_table.index.name = 'symbol'
+        result_table.to_csv(output_path)
+        print(f"Updated the indicators of {len(value_dict)}/{len(symbol_list)} symbols "
+              f"in {time.monotonic() - started_at:.1f} s")
+        if error_messages:
+            print('; '.join(error_messages))
+            error_messages.clear()
+
+        if every is None:
+            return result_table
+        time.sleep(max(0.0, every - (time.monotonic() - started_at)))
+
+
+def main():
+    """Reads the command line arguments and starts the batch run"""
+    parser = argparse.ArgumentParser(description="Analyse a whole list of stocks without the GUI")
+    parser.add_argument('--symbols', help="file with one symbol per line (default: the S&P 500)")
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT_PATH, help="where the progress is saved")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_PATH, help="where the result table is written")
+    parser.add_argument('--benchmark', default=INDEX_SYMBOL, help="the benchmark for the beta value")
+    parser.add_argument('--technical-only', action='store_true', help="skip the fundamental analysis")
+    parser.add_argument('--fundamental-only', action='store_true', help="skip the technical analysis")
+    parser.add_argument('--retry-failed', action='store_true', help="analyse the symbols that failed again")
+    parser.add_argument('--bulk-prices', action='store_true',
+                        help="load the prices of every stock with one request per trading day first")
+    parser.add_argument('--refresh-series', action='store_true',
+                        help="only bring the stored price series up to date and write their technical metrics")
+    parser.add_argument('--vectorised', action='store_true',
+                        help="only calculate the technical metrics, for every symbol at once from the bulk prices")
+    parser.add_argument('--windows', action='store_true',
+                        help="add the return, volatility and beta value over every lookback (1M to 5Y, daily and weekly)")
+    parser.add_argument('--intraday', action='store_true',
+                        help="like --windows, plus the last session in 5, 15 and 60 minute bars (one more request each)")
+    parser.add_argument('--indicators', action='store_true',
+                        help="only write the streaming indicators (SMA, EMA, volatility, RSI, drawdown, beta, correlation)")
+    parser.add_argument('--every', type=float,
+                        help="with --indicators, keep updating them with the latest prices every this many seconds")
+    parser.add_argument('--valuation', action='store_true',
+                        help="only store every financial report and write the P/E, P/S, equity ratio and TTM EPS")
+    parser.add_argument('--as-of', type=datetime.date.fromisoformat,
+                        help="with --valuation, the day (YYYY-MM-DD) to value the stocks on (default: the last business day)")
+    parser.add_argument('--screen', metavar='FILTER',
+                        help="only screen the result table of an earlier run, f.e \"beta > 1.2 and pe < 15\"")
+    parser.add_argument('--sort', default='beta desc', help="with --screen, the sort keys, f.e \"beta desc, pe\"")
+    parser.add_argument('--top', type=int, help="with --screen, how many symbols to show at most")
+    arguments = parser.parse_args()
+    instrumentation.start_from_environment()  # the Prometheus endpoint, if METRICS_PORT is set
+
+    if arguments.screen is not None:
+        screen_result_table(arguments.output, arguments.screen, arguments.sort, arguments.top)
+        return  # no symbols, Stock objects or checkpoint needed
+
+    if arguments.symbols:
+        symbol_list = read_symbol_file(arguments.symbols)
+    else:
+        symbol_list = sp500Constituents.get_sp500_symbols()
+
+    if arguments.refresh_series:
+        refresh_price_series(symbol_list, arguments.output)
+        return  # no Stock objects or checkpoint needed
+
+    if arguments.indicators:
+        refresh_indicators(symbol_list, arguments.output, arguments.every)
+        return  # no Stock objects or checkpoint needed
+
+    if arguments.valuation:
+        run_valuation_screen(symbol_list, arguments.output, arguments.as_of)
+        return  # no Stock objects or checkpoint needed
+
+    if arguments.vectorised:
+        run_vectorised_technical_analysis(symbol_list, arguments.output, arguments.benchmark)
+        return  # no Stock objects or checkpoint needed
+
+    analysisCore.register_benchmark(arguments.benchmark)
+    run_batch(symbol_list, arguments.checkpoint, arguments.output, arguments.benchmark,
+              technical=not arguments.fundamental_only, fundamental=not arguments.technical_only,
+              retry_failed=arguments.retry_failed, bulk_prices=arguments.bulk_prices,
+              windows=arguments.windows, intraday=arguments.intraday)
+
+
+if __name__ == '__main__':
+    main()
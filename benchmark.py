@@ -0,0 +1,330 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import os
+import tempfile
+
+# Every run gets empty stores and goes past the on-disk cache, so each one starts cold and is measured the same way.
+# This has to be set before the program's modules are imported, they read it when they are loaded
+BENCHMARK_DIRECTORY = tempfile.mkdtemp(prefix='stock_analyser_benchmark_')
+os.environ.update({
+    'DISK_CACHE': 'off',
+    'RECORD_PATH': '',
+    'API_KEY': os.getenv('API_KEY') or 'benchmark',
+    'SERIES_STORE_PATH': os.path.join(BENCHMARK_DIRECTORY, 'series_store'),
+    'PRICE_STORE_PATH': os.path.join(BENCHMARK_DIRECTORY, 'price_store'),
+})
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+import analysisCore
+import batchAnalyser
+import getBusinessDayDates
+import metricEngine
+import mockPolygonServer
+import polygonClient
+import priceStore
+import rateLimiter
+import requests
+import screener
+import seriesStore
+
+# Measures the main paths of the program against the mock server (mockPolygonServer.py), which replays recorded
+# responses and makes up the rest, so the numbers don't depend on the network or the quota:
+#     python benchmark.py --recordings recordings --output results.jsonl
+#     python benchmark.py --baseline results.jsonl  (compares with an earlier run and fails on a regression)
+# Each benchmark reports the requests it sent, its wall time (the fastest of --repeat runs) and its peak memory
+
+DEFAULT_UNIVERSE_SIZE = 50  # How many stocks the batch benchmarks analyse
+DEFAULT_RANKING_SIZE = 5000  # How many analysed stocks the ranking benchmark sorts
+DEFAULT_REPEAT = 3
+REGRESSION_THRESHOLD = 1.2  # A benchmark 20% slower (or using 20% more memory or requests) than the baseline fails
+SERVER_START_TIMEOUT = 10  # seconds
+
+
+def reset_state(run_directory, plan):
+    """Gives the next run empty stores and forgets everything the program keeps in memory, so every run starts cold"""
+    seriesStore.SERIES_STORE_PATH = os.path.join(run_directory, 'series_store')
+    seriesStore.loaded_series.clear()
+    priceStore.PRICE_STORE_PATH = os.path.join(run_directory, 'price_store')
+    priceStore.loaded_partitions.clear()
+    priceStore.symbol_list = None
+    priceStore.symbol_row_dict = {}
+
+    polygonClient.session_responses.clear()
+    rateLimiter.rate_limiter = rateLimiter.create_rate_limiter(plan)
+    analysisCore.stock_dict.clear()
+    analysisCore.metric_table = screener.MetricTable(['beta_value'])
+    analysisCore.benchmark_dict.clear()
+    analysisCore.indicator_set_dict.clear()
+    analysisCore.clear_data_error()
+
+
+def benchmark_technical_analysis(context):
+    """The technical analysis of one stock, including the benchmark (SPY) it is compared with"""
+    analysisCore.run_technical_analysis(context['symbol_list'][0])
+
+
+def benchmark_fundamental_analysis(context):
+    """The fundamental analysis of one stock"""
+    analysisCore.run_fundamental_analysis(context['symbol_list'][0])
+
+
+def benchmark_batch_analysis(context):
+    """The technical and fundamental analysis of the whole universe, one Stock object at a time"""
+    batchAnalyser.run_batch(context['symbol_list'], os.path.join(context['run_directory'], 'checkpoint.json'),
+                            os.path.join(context['run_directory'], 'results.csv'))
+
+
+def benchmark_vectorised_analysis(context):
+    """The technical metrics of the whole universe at once, from the grouped daily bars"""
+    batchAnalyser.run_vectorised_technical_analysis(context['symbol_list'],
+                                                    os.path.join(context['run_directory'], 'results.csv'))
+
+
+def setup_ranking(context):
+    """Makes the analysed stocks to rank (Index objects, which need no request to be created) in 'stock_list'"""
+    random_generator = random.Random(0)
+    context['stock_list'] = []
+    for number in range(context['ranking_size']):
+        stock = analysisCore.Index(f"R{number:05d}")
+        stock.beta_value = random_generator.gauss(1, 0.4)
+        stock.has_beta_value = random_generator.random() > 0.05
+        stock.pe_value = random_generator.uniform(-10, 60)
+        stock.equity_ratio = random_generator.random()
+        context['stock_list'].append(stock)
+
+
+def setup_screening(context):
+    """Fills 'stock_dict' with the analysed stocks of 'setup_ranking'"""
+    setup_ranking(context)
+    for stock in context['stock_list']:
+        analysisCore.add_analysed_stock(stock)
+
+
+def benchmark_ranking(context):
+    """
+    Adding every analysed stock as its analysis finishes (which keeps them sorted by beta value),
+    then ranking them (what sort_stocks_by_beta draws)
+    """
+    for stock in context['stock_list']:
+        analysisCore.add_analysed_stock(stock)
+    analysisCore.get_stocks_ranked_by_beta()
+
+
+def benchmark_screening(context):
+    """Screening every analysed stock with a filter, sorting by two metrics and keeping the top 50"""
+    analysisCore.screen_stocks("beta > 1.2 and pe < 15 and equity_ratio > 0.4", "beta desc, pe", 50)
+
+
+def benchmark_window_metrics(context):
+    """Every lookback's metrics for the whole universe over five years of made-up daily prices"""
+    random_generator = random.Random(0)
+    day_count = max(metricEngine.LOOKBACK_WINDOWS.values()) + 1
+    price_matrix = [[100.0] for number in range(len(context['symbol_list']) + 1)]
+    for prices in price_matrix:
+        for day in range(day_count - 1):
+            prices.append(prices[-1] * (1 + random_generator.gauss(0, 0.02)))
+
+    price_matrix = metricEngine.to_price_matrix(price_matrix)
+    metricEngine.calculate_window_metrics(price_matrix[:-1], price_matrix[-1])
+
+
+def benchmark_business_days(context):
+    """The calendar built from scratch, then the date arithmetic every analysis does, for every day of ten years"""
+    getBusinessDayDates.calendar_first_date = None  # the calendar is built again
+    getBusinessDayDates.calendar_last_date = None
+    first_date = datetime.date.today() - datetime.timedelta(days=3650)
+
+    for day in range(3650):
+        date = first_date + datetime.timedelta(days=day)
+        getBusinessDayDates.is_business_day(date)
+        getBusinessDayDates.next_business_day(date)
+        getBusinessDayDates.sessions_back(date, getBusinessDayDates.SESSIONS_PER_MONTH)
+        getBusinessDayDates.business_days_between(date, date + datetime.timedelta(days=30))
+    getBusinessDayDates.last_closed_business_day()
+
+
+# name -> (setup run before the measurement or None, the function measured)
+BENCHMARK_DICT = {
+    'technical_analysis': (None, benchmark_technical_analysis),
+    'fundamental_analysis': (None, benchmark_fundamental_analysis),
+    'batch_analysis': (None, benchmark_batch_analysis),
+    'vectorised_analysis': (None, benchmark_vectorised_analysis),
+    'ranking': (setup_ranking, benchmark_ranking),
+    'screening': (setup_screening, benchmark_screening),
+    'window_metrics': (None, benchmark_window_metrics),
+    'business_days': (None, benchmark_business_days),
+}
+
+
+def get_mock_stats(base_url):
+    """Returns what the mock server has been asked for since it was last reset"""
+    return requests.get(base_url + '/__stats').json()
+
+
+def measure(name, context, base_url, plan, trace_memory):
+    """
+    Runs the benchmark 'name' once from a cold start.
+    Returns (wall time in seconds, peak memory in bytes or None, the mock server's stats, error messages)
+    """
+    setup_function, benchmark_function = BENCHMARK_DICT[name]
+    context['run_directory'] = tempfile.mkdtemp(dir=BENCHMARK_DIRECTORY)
+    reset_state(context['run_directory'], plan)
+    error_messages = []
+    analysisCore.set_error_handler(error_messages.append)
+    if setup_function is not None:
+        setup_function(context)
+    requests.get(base_url + '/__reset')
+
+    peak_memory = None
+    if trace_memory:
+        tracemalloc.start()
+    started_at = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # the batch runs print their progress
+        benchmark_function(context)
+    wall_time = time.perf_counter() - started_at
+    if trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    shutil.rmtree(context['run_directory'], ignore_errors=True)
+    return wall_time, peak_memory, get_mock_stats(base_url), error_messages
+
+
+def run_benchmark(name, context, base_url, plan, repeat):
+    """
+    Runs the benchmark 'name' 'repeat' times for its wall time (the fastest run, the least disturbed by the machine)
+    and once more with tracemalloc for its peak memory, which slows the run down too much to be timed.
+    Returns the result as a dictionary
+    """
+    wall_time_list = []
+    for run in range(repeat):
+        wall_time, peak_memory, stats, error_messages = measure(name, context, base_url, plan, trace_memory=False)
+        wall_time_list.append(wall_time)
+    peak_memory = measure(name, context, base_url, plan, trace_memory=True)[1]
+
+    return {
+        'benchmark': name,
+        'wall_time': min(wall_time_list),
+        'peak_memory': peak_memory,
+        'requests': stats['requests'],
+        'requests_by_endpoint': stats['by_endpoint'],
+        'rate_limited': stats['rate_limited'],
+        'errors': len(error_messages),
+    }
+
+
+def find_free_port():
+    """Returns a port on 127.0.0.1 nothing is listening on"""
+    with socket.socket() as free_socket:
+        free_socket.bind(('127.0.0.1', 0))
+        return free_socket.getsockname()[1]
+
+
+def start_mock_server(arguments):
+    """
+    Starts the mock server in its own process, so it doesn't take time or memory from what is measured.
+    Returns (the process, its base URL)
+    """
+    port = find_free_port()
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mockPolygonServer.py'),
+               '--port', str(port), '--latency', str(arguments.latency)]
+    if arguments.recordings:
+        command += ['--recordings', arguments.recordings]
+    if arguments.universe:
+        command += ['--universe', arguments.universe]
+    server_process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+
+    started_at = time.monotonic()
+    while time.monotonic() - started_at < SERVER_START_TIMEOUT:
+        try:
+            get_mock_stats(base_url)
+            return server_process, base_url
+        except requests.ConnectionError:
+            time.sleep(0.05)
+    server_process.kill()
+    raise RuntimeError("The mock server didn't start")
+
+
+def read_results(path):
+    """Reads results written with --output: benchmark name -> result"""
+    with open(path) as result_file:
+        return {result['benchmark']: result for result in map(json.loads, result_file) if result}
+
+
+def compare_with_baseline(result, baseline_result):
+    """Returns the measurements where 'result' is more than REGRESSION_THRESHOLD times the baseline's"""
+    regression_list = []
+    for measurement in ['wall_time', 'peak_memory', 'requests']:
+        if result[measurement] and baseline_result.get(measurement):
+            ratio = result[measurement] / baseline_result[measurement]
+            if ratio > REGRESSION_THRESHOLD:
+                regression_list.append(f"{measurement} x{ratio:.2f}")
+    return regression_list
+
+
+def main():
+    """Reads the command line arguments, runs the benchmarks and reports them"""
+    parser = argparse.ArgumentParser(description="Measure the analyses against the mock Polygon server")
+    parser.add_argument('--recordings', help="folder of recorded responses for the mock server to replay")
+    parser.add_argument('--universe', help="file with the symbols of the mock server's market, one per line")
+    parser.add_argument('--universe-size', type=int, default=DEFAULT_UNIVERSE_SIZE,
+                        help="how many stocks the batch benchmarks analyse")
+    parser.add_argument('--ranking-size', type=int, default=DEFAULT_RANKING_SIZE,
+                        help="how many stocks the ranking benchmark sorts")
+    parser.add_argument('--latency', type=float, default=0.0, help="milliseconds the mock server holds back a response")
+    parser.add_argument('--plan', default='advanced', choices=rateLimiter.PLAN_TIERS,
+                        help="the rate limit the requests are held to (default: the paid plans' limit)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="timed runs of every benchmark")
+    parser.add_argument('--only', nargs='+', choices=BENCHMARK_DICT, help="run only these benchmarks")
+    parser.add_argument('--output', help="write the results to this file, one JSON object per line")
+    parser.add_argument('--baseline', help="compare with the results of an earlier --output; fail on a regression")
+    arguments = parser.parse_args()
+
+    server_process, base_url = start_mock_server(arguments)
+    polygonClient.POLYGON_URL = base_url
+    universe = [symbol for symbol in mockPolygonServer.read_universe(arguments.universe)
+                if symbol not in mockPolygonServer.BENCHMARK_SYMBOLS]
+    context = {'symbol_list': universe[:arguments.universe_size], 'ranking_size': arguments.ranking_size}
+    baseline_dict = read_results(arguments.baseline) if arguments.baseline else {}
+
+    result_list = []
+    regression_found = False
+    print(f"{'benchmark':<22}{'wall time':>12}{'peak memory':>14}{'requests':>10}{'429s':>6}{'errors':>8}")
+    try:
+        for name in arguments.only or BENCHMARK_DICT:
+            result = run_benchmark(name, context, base_url, arguments.plan, arguments.repeat)
+            result_list.append(result)
+
+            line = (f"{name:<22}{result['wall_time'] * 1000:>10.1f}ms{result['peak_memory'] / 2 ** 20:>12.2f}MB"
+                    f"{result['requests']:>10}{result['rate_limited']:>6}{result['errors']:>8}")
+            if name in baseline_dict:
+                regression_list = compare_with_baseline(result, baseline_dict[name])
+                line += f"  REGRESSION: {', '.join(regression_list)}" if regression_list else "  ok"
+                regression_found = regression_found or bool(regression_list)
+            print(line)
+    finally:
+        server_process.terminate()
+        shutil.rmtree(BENCHMARK_DIRECTORY, ignore_errors=True)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as result_file:
+            for result in result_list:
+                result_file.write(json.dumps(result) + '\n')
+    return 1 if regression_found else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
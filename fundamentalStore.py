@@ -0,0 +1,195 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import datetime
+import json
+import os
+import time
+import metricEngine
+import numpy
+import priceStore
+from dotenv import load_dotenv
+
+load_dotenv()
+# Folder holding every quarterly and annual report of each symbol, one file per symbol
+FUNDAMENTAL_STORE_PATH = os.getenv('FUNDAMENTAL_STORE_PATH',
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fundamental_store'))
+
+# The values kept from each report: name -> (statement, key) in the financials of the API
+REPORT_VALUES = {
+    'eps': ('income_statement', 'basic_earnings_per_share'),
+    'revenue': ('income_statement', 'revenues'),
+    'shares': ('income_statement', 'basic_average_shares'),
+    'assets': ('balance_sheet', 'assets'),
+    'equity': ('balance_sheet', 'equity'),
+}
+FLOW_VALUES = ['eps', 'revenue']  # summed over the period of the report; the rest are the value at its end
+
+loaded_reports = {}  # symbol -> (list of reports, when they were stored), for every symbol read during this run
+
+
+def get_reports_path(symbol):
+    """Returns the path of the file holding the reports of 'symbol'"""
+    return os.path.join(FUNDAMENTAL_STORE_PATH, f"{symbol}.json")
+
+
+def get_timeframe(result):
+    """Returns 'quarterly', 'annual' or 'ttm' for a report from the financials endpoint"""
+    if result.get('timeframe'):
+        return result['timeframe']
+    if result.get('fiscal_period') == 'FY':
+        return 'annual'
+    if result.get('fiscal_period') == 'TTM':
+        return 'ttm'
+    return 'quarterly'
+
+
+def extract_report(result):
+    """Returns the dates and the values in REPORT_VALUES (None if missing) of one report from the financials endpoint"""
+    financial_data = result.get('financials', {})
+    report = {
+        'timeframe': get_timeframe(result),
+        'fiscal_period': result.get('fiscal_period'),
+        'fiscal_year': result.get('fiscal_year'),
+        'start_date': result.get('start_date'),
+        'end_date': result['end_date'],
+        'filing_date': result.get('filing_date'),
+    }
+
+    for name, (statement, key) in REPORT_VALUES.items():
+        report[name] = financial_data.get(statement, {}).get(key, {}).get('value')
+    return report
+
+
+def merge_reports(report_list, new_report_list):
+    """
+    Adds the reports in 'new_report_list' to 'report_list'; a report for the same period replaces the stored one
+    (f.e a restatement). Returns the reports ordered by the end of their period
+    """
+    report_dict = {(report['timeframe'], report['end_date']): report for report in report_list}
+    for report in new_report_list:
+        report_dict[(report['timeframe'], report['end_date'])] = report
+    return sorted(report_dict.values(), key=lambda report: (report['end_date'], report['timeframe']))
+
+
+def load_reports(symbol):
+    """Returns (the stored reports of 'symbol' ordered by the end of their period, when they were stored or None)"""
+    if symbol not in loaded_reports:
+        if os.path.exists(get_reports_path(symbol)):
+            with open(get_reports_path(symbol)) as reports_file:
+                reports_data = json.load(reports_file)
+            loaded_reports[symbol] = (reports_data['reports'], reports_data['stored_at'])
+        else:
+            loaded_reports[symbol] = ([], None)
+    return loaded_reports[symbol]
+
+
+def store_financials(symbol, results):
+    """
+    Stores every report in 'results' (of the financials endpoint, every page) with the reports stored earlier.
+    Writes to a temporary file first, so a crash can't destroy the stored reports. Returns the stored reports
+    """
+    report_list = merge_reports(load_reports(symbol)[0], [extract_report(result) for result in results
+                                                           if result.get('end_date')])
+    stored_at = time.time()
+
+    os.makedirs(FUNDAMENTAL_STORE_PATH, exist_ok=True)
+    temporary_path = get_reports_path(symbol) + '.tmp'
+    with open(temporary_path, 'w') as reports_file:
+        json.dump({'reports': report_list, 'stored_at': stored_at}, reports_file)
+    os.replace(temporary_path, get_reports_path(symbol))
+
+    loaded_reports[symbol] = (report_list, stored_at)
+    return report_list
+
+
+def is_stale(symbol, max_age):
+    """Checks if the reports of 'symbol' were stored more than 'max_age' seconds ago, or never"""
+    stored_at = load_reports(symbol)[1]
+    return stored_at is None or time.time() - stored_at > max_age
+
+
+def get_quarterly_reports(report_list):
+    """
+    Returns the quarterly reports ordered by the end of their quarter.
+    Many companies file no fourth quarter report, only the annual one, so a missing fourth quarter is made
+    from the annual report: its EPS and revenue minus those of the first three quarters (the EPS only
+    approximately, as the number of shares changes), and the balance sheet at the end of the year
+    """
+    quarter_list = [report for report in report_list if report['timeframe'] == 'quarterly']
+    quarter_dict = {(report['fiscal_year'], report['fiscal_period']): report for report in quarter_list}
+
+    for annual_report in report_list:
+        fiscal_year = annual_report['fiscal_year']
+        if annual_report['timeframe'] != 'annual' or (fiscal_year, 'Q4') in quarter_dict:
+            continue
+        first_quarters = [quarter_dict.get((fiscal_year, f"Q{quarter}")) for quarter in range(1, 4)]
+        if None in first_quarters:
+            continue  # the fourth quarter can't be told apart from the rest of the year
+
+        fourth_quarter = dict(annual_report, timeframe='quarterly', fiscal_period='Q4')
+        third_quarter_end = datetime.date.fromisoformat(first_quarters[-1]['end_date'])
+        fourth_quarter['start_date'] = (third_quarter_end + datetime.timedelta(days=1)).isoformat()
+        for name in FLOW_VALUES:
+            quarter_values = [quarter[name] for quarter in first_quarters]
+            if annual_report[name] is None or None in quarter_values:
+                fourth_quarter[name] = None
+            else:
+                fourth_quarter[name] = annual_report[name] - sum(quarter_values)
+        quarter_list.append(fourth_quarter)
+
+    return sorted(quarter_list, key=lambda report: report['end_date'])
+
+
+def get_report_values(report_list, name):
+    """Returns the value 'name' (f.e 'eps') of each report as an array, numpy.nan where it is missing"""
+    return numpy.array([numpy.nan if report[name] is None else report[name] for report in report_list], dtype=float)
+
+
+def get_fundamental_series(symbol):
+    """
+    Returns the fundamentals of 'symbol' after each quarterly report, in the order they became known:
+    a dictionary of arrays 'known' (the filing date as a date ordinal, or the end of the quarter if unknown),
+    'ttm_eps', 'ttm_revenue' (the sums over the trailing twelve months), 'shares' and 'equity_ratio'
+    """
+    quarter_list = get_quarterly_reports(load_reports(symbol)[0])
+    end_ordinals = numpy.array([datetime.date.fromisoformat(report['end_date']).toordinal() for report in quarter_list],
+                               dtype=numpy.int64)
+    known_ordinals = numpy.array([datetime.date.fromisoformat(report['filing_date'] or report['end_date']).toordinal()
+                                  for report in quarter_list], dtype=numpy.int64)
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        equity_ratios = get_report_values(quarter_list, 'equity') / get_report_values(quarter_list, 'assets')
+
+    series_dict = {
+        'known': known_ordinals,
+        'ttm_eps': metricEngine.calculate_trailing_sums(end_ordinals, get_report_values(quarter_list, 'eps')),
+        'ttm_revenue': metricEngine.calculate_trailing_sums(end_ordinals, get_report_values(quarter_list, 'revenue')),
+        'shares': get_report_values(quarter_list, 'shares'),
+        'equity_ratio': equity_ratios,
+    }
+
+    order = numpy.argsort(known_ordinals, kind='stable')  # a late filing can become known after a later quarter
+    return {name: values[order] for name, values in series_dict.items()}
+
+
+def get_valuation_series(symbol_list, from_date, to_date):
+    """
+    Calculates the P/E value, P/S value, equity ratio and trailing twelve months EPS of every symbol
+    on every stored trading day from 'from_date' to 'to_date', only from the stored prices and reports
+    (no request is made). Each day uses the reports filed by that day, so a past day never sees a later report.
+    Returns (the trading days, a dictionary of matrices with a row per symbol and a column per day)
+    """
+    date_list, price_matrix = priceStore.get_price_matrix(symbol_list, from_date, to_date)
+    date_ordinals = numpy.array([date.toordinal() for date in date_list], dtype=numpy.int64)
+    fundamental_matrices = {name: numpy.full(price_matrix.shape, numpy.nan)
+                            for name in ['ttm_eps', 'ttm_revenue', 'shares', 'equity_ratio']}
+
+    for row, symbol in enumerate(symbol_list):
+        series_dict = get_fundamental_series(symbol)
+        for name, matrix in fundamental_matrices.items():
+            matrix[row] = metricEngine.as_of_values(series_dict['known'], series_dict[name], date_ordinals)
+
+    return date_list, metricEngine.calculate_valuation_ratios(
+        price_matrix, fundamental_matrices['ttm_eps'], fundamental_matrices['ttm_revenue'],
+        fundamental_matrices['shares'], fundamental_matrices['equity_ratio'])
@@ -1,38 +1,192 @@
 # Author: Gustav Lundborg
 # Date: 25-03-2024
-# Revision date: 18-04-2024
+# Revision date: 17-10-2026
 
+import array
+import bisect
 import datetime
 import holidays
 
+try:
+    from zoneinfo import ZoneInfo
+    NEW_YORK_TIME_ZONE = ZoneInfo('America/New_York')
+except Exception:  # no time zone data (f.e Windows without the tzdata package)
+    NEW_YORK_TIME_ZONE = None
 
-# Dictionary of the financial holidays in the New York Stock Exchange
-nyse_holidays = holidays.financial_holidays('NYSE')
+CALENDAR_FIRST_YEAR = 2000  # The calendar covers every session from this year...
+CALENDAR_YEARS_AHEAD = 5  # ...to this many years after the current year; it grows if a date outside is asked for
+SESSIONS_PER_MONTH = 21  # The number of sessions a lookback of one month counts
+OPEN_TIME = datetime.time(9, 30)  # New York time
+REGULAR_CLOSE_TIME = datetime.time(16, 0)  # New York time
+EARLY_CLOSE_TIME = datetime.time(13, 0)  # New York time, on the half-days
 
+# The precomputed calendar: the date ordinal (datetime.date.toordinal) of every session in order,
+# and the position of each one in that array so a session is looked up without a search
+session_ordinal_array = array.array('l')
+session_position_dict = {}
+calendar_first_date = None
+calendar_last_date = None
 
-def is_business_day(date):  
+
+def build_calendar(first_year, last_year):
+    """Precomputes every session from the start of 'first_year' to the end of 'last_year'"""
+    global session_ordinal_array
+    global session_position_dict
+    global calendar_first_date
+    global calendar_last_date
+
+    year_holidays = holidays.financial_holidays('NYSE', years=range(first_year, last_year + 1))
+    first_date = datetime.date(first_year, 1, 1)
+    last_date = datetime.date(last_year, 12, 31)
+
+    ordinal_array = array.array('l')
+    for ordinal in range(first_date.toordinal(), last_date.toordinal() + 1):
+        date = datetime.date.fromordinal(ordinal)
+        if date.weekday() < 5 and date not in year_holidays:
+            ordinal_array.append(ordinal)
+
+    session_ordinal_array = ordinal_array
+    session_position_dict = {ordinal: position for position, ordinal in enumerate(ordinal_array)}
+    calendar_first_date = first_date
+    calendar_last_date = last_date
+
+
+def ensure_calendar_covers(date):
+    """Builds the calendar the first time it is needed, or grows it if 'date' is outside of it"""
+    if calendar_first_date is not None and calendar_first_date <= date <= calendar_last_date:
+        return  # already covered
+
+    first_year = min(CALENDAR_FIRST_YEAR, date.year)
+    last_year = max(datetime.date.today().year + CALENDAR_YEARS_AHEAD, date.year)
+    if calendar_first_date is not None:
+        first_year = min(first_year, calendar_first_date.year)
+        last_year = max(last_year, calendar_last_date.year)
+    build_calendar(first_year, last_year)
+
+
+def session_position_on_or_before(date):
+    """Returns the position in the calendar of the last session on or before 'date' (-1 if there is none)"""
+    ensure_calendar_covers(date)
+    position = bisect.bisect_right(session_ordinal_array, date.toordinal()) - 1
+
+    if position < 0:  # the first days of the calendar's first year; grow it a year back
+        ensure_calendar_covers(calendar_first_date - datetime.timedelta(days=1))
+        position = bisect.bisect_right(session_ordinal_array, date.toordinal()) - 1
+    return position
+
+
+def session_at(position):
+    """Returns the session at 'position' in the calendar as a datetime.date"""
+    if position < 0:
+        raise ValueError("There is no session that far back in the calendar")
+    return datetime.date.fromordinal(session_ordinal_array[position])
+
+
+def is_business_day(date):
     """
     Check if the given date is a business day (i.e., not a weekend or holiday)
     takes in a datetime.date as parameter
     """
-    return date.weekday() < 5 and date not in nyse_holidays
+    ensure_calendar_covers(date)
+    return date.toordinal() in session_position_dict
+
+
+def is_half_day(date):
+    """
+    Check if the given date is a session where the NYSE closes early (13:00):
+    the day before Independence Day, the day after Thanksgiving and Christmas Eve
+    """
+    if not is_business_day(date):
+        return False
+
+    day_before_independence_day = date.month == 7 and date.day == 3
+    day_after_thanksgiving = date.month == 11 and date.weekday() == 4 and 23 <= date.day <= 29
+    christmas_eve = date.month == 12 and date.day == 24
+    return day_before_independence_day or day_after_thanksgiving or christmas_eve
+
+
+def session_close_time(date):
+    """Get the time (New York time) the session on the given date closes"""
+    return EARLY_CLOSE_TIME if is_half_day(date) else REGULAR_CLOSE_TIME
+
+
+def new_york_today():
+    """Get today's date in New York (the local date if there is no time zone data)"""
+    if NEW_YORK_TIME_ZONE is None:
+        return datetime.date.today()
+    return datetime.datetime.now(NEW_YORK_TIME_ZONE).date()
+
+
+def last_business_day():
+    """Get the last business day (today in New York if the market is open today)"""
+    return previous_session(new_york_today(), include_date=True)
+
+
+def last_closed_business_day():
+    """
+    Get the last business day whose session is over.
+    Today's session counts as closed once its closing time (earlier on half-days) has passed in New York.
+    Without time zone data today's session counts as open the whole day
+    """
+    if NEW_YORK_TIME_ZONE is None:
+        business_day = last_business_day()
+        if business_day == datetime.date.today():
+            return previous_business_day(business_day)
+        return business_day
+
+    new_york_now = datetime.datetime.now(NEW_YORK_TIME_ZONE)  # the same moment for the date and the time
+    business_day = previous_session(new_york_now.date(), include_date=True)
+    if business_day == new_york_now.date() and new_york_now.time() < session_close_time(business_day):
+        return previous_business_day(business_day)  # today's session is still open
+    return business_day
+
+
+def business_day_one_month_ago():
+    """Get the business day one month (SESSIONS_PER_MONTH sessions) before the last business day"""
+    return sessions_back(last_business_day(), SESSIONS_PER_MONTH)
+
+
+def previous_session(date, include_date=False):
+    """Get the last session before the given date, or on it if 'include_date' is True and it is a session"""
+    if include_date:
+        return session_at(session_position_on_or_before(date))
+    return session_at(session_position_on_or_before(date - datetime.timedelta(days=1)))
+
+
+def sessions_back(date, session_count):
+    """Get the session 'session_count' sessions before the last session on or before the given date"""
+    position = session_position_on_or_before(date) - session_count
+    while position < 0:  # further back than the calendar; grow it a year at a time
+        ensure_calendar_covers(calendar_first_date - datetime.timedelta(days=1))
+        position = session_position_on_or_before(date) - session_count
+    return session_at(position)
+
+
+def sessions_between(from_date, to_date):
+    """Get the number of sessions from 'from_date' to 'to_date' (both included)"""
+    ensure_calendar_covers(from_date)
+    ensure_calendar_covers(to_date)
+    first_position = bisect.bisect_left(session_ordinal_array, from_date.toordinal())
+    last_position = bisect.bisect_right(session_ordinal_array, to_date.toordinal())
+    return max(0, last_position - first_position)
+
 
+def business_days_between(from_date, to_date):
+    """Get a list of every business day from 'from_date' to 'to_date' (both included)"""
+    ensure_calendar_covers(from_date)
+    ensure_calendar_covers(to_date)
+    first_position = bisect.bisect_left(session_ordinal_array, from_date.toordinal())
+    last_position = bisect.bisect_right(session_ordinal_array, to_date.toordinal())
+    return [datetime.date.fromordinal(ordinal) for ordinal in session_ordinal_array[first_position:last_position]]
 
-def last_business_day():  
-    """Get the last business day of the current month"""
-    today = datetime.date.today()
 
-    while not is_business_day(today):  # Move backward from today's date until finding a business day
-        today -= datetime.timedelta(days=1)
-    return today
+def previous_business_day(date):
+    """Get the business day before the given date (datetime.date)"""
+    return previous_session(date)
 
 
-def business_day_one_month_ago():  
-    """Get the business day one month ago"""
-    today = datetime.date.today()
-    # Calculate the date one month ago
-    one_month_ago = today - datetime.timedelta(days=30)
-    # Move backward from one month ago until finding a business day
-    while not is_business_day(one_month_ago):
-        one_month_ago -= datetime.timedelta(days=1)
-    return one_month_ago
+def next_business_day(date):
+    """Get the business day after the given date (datetime.date)"""
+    ensure_calendar_covers(date + datetime.timedelta(days=7))  # the next session is always within a week
+    position = bisect.bisect_right(session_ordinal_array, date.toordinal())
+    return session_at(position)
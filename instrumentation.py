@@ -0,0 +1,260 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import bisect
+import functools
+import http.server
+import json
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+# Where every event (request, cache lookup, rate limit wait, computation, error) is appended as one JSON line
+METRICS_LOG_PATH = os.getenv('METRICS_LOG_PATH')
+# The port the metrics are served on in the Prometheus text format (http://127.0.0.1:<port>/metrics)
+METRICS_PORT = os.getenv('METRICS_PORT')
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]  # seconds
+SIZE_BUCKETS = [1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216]  # bytes
+COMPUTE_BUCKETS = [0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5]  # seconds
+
+# Help text and kind of every metric, in the order they are exported
+METRIC_DESCRIPTIONS = {
+    'polygon_request_seconds': ('histogram', "Round trip time of the requests to polygon.io per endpoint"),
+    'polygon_response_bytes': ('histogram', "Size of the response bodies from polygon.io per endpoint"),
+    'polygon_requests_total': ('counter', "Requests sent to polygon.io per endpoint and status code"),
+    'polygon_rate_limited_total': ('counter', "Responses with status code 429 per endpoint"),
+    'rate_limit_wait_seconds': ('histogram', "Time the requests waited in the rate limiter's queue"),
+    'cache_lookups_total': ('counter', "Lookups per cache layer (session, in_flight, disk) and result (hit, miss)"),
+    'metric_compute_seconds': ('histogram', "Time spent calculating each metric"),
+    'responses_checked_total': ('counter', "Responses checked by the analyses per status code"),
+    'errors_total': ('counter', "Errors reported to the user"),
+}
+
+
+class Histogram:
+    """
+    Counts observed values into buckets, like a Prometheus histogram.
+
+    Attributes:
+        buckets (list): The upper bound of each bucket, in increasing order.
+        bucket_counts (list): How many values fell in each bucket; the last is for values above every bound.
+        count (int): How many values were observed.
+        total (float): The sum of the observed values.
+    """
+
+    def __init__(self, buckets):
+        """Initializes an empty histogram with the upper bounds 'buckets'"""
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        """Adds 'value' to the histogram"""
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def cumulative_counts(self):
+        """Returns (upper bound, how many values were at most that) for every bucket, ending with '+Inf'"""
+        cumulative_count = 0
+        count_list = []
+        for upper_bound, bucket_count in zip(self.buckets + ['+Inf'], self.bucket_counts):
+            cumulative_count += bucket_count
+            count_list.append((upper_bound, cumulative_count))
+        return count_list
+
+
+histogram_dict = {}  # (metric name, labels as sorted (name, value) pairs) -> Histogram
+counter_dict = {}  # (metric name, labels as sorted (name, value) pairs) -> count
+listener_list = []  # functions called with every event (a dictionary), f.e to trace an analysis
+metrics_lock = threading.Lock()
+log_file = None  # METRICS_LOG_PATH, opened with the first event
+
+
+def get_endpoint(path):
+    """Returns the endpoint of a path or URL without the host, symbol and dates in it (f.e '/v2/aggs/ticker')"""
+    if path.startswith('http'):
+        path = '/' + path.split('/', 3)[3].split('?')[0]
+    return '/'.join(path.split('/')[:4])
+
+
+def get_key(name, labels):
+    """Returns the key of the metric 'name' with the labels 'labels' (a dictionary)"""
+    return name, tuple(sorted(labels.items()))
+
+
+def emit(event, **fields):
+    """Passes the event 'event' (f.e 'request') with its fields to every listener and the JSON lines log"""
+    global log_file
+
+    if not listener_list and not METRICS_LOG_PATH:
+        return
+
+    event_dict = dict(time=time.time(), event=event, **fields)
+    for listener in list(listener_list):
+        listener(event_dict)
+
+    if METRICS_LOG_PATH:
+        with metrics_lock:
+            if log_file is None:
+                log_file = open(METRICS_LOG_PATH, 'a', buffering=1)  # line buffered, so a crash loses no event
+            log_file.write(json.dumps(event_dict, default=str) + '\n')
+
+
+def observe(name, value, buckets, **labels):
+    """Adds 'value' to the histogram 'name' with the labels 'labels'"""
+    key = get_key(name, labels)
+    with metrics_lock:
+        if key not in histogram_dict:
+            histogram_dict[key] = Histogram(buckets)
+        histogram_dict[key].observe(value)
+
+
+def count(name, amount=1, **labels):
+    """Adds 'amount' to the counter 'name' with the labels 'labels'"""
+    key = get_key(name, labels)
+    with metrics_lock:
+        counter_dict[key] = counter_dict.get(key, 0) + amount
+
+
+def record_request(path, seconds, status_code, size):
+    """Records one request to polygon.io: how long it took, its status code and the size of the response"""
+    endpoint = get_endpoint(path)
+    observe('polygon_request_seconds', seconds, LATENCY_BUCKETS, endpoint=endpoint)
+    observe('polygon_response_bytes', size, SIZE_BUCKETS, endpoint=endpoint)
+    count('polygon_requests_total', endpoint=endpoint, status=str(status_code))
+    if status_code == 429:
+        count('polygon_rate_limited_total', endpoint=endpoint)
+    emit('request', endpoint=endpoint, seconds=seconds, status=status_code, bytes=size)
+
+
+def record_rate_limit_wait(seconds):
+    """Records how long a request waited for the rate limiter"""
+    observe('rate_limit_wait_seconds', seconds, LATENCY_BUCKETS)
+    if seconds > 0:
+        emit('rate_limit_wait', seconds=seconds)
+
+
+def record_cache_lookup(layer, path, hit):
+    """Records a lookup in the cache layer 'layer' ('session', 'in_flight' or 'disk') and whether it was found"""
+    result = 'hit' if hit else 'miss'
+    count('cache_lookups_total', layer=layer, result=result)
+    emit('cache_lookup', layer=layer, endpoint=get_endpoint(path), result=result)
+
+
+def record_response_checked(status_code):
+    """Records a response checked by an analysis (response_successful)"""
+    count('responses_checked_total', status=str(status_code))
+
+
+def record_error(message):
+    """Records an error reported to the user"""
+    count('errors_total')
+    emit('error', message=str(message))
+
+
+def timed(metric_name):
+    """Decorator recording how long each call of the function takes as the compute time of 'metric_name'"""
+    def decorator(function):
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - started_at
+                observe('metric_compute_seconds', seconds, COMPUTE_BUCKETS, metric=metric_name)
+                emit('compute', metric=metric_name, seconds=seconds)
+        return timed_function
+    return decorator
+
+
+def add_listener(listener):
+    """Calls 'listener' with every event from now on (a dictionary with at least 'time' and 'event')"""
+    listener_list.append(listener)
+
+
+def format_labels(labels, extra_label=None):
+    """Formats labels ((name, value) pairs) the way the Prometheus text format writes them"""
+    label_list = [f'{name}="{value}"' for name, value in labels]
+    if extra_label is not None:
+        label_list.append(extra_label)
+    return '{' + ','.join(label_list) + '}' if label_list else ''
+
+
+def render_prometheus():
+    """Returns every metric in the Prometheus text format"""
+    with metrics_lock:
+        histogram_items = sorted(histogram_dict.items(), key=lambda item: item[0])
+        counter_items = sorted(counter_dict.items(), key=lambda item: item[0])
+        histogram_items = [(key, (histogram.cumulative_counts(), histogram.count, histogram.total))
+                           for key, histogram in histogram_items]
+
+    line_list = []
+    for name, (kind, description) in METRIC_DESCRIPTIONS.items():
+        line_list += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+        if kind == 'histogram':
+            for (metric_name, labels), (cumulative_counts, value_count, total) in histogram_items:
+                if metric_name != name:
+                    continue
+                for upper_bound, cumulative_count in cumulative_counts:
+                    bucket_label = 'le="%s"' % upper_bound
+                    line_list.append(f"{name}_bucket{format_labels(labels, bucket_label)} {cumulative_count}")
+                line_list.append(f"{name}_sum{format_labels(labels)} {total}")
+                line_list.append(f"{name}_count{format_labels(labels)} {value_count}")
+        else:
+            for (metric_name, labels), value in counter_items:
+                if metric_name == name:
+                    line_list.append(f"{name}{format_labels(labels)} {value}")
+    return '\n'.join(line_list) + '\n'
+
+
+def get_snapshot():
+    """Returns every metric as a dictionary (f.e to print a summary at the end of a batch run)"""
+    with metrics_lock:
+        return {
+            'histograms': [{'name': name, 'labels': dict(labels), 'count': histogram.count, 'sum': histogram.total}
+                           for (name, labels), histogram in histogram_dict.items()],
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                         for (name, labels), value in counter_dict.items()],
+        }
+
+
+class MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the metrics in the Prometheus text format on /metrics"""
+
+    def do_GET(self):
+        """Answers a scrape of /metrics"""
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Scrapes aren't logged"""
+        pass
+
+
+def start_metrics_server(port):
+    """Serves the metrics on http://127.0.0.1:'port'/metrics from a background thread; returns the server"""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port), MetricsRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_from_environment():
+    """Starts the Prometheus endpoint if METRICS_PORT is set (the JSON lines log needs no start)"""
+    if METRICS_PORT:
+        return start_metrics_server(int(METRICS_PORT))
+    return None
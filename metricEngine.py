@@ -0,0 +1,238 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import instrumentation
+import numpy
+
+# The lookbacks the technical analysis is calculated over, counted in bars of each bar size
+LOOKBACK_WINDOWS = {'1M': 21, '3M': 63, '6M': 126, '1Y': 252, '5Y': 1260}  # daily bars (sessions)
+WEEKLY_LOOKBACK_WINDOWS = {'3M': 13, '6M': 26, '1Y': 52, '5Y': 260}  # weekly bars
+INTRADAY_BAR_MINUTES = [5, 15, 60]  # the intraday bar sizes, all made from the same one-minute bars
+TRADING_DAYS_PER_YEAR = 252
+MINUTES_PER_SESSION = 390  # 9:30 to 16:00
+QUARTERS_PER_YEAR = 4
+# The most days between the ends of the first and last of four consecutive quarters (273 to 276 days apart)
+MAX_TRAILING_QUARTER_SPAN = 300
+
+
+# Every function works on a price matrix: one row per symbol, one column per trading day (oldest first).
+# Missing prices (f.e a day a stock didn't trade) are numpy.nan
+
+
+def to_price_matrix(price_list):
+    """
+    Turns one list of prices (or a matrix) into a float price matrix, without copying when it already is one
+    (f.e a float32 slice of the price store stays a view of it)
+    """
+    price_matrix = numpy.asarray(price_list)
+    if not numpy.issubdtype(price_matrix.dtype, numpy.floating):
+        price_matrix = price_matrix.astype(numpy.float64)
+    if price_matrix.ndim == 1:
+        price_matrix = price_matrix[numpy.newaxis, :]  # a single stock becomes a matrix with one row
+    return price_matrix
+
+
+def first_and_last_prices(price_matrix):
+    """Returns the first and the last price that isn't missing for every row"""
+    has_price = ~numpy.isnan(price_matrix)
+    rows = numpy.arange(price_matrix.shape[0])
+
+    first_column = numpy.argmax(has_price, axis=1)
+    last_column = price_matrix.shape[1] - 1 - numpy.argmax(has_price[:, ::-1], axis=1)
+    first_prices = price_matrix[rows, first_column]
+    last_prices = price_matrix[rows, last_column]
+
+    no_prices = ~has_price.any(axis=1)
+    first_prices[no_prices] = numpy.nan
+    last_prices[no_prices] = numpy.nan
+    return first_prices, last_prices
+
+
+@instrumentation.timed('returns')
+def calculate_returns(price_matrix):
+    """Returns the return of every row as the latest price divided by the oldest (1.05 is a 5% gain)"""
+    first_prices, last_prices = first_and_last_prices(price_matrix)
+    return last_prices / first_prices
+
+
+@instrumentation.timed('price_extremes')
+def calculate_price_extremes(price_matrix):
+    """Returns the highest and the lowest price of every row, without sorting"""
+    with numpy.errstate(all='ignore'):
+        return numpy.nanmax(price_matrix, axis=1), numpy.nanmin(price_matrix, axis=1)
+
+
+def calculate_daily_returns(price_matrix):
+    """Returns the day to day returns of every row (0.01 is a 1% gain), one column fewer than the prices"""
+    return price_matrix[:, 1:] / price_matrix[:, :-1] - 1
+
+
+@instrumentation.timed('beta_values')
+def calculate_beta_values(price_matrix, index_prices):
+    """
+    Returns the beta value of every row against the index prices (on the same trading days as the columns):
+    the covariance of the stock's and the index's daily returns divided by the variance of the index's daily returns.
+    Only the days where both have a return are used; rows with fewer than two such days get numpy.nan
+    """
+    stock_returns = calculate_daily_returns(price_matrix)
+    index_returns = calculate_daily_returns(to_price_matrix(index_prices))  # one row, broadcast against every stock
+
+    valid = ~numpy.isnan(stock_returns) & ~numpy.isnan(index_returns)
+    day_count = valid.sum(axis=1)
+    stock_returns = numpy.where(valid, stock_returns, 0.0)
+    index_returns = numpy.where(valid, index_returns, 0.0)
+
+    with numpy.errstate(all='ignore'):
+        stock_means = stock_returns.sum(axis=1) / day_count
+        index_means = index_returns.sum(axis=1) / day_count
+        stock_deviations = numpy.where(valid, stock_returns - stock_means[:, numpy.newaxis], 0.0)
+        index_deviations = numpy.where(valid, index_returns - index_means[:, numpy.newaxis], 0.0)
+
+        covariances = (stock_deviations * index_deviations).sum(axis=1)
+        index_variances = (index_deviations ** 2).sum(axis=1)
+        beta_values = covariances / index_variances  # the (n - 1) of both cancels out
+
+    beta_values[day_count < 2] = numpy.nan
+    return beta_values
+
+
+@instrumentation.timed('volatilities')
+def calculate_volatilities(price_matrix, periods_per_year=TRADING_DAYS_PER_YEAR):
+    """
+    Returns the annualised volatility of every row: the standard deviation of its returns per bar
+    times the square root of the number of bars in a year ('periods_per_year')
+    """
+    with numpy.errstate(all='ignore'):
+        standard_deviations = numpy.nanstd(calculate_daily_returns(price_matrix), axis=1, ddof=1)
+    return standard_deviations * numpy.sqrt(periods_per_year)
+
+
+@instrumentation.timed('window_metrics')
+def calculate_window_metrics(price_matrix, index_prices, window_dict=None, periods_per_year=TRADING_DAYS_PER_YEAR):
+    """
+    Calculates the technical metrics and the volatility of every row over several lookbacks at once.
+    'window_dict' maps the name of each lookback to its number of bars (LOOKBACK_WINDOWS by default);
+    each lookback is a view of the newest columns of the one matrix, so nothing is copied or requested again.
+    Returns a dictionary: lookback name -> dictionary of metric arrays (see calculate_technical_metrics),
+    which also holds 'bar_count', the number of bars the lookback actually had
+    """
+    price_matrix = to_price_matrix(price_matrix)
+    index_prices = to_price_matrix(index_prices)
+    window_dict = window_dict or LOOKBACK_WINDOWS
+    window_metric_dict = {}
+
+    for window_name, bar_count in window_dict.items():
+        window_prices = price_matrix[:, -(bar_count + 1):]  # a lookback of n bars needs n + 1 prices
+        window_index_prices = index_prices[:, -(bar_count + 1):]
+
+        metric_dict = calculate_technical_metrics(window_prices, window_index_prices)
+        metric_dict['volatility'] = calculate_volatilities(window_prices, periods_per_year)
+        metric_dict['bar_count'] = window_prices.shape[1] - 1
+        window_metric_dict[window_name] = metric_dict
+
+    return window_metric_dict
+
+
+def resample_to_weeks(date_list, price_matrix):
+    """
+    Turns daily prices into weekly prices: the price on the last trading day of each week.
+    Returns (the last trading day of each week, the weekly price matrix)
+    """
+    price_matrix = to_price_matrix(price_matrix)
+    week_list = [date.isocalendar()[:2] for date in date_list]
+    last_day_columns = [column for column in range(len(week_list))
+                        if column == len(week_list) - 1 or week_list[column] != week_list[column + 1]]
+
+    return [date_list[column] for column in last_day_columns], price_matrix[:, last_day_columns]
+
+
+def resample_to_bar_size(minute_list, price_matrix, bar_minutes):
+    """
+    Turns one-minute prices into 'bar_minutes' minute prices: the last price in each bar.
+    'minute_list' holds the minute of the session (0 is the open) of each column, so every bar starts at the open.
+    Returns (the minute of the last price in each bar, the resampled price matrix)
+    """
+    price_matrix = to_price_matrix(price_matrix)
+    bar_numbers = numpy.asarray(minute_list) // bar_minutes
+    last_minute_columns = numpy.flatnonzero(numpy.append(bar_numbers[1:] != bar_numbers[:-1], True))
+
+    return numpy.asarray(minute_list)[last_minute_columns], price_matrix[:, last_minute_columns]
+
+
+def rank_by_value(value_array, descending=True):
+    """Returns the row numbers ordered by their value (missing values last)"""
+    order_values = -value_array if descending else value_array
+    return numpy.argsort(numpy.where(numpy.isnan(order_values), numpy.inf, order_values), kind='stable')
+
+
+@instrumentation.timed('technical_metrics')
+def calculate_technical_metrics(price_matrix, index_prices):
+    """
+    Calculates every technical metric of every row in one pass over the matrix.
+    Returns a dictionary of arrays with one value per row: 'stock_return', 'highest_price', 'lowest_price'
+    and 'beta_value'
+    """
+    price_matrix = to_price_matrix(price_matrix)
+    highest_prices, lowest_prices = calculate_price_extremes(price_matrix)
+
+    return {
+        'stock_return': calculate_returns(price_matrix),
+        'highest_price': highest_prices,
+        'lowest_price': lowest_prices,
+        'beta_value': calculate_beta_values(price_matrix, index_prices),
+    }
+
+
+@instrumentation.timed('trailing_sums')
+def calculate_trailing_sums(end_ordinals, quarter_values, quarter_count=QUARTERS_PER_YEAR):
+    """
+    Sums the value of each quarter with the 'quarter_count' - 1 quarters before it (f.e the trailing twelve months EPS).
+    'end_ordinals' are the last days of the quarters (datetime.date ordinals, oldest first).
+    The sum is numpy.nan where fewer quarters came before, a value is missing or a quarter is missing in between
+    """
+    quarter_values = numpy.asarray(quarter_values, dtype=float)
+    end_ordinals = numpy.asarray(end_ordinals)
+    trailing_sums = numpy.full(len(quarter_values), numpy.nan)
+    if len(quarter_values) < quarter_count:
+        return trailing_sums
+
+    window_sums = numpy.lib.stride_tricks.sliding_window_view(quarter_values, quarter_count).sum(axis=1)
+    window_spans = end_ordinals[quarter_count - 1:] - end_ordinals[:len(end_ordinals) - quarter_count + 1]
+    max_span = MAX_TRAILING_QUARTER_SPAN * (quarter_count - 1) / (QUARTERS_PER_YEAR - 1)
+    trailing_sums[quarter_count - 1:] = numpy.where(window_spans <= max_span, window_sums, numpy.nan)
+    return trailing_sums
+
+
+def as_of_values(known_ordinals, values, date_ordinals):
+    """
+    Returns for each date in 'date_ordinals' the latest of 'values' known on it, where 'known_ordinals' (sorted)
+    is the day each value became known (f.e the filing date of a report). numpy.nan before the first is known
+    """
+    values = numpy.asarray(values, dtype=float)
+    if not len(values):
+        return numpy.full(len(date_ordinals), numpy.nan)
+
+    positions = numpy.searchsorted(known_ordinals, date_ordinals, side='right') - 1
+    return numpy.where(positions >= 0, values[numpy.maximum(positions, 0)], numpy.nan)
+
+
+@instrumentation.timed('valuation_ratios')
+def calculate_valuation_ratios(price_matrix, ttm_eps_matrix, ttm_revenue_matrix, share_matrix, equity_ratio_matrix):
+    """
+    Calculates the valuation ratios of every row on every day at once, from the price matrix and matrices
+    (of the same shape) of the fundamentals known on each day.
+    Returns a dictionary of matrices: 'pe_value' (the price divided by the trailing twelve months EPS),
+    'ps_value' (the market cap divided by the trailing twelve months revenue), 'equity_ratio' and 'ttm_eps'
+    """
+    price_matrix = to_price_matrix(price_matrix)
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        pe_values = price_matrix / ttm_eps_matrix
+        ps_values = price_matrix * share_matrix / ttm_revenue_matrix
+
+    return {
+        'pe_value': numpy.where(numpy.isfinite(pe_values), pe_values, numpy.nan),
+        'ps_value': numpy.where(numpy.isfinite(ps_values), ps_values, numpy.nan),
+        'equity_ratio': equity_ratio_matrix,
+        'ttm_eps': ttm_eps_matrix,
+    }
@@ -0,0 +1,403 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import argparse
+import collections
+import datetime
+import functools
+import http.server
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+from getBusinessDayDates import NEW_YORK_TIME_ZONE, OPEN_TIME, business_days_between, is_business_day, \
+    last_closed_business_day
+import responseCache
+import responseRecorder
+
+# A local stand-in for polygon.io (and the Wikipedia list of the S&P 500), so the program can be run,
+# measured and tested without network access or quota. Start it and point the program at it:
+#     python mockPolygonServer.py --recordings recordings --latency 80 --rate-limit 5/60
+#     POLYGON_BASE_URL=http://127.0.0.1:8765 SP500_URL=http://127.0.0.1:8765/sp500 python batchAnalyser.py
+# Recorded responses (see responseRecorder) are replayed as they were; anything else gets made-up but repeatable data
+
+DEFAULT_PORT = 8765
+BENCHMARK_SYMBOLS = ['SPY', 'QQQ', 'IWM']
+SYNTHETIC_SYMBOL_COUNT = 500  # The size of the made-up universe when no symbol file is given
+SYNTHETIC_QUARTER_COUNT = 8  # How many quarters of made-up financials a ticker has
+TIME_ZONE = NEW_YORK_TIME_ZONE or datetime.timezone(datetime.timedelta(hours=-5))
+
+AGGREGATES_PATTERN = re.compile(r'^/v2/aggs/ticker/([^/]+)/range/(\d+)/(minute|day)/([\d-]+)/([\d-]+)$')
+GROUPED_DAILY_PATTERN = re.compile(r'^/v2/aggs/grouped/locale/us/market/stocks/([\d-]+)$')
+TICKER_DETAILS_PATTERN = re.compile(r'^/v3/reference/tickers/([^/]+)$')
+
+
+class MockPolygon:
+    """
+    The state of the mock server: its settings, the recordings it replays and what it has been asked for.
+
+    Attributes:
+        recording_dict (dict): Cache key (see responseCache.make_cache_key) -> recorded response.
+        symbol_list (list): The symbols of the made-up universe (the grouped daily bars, the snapshot and /sp500).
+        latency (float): Seconds every response is held back, like the round trip to the real API.
+        jitter (float): Up to this many extra seconds are added to the latency at random.
+        rate_limit (tuple): (requests, seconds) allowed before answering with status code 429, or None for no limit.
+        error_rate (float): The share of requests (0 to 1) answered with status code 429 at random.
+        page_size (int): The most results in one response; longer ones are split into pages with a 'next_url'.
+        random_generator (random.Random): Decides the jitter and the random 429s, seeded so a run can be repeated.
+        request_time_deque (collections.deque): The times of the requests within the rate limit's period.
+        request_counter (collections.Counter): Endpoint -> how many requests it got.
+        rate_limited_count (int): How many requests were answered with status code 429.
+        state_lock (threading.Lock): Every request is handled on its own thread.
+    """
+
+    def __init__(self, recording_dict, symbol_list, latency=0.0, jitter=0.0, rate_limit=None, error_rate=0.0,
+                 page_size=None, seed=0):
+        """Initializes the mock with its recordings, universe and settings"""
+        self.recording_dict = recording_dict
+        self.symbol_list = symbol_list
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.random_generator = random.Random(seed)
+        self.request_time_deque = collections.deque()
+        self.request_counter = collections.Counter()
+        self.rate_limited_count = 0
+        self.state_lock = threading.Lock()
+
+    def is_rate_limited(self):
+        """Checks if this request goes over the rate limit (or is picked for a random 429), and counts it"""
+        with self.state_lock:
+            if self.error_rate and self.random_generator.random() < self.error_rate:
+                self.rate_limited_count += 1
+                return True
+            if self.rate_limit is None:
+                return False
+
+            request_limit, period = self.rate_limit
+            now = time.monotonic()
+            while self.request_time_deque and self.request_time_deque[0] <= now - period:
+                self.request_time_deque.popleft()
+            if len(self.request_time_deque) >= request_limit:
+                self.rate_limited_count += 1
+                return True
+            self.request_time_deque.append(now)
+            return False
+
+    def get_delay(self):
+        """Returns how many seconds this response is held back"""
+        with self.state_lock:
+            return self.latency + self.random_generator.uniform(0, self.jitter)
+
+    def count_request(self, path):
+        """Counts a request to the endpoint of 'path' (f.e '/v2/aggs/ticker')"""
+        endpoint = '/'.join(path.split('/')[:4])
+        with self.state_lock:
+            self.request_counter[endpoint] += 1
+
+    def get_stats(self):
+        """Returns what the mock has been asked for since it started (or was reset)"""
+        with self.state_lock:
+            return {
+                'requests': sum(self.request_counter.values()),
+                'by_endpoint': dict(self.request_counter),
+                'rate_limited': self.rate_limited_count,
+            }
+
+    def reset_stats(self):
+        """Forgets the requests counted so far (and the rate limit's window)"""
+        with self.state_lock:
+            self.request_counter.clear()
+            self.request_time_deque.clear()
+            self.rate_limited_count = 0
+
+    def respond(self, path, params):
+        """Returns (status code, data) for a request of 'path' with 'params' (without the API key and cursor)"""
+        recording = self.recording_dict.get(responseCache.make_cache_key(path, params))
+        if recording is not None:
+            return recording['status_code'], recording['data']
+        return make_synthetic_response(self, path, params)
+
+
+@functools.lru_cache(maxsize=None)
+def get_symbol_traits(symbol):
+    """Returns the made-up (base price, trend, market sensitivity, phase) of 'symbol', the same on every run"""
+    symbol_random = random.Random(symbol)
+    return (symbol_random.uniform(20, 500), symbol_random.uniform(-0.0002, 0.0004),
+            symbol_random.uniform(0.3, 1.8), symbol_random.uniform(0, 2 * math.pi))
+
+
+@functools.lru_cache(maxsize=4096)
+def get_market_move(ordinal):
+    """Returns the made-up move of the whole market on the day 'ordinal', shared by every symbol"""
+    return 0.06 * math.sin(ordinal / 17) + random.Random(ordinal).gauss(0, 0.01)
+
+
+def synthetic_price(symbol, ordinal, minute=None):
+    """
+    Returns a made-up but repeatable price of 'symbol' at the close of the day 'ordinal' (datetime.date.toordinal),
+    or at 'minute' minutes after the open. It follows the market, so beta values come out as real numbers
+    """
+    base_price, trend, sensitivity, phase = get_symbol_traits(symbol)
+    exponent = (trend * (ordinal - 738000) + sensitivity * get_market_move(ordinal)
+                + 0.1 * math.sin(ordinal / 40 + phase) + random.Random(f"{symbol}{ordinal}").gauss(0, 0.01))
+    if minute is not None:
+        exponent += random.Random(f"{symbol}{ordinal}:{minute}").gauss(0, 0.001)
+    return round(base_price * math.exp(exponent), 2)
+
+
+def to_timestamp(date, time_of_day=datetime.time(0, 0)):
+    """Returns the start of 'time_of_day' on 'date' (New York time) in milliseconds since the Epoch, like the API"""
+    return int(datetime.datetime.combine(date, time_of_day, TIME_ZONE).timestamp() * 1000)
+
+
+def make_price_candle(symbol, date, minute=None):
+    """Returns a made-up price candle of 'symbol' like the aggregates endpoints give"""
+    ordinal = date.toordinal()
+    closing_price = synthetic_price(symbol, ordinal, minute)
+    opening_price = synthetic_price(symbol, ordinal - 1) if minute is None else closing_price
+    if minute is None:
+        timestamp = to_timestamp(date)
+    else:
+        open_time = datetime.datetime.combine(date, OPEN_TIME) + datetime.timedelta(minutes=minute)
+        timestamp = to_timestamp(date, open_time.time())
+
+    return {'o': opening_price, 'h': max(opening_price, closing_price) * 1.005,
+            'l': min(opening_price, closing_price) * 0.995, 'c': closing_price,
+            'v': random.Random(f"{symbol}{ordinal}{minute}").randint(10 ** 5, 10 ** 7), 't': timestamp}
+
+
+def make_aggregates(symbol, bar_minutes, span, from_date, to_date):
+    """Returns the made-up response of the aggregates (bars) endpoint"""
+    results = []
+    for date in business_days_between(from_date, to_date):
+        if span == 'day':
+            results.append(make_price_candle(symbol, date))
+        elif date <= last_closed_business_day():
+            results += [make_price_candle(symbol, date, minute) for minute in range(0, 390, bar_minutes)]
+
+    return {'ticker': symbol, 'status': 'OK', 'adjusted': True, 'resultsCount': len(results), 'results': results}
+
+
+def make_financials(symbol):
+    """Returns the made-up response of the financials endpoint: SYNTHETIC_QUARTER_COUNT quarters, the latest first"""
+    base_price = get_symbol_traits(symbol)[0]
+    shares_outstanding = random.Random(f"{symbol}shares").randint(10 ** 8, 10 ** 10)  # as in make_ticker_details
+    quarter_number = (datetime.date.today().year * 12 + datetime.date.today().month - 1) // 3  # quarters since year 0
+    results = []
+
+    for quarter_number in range(quarter_number - 1, quarter_number - 1 - SYNTHETIC_QUARTER_COUNT, -1):
+        next_quarter_start = datetime.date((quarter_number + 1) // 4, (quarter_number + 1) % 4 * 3 + 1, 1)
+        quarter_end = next_quarter_start - datetime.timedelta(days=1)
+        quarter_random = random.Random(f"{symbol}{quarter_end}")
+        earnings_per_share = round(base_price / quarter_random.uniform(40, 120), 2)
+        results.append({
+            'company_name': f"{symbol} Holdings Inc.",
+            'fiscal_period': f"Q{quarter_end.month // 3}",
+            'fiscal_year': str(quarter_end.year),
+            'end_date': quarter_end.isoformat(),
+            'filing_date': (quarter_end + datetime.timedelta(days=35)).isoformat(),
+            'financials': {
+                'income_statement': {
+                    'basic_earnings_per_share': {'value': earnings_per_share, 'unit': 'USD / shares'},
+                    'revenues': {'value': quarter_random.randint(10 ** 9, 10 ** 11), 'unit': 'USD'},
+                    'basic_average_shares': {'value': shares_outstanding, 'unit': 'shares'},
+                },
+                'balance_sheet': {
+                    'assets': {'value': quarter_random.randint(10 ** 10, 10 ** 12), 'unit': 'USD'},
+                    'equity': {'value': quarter_random.randint(10 ** 9, 10 ** 11), 'unit': 'USD'},
+                },
+            },
+        })
+
+    return {'status': 'OK', 'count': len(results), 'results': results}
+
+
+def make_ticker_details(symbol):
+    """Returns the made-up response of the ticker details endpoint"""
+    shares_outstanding = random.Random(f"{symbol}shares").randint(10 ** 8, 10 ** 10)
+    latest_price = synthetic_price(symbol, last_closed_business_day().toordinal())
+    return {'status': 'OK', 'results': {
+        'ticker': symbol, 'name': f"{symbol} Holdings Inc.", 'market': 'stocks', 'active': True,
+        'market_cap': latest_price * shares_outstanding, 'weighted_shares_outstanding': shares_outstanding,
+    }}
+
+
+def make_synthetic_response(mock, path, params):
+    """Returns (status code, data) made up for a request that wasn't recorded"""
+    aggregates_match = AGGREGATES_PATTERN.match(path)
+    if aggregates_match:
+        symbol, multiplier, span, from_date, to_date = aggregates_match.groups()
+        return 200, make_aggregates(symbol, int(multiplier), span, datetime.date.fromisoformat(from_date),
+                                    datetime.date.fromisoformat(to_date))
+
+    grouped_daily_match = GROUPED_DAILY_PATTERN.match(path)
+    if grouped_daily_match:
+        date = datetime.date.fromisoformat(grouped_daily_match.group(1))
+        results = [dict(make_price_candle(symbol, date), T=symbol) for symbol in mock.symbol_list
+                   if is_business_day(date)]
+        return 200, {'status': 'OK', 'adjusted': True, 'resultsCount': len(results), 'results': results}
+
+    ticker_details_match = TICKER_DETAILS_PATTERN.match(path)
+    if ticker_details_match:
+        return 200, make_ticker_details(ticker_details_match.group(1))
+
+    if path == '/vX/reference/financials' and params.get('ticker'):
+        return 200, make_financials(params['ticker'])
+
+    if path == '/v2/snapshot/locale/us/markets/stocks/tickers':
+        date = datetime.date.today()
+        minute = int((datetime.datetime.now(TIME_ZONE) - datetime.datetime.combine(date, OPEN_TIME, TIME_ZONE))
+                     .total_seconds() // 60)
+        tickers = [{'ticker': symbol, 'lastTrade': {'p': synthetic_price(symbol, date.toordinal(), minute)}}
+                   for symbol in mock.symbol_list]
+        return 200, {'status': 'OK', 'count': len(tickers), 'tickers': tickers}
+
+    if path == '/sp500':
+        rows = ''.join(f"<tr><td>{symbol}</td><td>{symbol} Holdings Inc.</td></tr>"
+                       for symbol in mock.symbol_list if symbol not in BENCHMARK_SYMBOLS)
+        return 200, f"<table><tr><th>Symbol</th><th>Security</th></tr>{rows}</table>"
+
+    return 404, {'status': 'NOT_FOUND', 'message': f"The mock server doesn't know {path}"}
+
+
+def split_into_pages(data, params, cursor, page_size, base_url, path):
+    """
+    Returns the page of 'data' starting at result 'cursor' when it has more than 'page_size' results
+    (for the financials also more than their 'limit'), with a 'next_url' to the next page like the API gives
+    """
+    if path == '/vX/reference/financials':
+        page_size = min(page_size or math.inf, int(params.get('limit', 10)))  # the API's default page is 10 filings
+    results = data.get('results') if isinstance(data, dict) else None
+    if not page_size or not isinstance(results, list) or len(results) <= page_size and not cursor:
+        return data
+
+    page_size = int(page_size)
+    page_data = dict(data, results=results[cursor:cursor + page_size])
+    if 'count' in data:
+        page_data['count'] = len(page_data['results'])
+    if 'resultsCount' in data:
+        page_data['resultsCount'] = len(page_data['results'])
+    page_data.pop('next_url', None)
+    if cursor + page_size < len(results):
+        page_data['next_url'] = f"{base_url}{path}?{urllib.parse.urlencode(dict(params, cursor=cursor + page_size))}"
+    return page_data
+
+
+class MockRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Answers one request to the mock server (the MockPolygon is 'self.server.mock')"""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API, so pooled connections are reused
+
+    def do_GET(self):
+        """Answers a GET request like polygon.io would"""
+        mock = self.server.mock
+        url = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        params.pop('apiKey', None)
+        cursor = int(params.pop('cursor', 0))
+
+        if url.path == '/__stats':
+            return self.send_json(200, mock.get_stats())
+        if url.path == '/__reset':
+            mock.reset_stats()
+            return self.send_json(200, {'status': 'OK'})
+
+        mock.count_request(url.path)
+        time.sleep(mock.get_delay())
+        if mock.is_rate_limited():
+            return self.send_json(429, {'status': 'ERROR', 'error': "You've exceeded the maximum requests per minute"})
+
+        status_code, data = mock.respond(url.path, params)
+        if status_code == 200:
+            data = split_into_pages(data, params, cursor, mock.page_size, f"http://{self.headers['Host']}", url.path)
+        self.send_json(status_code, data)
+
+    def send_json(self, status_code, data):
+        """Sends 'data' as JSON (or as HTML if it is text)"""
+        is_text = isinstance(data, str)
+        body = (data if is_text else json.dumps(data)).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'text/html' if is_text else 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Only logs the requests if the server was started with --verbose"""
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def read_universe(path):
+    """Returns the symbols in the file 'path' (one per line), or a made-up list; the benchmarks are always in it"""
+    if path:
+        with open(path) as symbol_file:
+            symbol_list = [line.strip().upper() for line in symbol_file if line.strip() and not line.startswith('#')]
+    else:
+        symbol_list = [f"S{number:03d}" for number in range(SYNTHETIC_SYMBOL_COUNT)]
+    return list(dict.fromkeys(BENCHMARK_SYMBOLS + symbol_list))
+
+
+def create_server(mock, port=DEFAULT_PORT, verbose=False):
+    """Creates the server answering with 'mock' on 127.0.0.1:'port' (0 picks a free port); call serve_forever()"""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port), MockRequestHandler)
+    server.daemon_threads = True
+    server.mock = mock
+    server.verbose = verbose
+    return server
+
+
+def start_in_background(mock, port=0):
+    """Starts a server answering with 'mock' on a background thread; returns (server, its base URL)"""
+    server = create_server(mock, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def parse_rate_limit(text):
+    """Turns '5/60' (requests/seconds) into (5, 60.0)"""
+    request_limit, period = text.split('/')
+    return int(request_limit), float(period)
+
+
+def main():
+    """Reads the command line arguments and runs the mock server until it is stopped"""
+    parser = argparse.ArgumentParser(description="Serve recorded or made-up polygon.io responses locally")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--recordings', default=responseRecorder.RECORD_PATH,
+                        help="folder of recorded responses to replay (made with RECORD_PATH set)")
+    parser.add_argument('--universe', help="file with the symbols of the made-up market, one per line")
+    parser.add_argument('--latency', type=float, default=0.0, help="milliseconds every response is held back")
+    parser.add_argument('--jitter', type=float, default=0.0, help="up to this many extra milliseconds at random")
+    parser.add_argument('--rate-limit', type=parse_rate_limit, help="f.e 5/60: answer 429 above 5 requests a minute")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered 429 at random")
+    parser.add_argument('--page-size', type=int, help="split responses with more results into pages")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the jitter and the random 429s")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    arguments = parser.parse_args()
+
+    recording_dict = {}
+    if arguments.recordings and os.path.isdir(arguments.recordings):
+        recording_dict = responseRecorder.load_recordings(arguments.recordings)
+
+    mock = MockPolygon(recording_dict, read_universe(arguments.universe), arguments.latency / 1000,
+                       arguments.jitter / 1000, arguments.rate_limit, arguments.error_rate, arguments.page_size,
+                       arguments.seed)
+    server = create_server(mock, arguments.port, arguments.verbose)
+    print(f"Serving {len(recording_dict)} recorded responses (and made-up data for the rest) "
+          f"on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
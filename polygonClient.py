@@ -0,0 +1,254 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import concurrent.futures
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from getBusinessDayDates import last_closed_business_day
+import instrumentation
+import rateLimiter
+import requests
+from requests.adapters import HTTPAdapter
+import responseCache
+import responseRecorder
+
+load_dotenv()
+API_KEY = os.getenv('API_KEY')  # API key for the API polygon.io
+# Set POLYGON_BASE_URL to f.e http://127.0.0.1:8765 to use the mock server (mockPolygonServer.py) instead of the API
+POLYGON_URL = os.getenv('POLYGON_BASE_URL', 'https://api.polygon.io').rstrip('/')
+# DISK_CACHE=off skips the on-disk cache, so every request reaches the server (f.e when measuring it)
+DISK_CACHE_ENABLED = os.getenv('DISK_CACHE', 'on').lower() != 'off'
+RATE_LIMITED_RETRIES = 2  # How many times a request that got status code 429 is sent again after the limiter is drained
+# The most requests sent at the same time; only useful on the paid plans where the rate limit allows it
+MAX_CONCURRENT_REQUESTS = int(os.getenv('POLYGON_MAX_CONCURRENCY', '8'))
+
+# How many seconds each kind of response stays in the cache (None means it never expires)
+CLOSED_SESSION_BARS_TTL = None  # Daily bars can't change once their session has closed
+OPEN_SESSION_BARS_TTL = 15 * 60  # The bar for today keeps changing until the market closes
+OPEN_SESSION_MINUTE_BARS_TTL = 60  # A new minute bar is added every minute while the market is open
+FINANCIALS_TTL = 7 * 24 * 60 * 60  # Quarterly financials rarely change
+TICKER_DETAILS_TTL = 24 * 60 * 60  # The market cap changes every day
+
+session_responses = {}  # cache key -> (parsed JSON, expiry time) of every successful request in this run
+in_flight_requests = {}  # cache key -> threading.Event that is set when the request being made has finished
+session_lock = threading.Lock()
+
+# One HTTP session for every request, so the connections to the API are pooled and kept alive between requests
+http_session = requests.Session()
+http_session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENT_REQUESTS))
+http_session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENT_REQUESTS))
+
+
+class CachedResponse:
+    """
+    Stands in for a requests.Response when the data is already known,
+    so the code checking responses doesn't need to know where the data came from.
+
+    Attributes:
+        status_code (int): Always 200, only successful responses are cached.
+        data (dict): The parsed JSON of the response.
+    """
+
+    status_code = 200
+
+    def __init__(self, data):
+        """Initializes the class with the parsed JSON data"""
+        self.data = data
+
+    def json(self):
+        """Returns the parsed JSON data, like requests.Response.json()"""
+        return self.data
+
+
+def get(path, params=None, time_to_live=None, cache_response=True, all_pages=True):
+    """
+    Gets the data for 'path' (f.e '/v3/reference/tickers/AAPL') with the query parameters 'params'.
+    Each distinct request is only made once per run: the parsed JSON is shared with every later caller,
+    and a caller asking for a request that is already being made waits for it instead of sending it again.
+    'cache_response' False keeps the response out of both caches (for large responses stored somewhere else).
+    'all_pages' False only requests the first page of a response split into pages (see fetch).
+    Returns a response, so the status code can be checked with 'response_successful'
+    """
+    params = dict(params or {})
+    cache_key = responseCache.make_cache_key(path, params)
+
+    while True:
+        with session_lock:
+            data = get_session_response(cache_key)
+            if data is not None:
+                instrumentation.record_cache_lookup('session', path, True)
+                return CachedResponse(data)  # already fetched during this run
+
+            request_finished = in_flight_requests.get(cache_key)
+            if request_finished is None:
+                request_finished = threading.Event()
+                in_flight_requests[cache_key] = request_finished
+                break  # this caller makes the request
+
+        instrumentation.record_cache_lookup('in_flight', path, True)
+        request_finished.wait()  # another caller is making the same request; use its result
+        # if that request failed the loop makes it again, so every caller sees its own status code
+
+    instrumentation.record_cache_lookup('session', path, False)
+    try:
+        response = fetch(path, params, cache_key, time_to_live, cache_response, all_pages)
+        if cache_response and isinstance(response, CachedResponse):  # only successful JSON responses are shared
+            expires_at = None if time_to_live is None else time.time() + time_to_live
+            with session_lock:
+                session_responses[cache_key] = (response.json(), expires_at)
+        return response
+    finally:
+        with session_lock:
+            del in_flight_requests[cache_key]
+        request_finished.set()
+
+
+def get_session_response(cache_key):
+    """Returns the JSON already fetched for 'cache_key' during this run, or None (the caller holds 'session_lock')"""
+    if cache_key not in session_responses:
+        return None
+
+    data, expires_at = session_responses[cache_key]
+    if expires_at is not None and expires_at < time.time():
+        del session_responses[cache_key]
+        return None  # too old, f.e the bar of a session that was still open
+    return data
+
+
+def fetch(path, params, cache_key, time_to_live, cache_response=True, all_pages=True):
+    """
+    Gets the data for 'path' from the on-disk cache,
+    otherwise requests it from the API and stores a successful response for 'time_to_live' seconds.
+    A response split into pages (a 'next_url' to the rest of the results) has every page requested,
+    and the pages are put together into one response; with 'all_pages' False only the first page is kept
+    """
+    if cache_response and DISK_CACHE_ENABLED:
+        cached_data = responseCache.load(cache_key)
+        instrumentation.record_cache_lookup('disk', path, cached_data is not None)
+        if cached_data is not None:
+            return CachedResponse(cached_data)  # no request to the API needed
+
+    response = request_page(POLYGON_URL + path, dict(params, apiKey=API_KEY))
+    if response.status_code != 200:
+        if response.status_code != 429:  # f.e an unknown ticker; a replay should fail the same way
+            responseRecorder.record(cache_key, path, params, response.status_code, response.text)
+        return response  # failed responses are never cached
+
+    try:
+        data = response.json()
+        while all_pages and data.get('next_url'):
+            page_response = request_page(data['next_url'], {'apiKey': API_KEY})  # the cursor is in the URL
+            if page_response.status_code != 200:
+                return page_response  # a response missing pages is never used
+            page_data = page_response.json()
+            data['results'] = data.get('results', []) + page_data.get('results', [])
+            data['next_url'] = page_data.get('next_url')
+    except ValueError:
+        return response  # let the caller deal with a body that isn't JSON
+
+    data.pop('next_url', None)
+    if 'count' in data:
+        data['count'] = len(data.get('results', []))
+    responseRecorder.record(cache_key, path, params, 200, data)
+    if cache_response and DISK_CACHE_ENABLED:
+        responseCache.store(cache_key, data, time_to_live)
+    return CachedResponse(data)
+
+
+def request_page(url, params):
+    """
+    Sends one request to 'url' once the rate limiter allows it.
+    A 429 (the limit was reached anyway, f.e the API key is used somewhere else too) drains the limiter,
+    so the request is sent again after a full period, at most RATE_LIMITED_RETRIES times.
+    The time spent waiting, the round trip time, the status code and the size of every response are recorded
+    """
+    for attempt in range(RATE_LIMITED_RETRIES + 1):
+        # waits in line until the plan's rate limit allows another request
+        instrumentation.record_rate_limit_wait(rateLimiter.rate_limiter.acquire())
+        started_at = time.perf_counter()
+        response = http_session.get(url, params=params)
+        instrumentation.record_request(url, time.perf_counter() - started_at, response.status_code,
+                                       len(response.content))
+        if response.status_code != 429:
+            break
+        rateLimiter.rate_limiter.drain()
+    return response
+
+
+def fetch_many(request_function, argument_list, max_workers=MAX_CONCURRENT_REQUESTS):
+    """
+    Calls 'request_function' (f.e get_financials) once for every tuple of arguments in 'argument_list',
+    with at most 'max_workers' requests in flight at the same time.
+    Every request still goes through the caches and waits for the rate limiter,
+    so on the free plan this is no faster but on a paid plan it is bound by the quota instead of the round trip time.
+    Returns the responses in the same order as 'argument_list'
+    """
+    if not argument_list:
+        return []
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(request_function, *arguments) for arguments in argument_list]
+        return [future.result() for future in futures]
+
+
+def get_daily_bars(symbol, from_date, to_date):
+    """Gets the daily price candles for 'symbol' between 'from_date' and 'to_date' (datetime.date)"""
+    if to_date <= last_closed_business_day():
+        time_to_live = CLOSED_SESSION_BARS_TTL
+    else:
+        time_to_live = OPEN_SESSION_BARS_TTL
+
+    return get(f"/v2/aggs/ticker/{symbol}/range/1/day/{from_date}/{to_date}", time_to_live=time_to_live)
+
+
+def get_minute_bars(symbol, date):
+    """
+    Gets the one-minute price candles for 'symbol' in the session on 'date' (datetime.date), in one request.
+    Every intraday bar size is made from these, so a longer bar size never costs another request
+    """
+    if date <= last_closed_business_day():
+        time_to_live = CLOSED_SESSION_BARS_TTL
+    else:
+        time_to_live = OPEN_SESSION_MINUTE_BARS_TTL
+
+    # a session has at most 960 minute bars (pre-market to after-hours), well below the API's limit of 50000
+    return get(f"/v2/aggs/ticker/{symbol}/range/1/minute/{date}/{date}", {'limit': 50000}, time_to_live)
+
+
+def get_market_snapshot():
+    """
+    Gets the latest trade, minute and day candle of every US stock in one request.
+    It changes every minute while the market is open, so it is neither cached nor shared within the run
+    """
+    return get("/v2/snapshot/locale/us/markets/stocks/tickers", cache_response=False)
+
+
+def get_financials(symbol):
+    """
+    Gets the latest financial report for 'symbol' (the analyses only use the latest quarter).
+    Only one report and one page are requested; get_financial_history gets every report
+    """
+    return get("/vX/reference/financials", {'ticker': symbol, 'limit': 1}, FINANCIALS_TTL, all_pages=False)
+
+
+def get_financial_history(symbol):
+    """
+    Gets every quarterly and annual financial report of 'symbol' that polygon.io has, the latest first.
+    The reports come in pages of at most 100; every page is requested (see fetch) and put together into one response
+    """
+    return get("/vX/reference/financials", {'ticker': symbol, 'limit': 100}, FINANCIALS_TTL)
+
+
+def get_ticker_details(symbol):
+    """Gets the reference data (f.e market cap) for 'symbol'"""
+    return get(f"/v3/reference/tickers/{symbol}", time_to_live=TICKER_DETAILS_TTL)
+
+
+def get_grouped_daily(date):
+    """
+    Gets the daily price candle of every US stock for the session on 'date' (datetime.date) in one request.
+    The response is large and kept in the price store, so it isn't put in the response cache
+    """
+    return get(f"/v2/aggs/grouped/locale/us/market/stocks/{date}", {'adjusted': 'true'}, cache_response=False)
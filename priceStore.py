@@ -0,0 +1,290 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import datetime
+import glob
+import json
+import os
+import numpy
+from dotenv import load_dotenv
+from getBusinessDayDates import business_days_between
+
+load_dotenv()
+# Folder holding the price candles of every stock, one memory-mapped file per year and price field
+PRICE_STORE_PATH = os.getenv('PRICE_STORE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'price_store'))
+PRICE_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+GROUPED_DAILY_KEYS = {'open': 'o', 'high': 'h', 'low': 'l', 'close': 'c', 'volume': 'v'}  # field -> key in the API
+PRICE_DTYPE = numpy.float32  # half the size of a Python float's value, and exact enough for prices
+SYMBOL_ROW_STEP = 1024  # rows are added in steps, so a new listing doesn't make every partition grow
+
+
+class YearPartition:
+    """
+    The price candles of every stock for the sessions of one year, stored column by column:
+    each price field is a memory-mapped (symbol, session) matrix, so only the parts that are read are loaded
+    and a slice of it can go to the metric engine without a copy.
+    Missing prices (f.e a stock didn't trade, or the session isn't stored yet) are numpy.nan.
+
+    Attributes:
+        year (int): The year of the sessions.
+        date_array (numpy.ndarray): The date ordinal (datetime.date.toordinal, int32) of each session (column).
+        stored_array (numpy.memmap): 1 for each session whose prices are stored, 0 otherwise.
+        column_dict (dict): Price field (f.e 'close') -> numpy.memmap with a row per symbol (see get_symbol_list).
+        position_dict (dict): Date ordinal -> its column, so a session is found without a search.
+    """
+
+    def __init__(self, year, date_array, stored_array, column_dict):
+        """Initializes the class with the session dates, the stored flags and the price matrices"""
+        self.year = year
+        self.date_array = date_array
+        self.stored_array = stored_array
+        self.column_dict = column_dict
+        self.position_dict = {ordinal: column for column, ordinal in enumerate(date_array.tolist())}
+
+    def row_count(self):
+        """Returns how many symbols every price matrix has room for"""
+        return min(matrix.shape[0] for matrix in self.column_dict.values())
+
+    def has_date(self, date):
+        """Checks if the prices of the session on 'date' are stored"""
+        column = self.position_dict.get(date.toordinal())
+        return column is not None and bool(self.stored_array[column])
+
+    def stored_columns(self, from_date, to_date):
+        """Returns the columns of the stored sessions from 'from_date' to 'to_date' (both included), in order"""
+        first_column = numpy.searchsorted(self.date_array, from_date.toordinal(), side='left')
+        last_column = numpy.searchsorted(self.date_array, to_date.toordinal(), side='right')
+        return first_column + numpy.flatnonzero(self.stored_array[first_column:last_column])
+
+
+loaded_partitions = {}  # year -> YearPartition, for every year opened during this run
+symbol_list = None  # the symbol of each row, in the order they were first stored; None until it is read
+symbol_row_dict = {}  # symbol -> its row, so a symbol is found without a search
+
+
+def get_partition_path(year, name):
+    """Returns the path of the file holding 'name' (a price field, 'date' or 'stored') of the year 'year'"""
+    return os.path.join(PRICE_STORE_PATH, f"{year}_{name}.npy")
+
+
+def get_symbol_list_path():
+    """Returns the path of the file holding the symbol of each row"""
+    return os.path.join(PRICE_STORE_PATH, 'symbols.json')
+
+
+def get_symbol_list():
+    """Returns the symbol of each row of the price matrices"""
+    global symbol_list
+    global symbol_row_dict
+
+    if symbol_list is None:
+        symbol_list = []
+        if os.path.exists(get_symbol_list_path()):
+            with open(get_symbol_list_path()) as symbol_file:
+                symbol_list = json.load(symbol_file)
+        symbol_row_dict = {symbol: row for row, symbol in enumerate(symbol_list)}
+        import_day_files()
+    return symbol_list
+
+
+def add_symbols(new_symbol_list):
+    """
+    Gives every symbol in 'new_symbol_list' that isn't stored yet a row.
+    The list is written before any price is stored in the new rows, so a row is never without its symbol
+    """
+    get_symbol_list()
+    added_symbol_list = [symbol for symbol in dict.fromkeys(new_symbol_list) if symbol not in symbol_row_dict]
+    if not added_symbol_list:
+        return
+
+    for symbol in added_symbol_list:
+        symbol_row_dict[symbol] = len(symbol_list)
+        symbol_list.append(symbol)
+
+    os.makedirs(PRICE_STORE_PATH, exist_ok=True)
+    temporary_path = get_symbol_list_path() + '.tmp'
+    with open(temporary_path, 'w') as symbol_file:
+        json.dump(symbol_list, symbol_file)
+    os.replace(temporary_path, get_symbol_list_path())
+
+
+def open_matrix(year, field):
+    """Opens the stored matrix of 'field' for 'year' memory-mapped; None if there is none"""
+    if not os.path.exists(get_partition_path(year, field)):
+        return None
+    return numpy.load(get_partition_path(year, field), mmap_mode='r+')
+
+
+def load_partition(year):
+    """Returns the YearPartition of 'year', opening it the first time; None if nothing of that year is stored"""
+    if year in loaded_partitions:
+        return loaded_partitions[year]
+
+    stored_array = open_matrix(year, 'stored')
+    if stored_array is None:
+        return None
+
+    date_array = numpy.load(get_partition_path(year, 'date'))
+    column_dict = {field: open_matrix(year, field) for field in PRICE_FIELDS}
+    partition = YearPartition(year, date_array, stored_array, column_dict)
+
+    loaded_partitions[year] = partition
+    return partition
+
+
+def write_matrix(year, name, matrix):
+    """Writes 'matrix' as 'name' of the year 'year' (to a temporary file first, so a crash can't leave half of it)"""
+    temporary_path = get_partition_path(year, name) + '.tmp.npy'
+    numpy.save(temporary_path, matrix)
+    os.replace(temporary_path, get_partition_path(year, name))
+
+
+def create_partition(year, row_count):
+    """
+    Creates (or grows to 'row_count' rows) the partition of 'year' with a column for every session of the year.
+    Growing copies the stored prices into bigger matrices, which only happens every SYMBOL_ROW_STEP new symbols
+    """
+    os.makedirs(PRICE_STORE_PATH, exist_ok=True)
+    row_count = -(-row_count // SYMBOL_ROW_STEP) * SYMBOL_ROW_STEP  # rounded up to a whole step
+    old_partition = loaded_partitions.pop(year, None)  # the old files are released before they are replaced
+
+    if old_partition is None:
+        date_array = numpy.array([date.toordinal() for date in business_days_between(datetime.date(year, 1, 1),
+                                                                                     datetime.date(year, 12, 31))],
+                                 dtype=numpy.int32)
+        write_matrix(year, 'date', date_array)
+    else:
+        date_array = old_partition.date_array
+
+    for field in PRICE_FIELDS:
+        matrix = numpy.full((row_count, len(date_array)), numpy.nan, dtype=PRICE_DTYPE)
+        if old_partition is not None:
+            old_matrix = old_partition.column_dict.pop(field)
+            matrix[:old_matrix.shape[0]] = old_matrix
+            del old_matrix  # unmapped, so the file can be replaced on every platform
+        write_matrix(year, field, matrix)
+
+    if old_partition is None:
+        write_matrix(year, 'stored', numpy.zeros(len(date_array), dtype=numpy.uint8))
+    return load_partition(year)
+
+
+def has_date(date):
+    """Checks if the price candles for the trading day 'date' are stored"""
+    get_symbol_list()
+    partition = load_partition(date.year)
+    return partition is not None and partition.has_date(date)
+
+
+def store_day(date, day_symbol_list, column_dict):
+    """
+    Stores the prices of the trading day 'date': 'column_dict' maps each price field to an array
+    with the price of each symbol in 'day_symbol_list'.
+    The session is only marked as stored once every price is written, so a crash leaves it to be requested again
+    """
+    add_symbols(day_symbol_list)
+    partition = load_partition(date.year)
+    if partition is None or partition.row_count() < len(symbol_list):
+        partition = create_partition(date.year, len(symbol_list))
+
+    column = partition.position_dict[date.toordinal()]
+    row_array = numpy.array([symbol_row_dict[symbol] for symbol in day_symbol_list], dtype=numpy.int64)
+    for field in PRICE_FIELDS:
+        matrix = partition.column_dict[field]
+        matrix[:, column] = numpy.nan
+        matrix[row_array, column] = column_dict[field]
+        matrix.flush()
+
+    partition.stored_array[column] = 1
+    partition.stored_array.flush()
+
+
+def store_grouped_daily(date, price_candles):
+    """Stores the price candles from the grouped daily endpoint ('results' of the response) for the trading day 'date'"""
+    day_symbol_list = [price_candle['T'] for price_candle in price_candles]
+    column_dict = {}
+    for field in PRICE_FIELDS:
+        key = GROUPED_DAILY_KEYS[field]
+        column_dict[field] = numpy.array([price_candle.get(key, numpy.nan) for price_candle in price_candles],
+                                         dtype=PRICE_DTYPE)
+    store_day(date, day_symbol_list, column_dict)
+
+
+def import_day_files():
+    """Moves the days stored by earlier versions (one .npz file per trading day) into the yearly partitions"""
+    for day_path in sorted(glob.glob(os.path.join(PRICE_STORE_PATH, '????-??-??.npz'))):
+        date = datetime.date.fromisoformat(os.path.basename(day_path)[:-len('.npz')])
+        with numpy.load(day_path) as day_file:
+            store_day(date, day_file['symbol'].tolist(), {field: day_file[field] for field in PRICE_FIELDS})
+        os.remove(day_path)
+
+
+def missing_dates(from_date, to_date):
+    """Returns the business days from 'from_date' to 'to_date' that aren't stored yet"""
+    return [date for date in business_days_between(from_date, to_date) if not has_date(date)]
+
+
+def get_closing_prices(symbol, from_date, to_date):
+    """
+    Returns (dates, closing prices) of 'symbol' from 'from_date' to 'to_date', oldest first.
+    Returns None if a business day in the range isn't stored, or if the stock isn't in the stored days at all,
+    so the caller knows to ask the API instead
+    """
+    if missing_dates(from_date, to_date):
+        return None  # the store doesn't cover the whole range
+
+    date_list, price_matrix = get_price_matrix([symbol], from_date, to_date)
+    traded = ~numpy.isnan(price_matrix[0])  # a stock that didn't trade that day is skipped, like the API does
+    if not traded.any():
+        return None
+    return ([date for date, has_price in zip(date_list, traded.tolist()) if has_price],
+            price_matrix[0, traded].tolist())
+
+
+def get_price_matrix(symbol_list, from_date, to_date, field='close'):
+    """
+    Returns (dates, matrix) where the matrix holds the 'field' price of each symbol (rows)
+    on each stored business day from 'from_date' to 'to_date' (columns). Missing prices are numpy.nan.
+    With 'symbol_list' None every stored symbol is returned (in the order of get_symbol_list), and if the
+    days are in one year and stored without gaps the matrix is a view of the memory-mapped file, not a copy
+    """
+    store_symbol_list = get_symbol_list()
+    date_list = []
+    matrix_list = []
+
+    for year in range(from_date.year, to_date.year + 1):
+        partition = load_partition(year)
+        if partition is None:
+            continue
+
+        columns = partition.stored_columns(from_date, to_date)
+        if not len(columns):
+            continue
+        date_list += [datetime.date.fromordinal(ordinal) for ordinal in partition.date_array[columns].tolist()]
+        matrix = partition.column_dict[field]
+
+        if columns[-1] - columns[0] + 1 == len(columns):
+            year_matrix = matrix[:, columns[0]:columns[-1] + 1]  # a view, nothing is read until it is used
+        else:
+            year_matrix = matrix[:, columns]
+
+        # only the partition of the year being written grows, so an older year can have fewer rows than symbols
+        if symbol_list is None:
+            year_matrix = year_matrix[:len(store_symbol_list)]
+            if year_matrix.shape[0] < len(store_symbol_list):  # the symbols added later have no prices that year
+                missing_rows = numpy.full((len(store_symbol_list) - year_matrix.shape[0], year_matrix.shape[1]),
+                                          numpy.nan, dtype=PRICE_DTYPE)
+                year_matrix = numpy.concatenate([year_matrix, missing_rows])
+        else:
+            row_array = numpy.array([symbol_row_dict.get(symbol, -1) for symbol in symbol_list], dtype=numpy.int64)
+            stored = (row_array >= 0) & (row_array < year_matrix.shape[0])
+            year_matrix = numpy.where(stored[:, numpy.newaxis], year_matrix[numpy.where(stored, row_array, 0)],
+                                      numpy.nan)
+        matrix_list.append(year_matrix)
+
+    row_count = len(store_symbol_list) if symbol_list is None else len(symbol_list)
+    if not matrix_list:
+        return date_list, numpy.full((row_count, 0), numpy.nan, dtype=PRICE_DTYPE)
+    if len(matrix_list) == 1:
+        return date_list, matrix_list[0]
+    return date_list, numpy.concatenate(matrix_list, axis=1)
@@ -0,0 +1,127 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import collections
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Requests allowed per period (in seconds) for each polygon.io plan.
+# The paid plans have no hard limit, but polygon.io asks to stay below about 100 requests per second
+PLAN_TIERS = {
+    'basic': (5, 60),  # The free plan: 5 requests per minute
+    'starter': (100, 1),
+    'developer': (100, 1),
+    'advanced': (100, 1),
+}
+POLYGON_PLAN = os.getenv('POLYGON_PLAN', 'basic')  # Which plan the API key belongs to
+
+
+class TokenBucket:
+    """
+    A token bucket that every request to the API has to take a token from.
+    A token is handed back 'period' seconds after it was taken,
+    so no window of 'period' seconds ever sees more than 'capacity' requests and no status code 429 is wasted.
+    Callers that find the bucket empty are queued and released in order, as soon as a token is back.
+
+    Attributes:
+        capacity (int): The number of requests allowed per period.
+        period (float): The length of the period in seconds.
+        token_return_times (collections.deque): When each token that is in use comes back, oldest first.
+        waiting_queue (collections.deque): The callers waiting for a token, first in line first.
+        condition (threading.Condition): Guards the bucket and wakes the waiting callers.
+    """
+
+    def __init__(self, capacity, period):
+        """Initializes the class with the number of requests ('capacity') allowed per 'period' seconds"""
+        self.capacity = capacity
+        self.period = period
+        self.token_return_times = collections.deque()
+        self.waiting_queue = collections.deque()
+        self.condition = threading.Condition()
+
+    def return_tokens(self, now):
+        """Hands back every token whose period has passed (the caller holds 'condition')"""
+        while self.token_return_times and self.token_return_times[0] <= now:
+            self.token_return_times.popleft()
+
+    def available_tokens(self):
+        """Returns how many requests can be made right now without waiting"""
+        with self.condition:
+            self.return_tokens(time.monotonic())
+            return self.capacity - len(self.token_return_times)
+
+    def acquire(self):
+        """
+        Takes a token, waiting in line until one is available.
+        Returns the number of seconds spent waiting
+        """
+        start_time = time.monotonic()
+        ticket = object()  # identifies this caller's place in the queue
+
+        with self.condition:
+            self.waiting_queue.append(ticket)
+
+            while True:
+                now = time.monotonic()
+                self.return_tokens(now)
+
+                if self.waiting_queue[0] is ticket:
+                    if len(self.token_return_times) < self.capacity:
+                        self.token_return_times.append(now + self.period)
+                        self.waiting_queue.popleft()
+                        self.condition.notify_all()  # the next caller in line is now first
+                        return now - start_time
+
+                    self.condition.wait(self.token_return_times[0] - now)  # sleep until the next token is back
+                else:
+                    self.condition.wait()  # sleep until the callers ahead have taken their tokens
+
+    def drain(self):
+        """
+        Marks every token as used from now on.
+        Used when the API answers with status code 429 anyway (f.e the key is also used somewhere else)
+        """
+        with self.condition:
+            return_time = time.monotonic() + self.period
+            self.token_return_times = collections.deque([return_time] * self.capacity)
+
+    def queue_depth(self):
+        """Returns how many callers are waiting for a token"""
+        with self.condition:
+            return len(self.waiting_queue)
+
+    def expected_wait(self):
+        """Returns the number of seconds a request made now would have to wait for its token"""
+        with self.condition:
+            now = time.monotonic()
+            self.return_tokens(now)
+
+            # the tokens coming back are handed out in order; find the one this request would get
+            position = len(self.waiting_queue) - (self.capacity - len(self.token_return_times))
+            if position < 0:
+                return 0.0  # a token is free right now
+
+            rounds, index = divmod(position, self.capacity)
+            if index < len(self.token_return_times):
+                return_time = self.token_return_times[index]
+            else:
+                return_time = now
+            return max(0.0, return_time - now) + rounds * self.period
+
+
+def create_rate_limiter(plan):
+    """
+    Creates the token bucket for the polygon.io plan 'plan' (a key in PLAN_TIERS).
+    Raises a ValueError naming the valid plans if it isn't one of them (f.e a typo in POLYGON_PLAN)
+    """
+    if plan not in PLAN_TIERS:
+        raise ValueError(f"Unknown POLYGON_PLAN '{plan}'; it has to be one of: {', '.join(PLAN_TIERS)}")
+    capacity, period = PLAN_TIERS[plan]
+    return TokenBucket(capacity, period)
+
+
+rate_limiter = create_rate_limiter(POLYGON_PLAN)  # Every request to polygon.io goes through this bucket
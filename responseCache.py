@@ -0,0 +1,85 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+# The cache is a SQLite file next to the program unless CACHE_PATH is set in the .env file
+CACHE_PATH = os.getenv('CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'polygon_cache.sqlite3'))
+cache_connection = None  # Opened the first time the cache is used
+cache_lock = threading.Lock()  # SQLite connections can't be written from several threads at once
+
+
+def get_connection():
+    """Opens the cache database (and creates its table) the first time it is needed"""
+    global cache_connection
+
+    if cache_connection is None:
+        cache_connection = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        cache_connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "cache_key TEXT PRIMARY KEY, "
+            "data TEXT NOT NULL, "
+            "expires_at REAL)"  # NULL means the response never expires
+        )
+        cache_connection.commit()
+    return cache_connection
+
+
+def make_cache_key(path, params):
+    """
+    Builds the key a response is stored under from the endpoint path and its parameters.
+    The API key is left out so changing it doesn't throw the cache away. Every value is turned into text,
+    the way it is sent in the URL, so the mock server (which only sees the text) finds the same key
+    """
+    key_params = {name: str(value) for name, value in params.items() if name != 'apiKey'}
+    return path + '?' + json.dumps(key_params, sort_keys=True, default=str)
+
+
+def load(cache_key):
+    """Returns the stored JSON data for 'cache_key', or None if it is missing or has expired"""
+    with cache_lock:
+        connection = get_connection()
+        row = connection.execute(
+            "SELECT data, expires_at FROM responses WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+
+        if row is None:
+            return None  # never stored
+
+        data, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            connection.execute("DELETE FROM responses WHERE cache_key = ?", (cache_key,))
+            connection.commit()
+            return None  # stored but too old to be trusted
+
+    return json.loads(data)
+
+
+def store(cache_key, data, time_to_live):
+    """
+    Stores the JSON data under 'cache_key'.
+    'time_to_live' is the number of seconds the data is valid, None keeps it forever
+    """
+    expires_at = None if time_to_live is None else time.time() + time_to_live
+
+    with cache_lock:
+        connection = get_connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO responses (cache_key, data, expires_at) VALUES (?, ?, ?)",
+            (cache_key, json.dumps(data), expires_at)
+        )
+        connection.commit()
+
+
+def clear():
+    """Removes every stored response"""
+    with cache_lock:
+        connection = get_connection()
+        connection.execute("DELETE FROM responses")
+        connection.commit()
@@ -0,0 +1,60 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import glob
+import hashlib
+import json
+import os
+import responseCache
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+# Folder every response from the API is recorded to when RECORD_PATH is set in the .env file (off by default).
+# The mock server (mockPolygonServer.py) replays a folder of recordings, so a run can be repeated offline
+RECORD_PATH = os.getenv('RECORD_PATH')
+record_lock = threading.Lock()
+
+
+def get_recording_path(record_path, cache_key):
+    """Returns the path of the file holding the recording of 'cache_key' (see responseCache.make_cache_key)"""
+    return os.path.join(record_path, hashlib.sha1(cache_key.encode()).hexdigest() + '.json')
+
+
+def record(cache_key, path, params, status_code, data):
+    """
+    Records the response to the request for 'path' with the query parameters 'params' (without the API key),
+    if recording is turned on. 'data' is the parsed JSON, or the text of a body that isn't JSON
+    """
+    if not RECORD_PATH:
+        return
+
+    recording = {
+        'cache_key': cache_key,
+        'path': path,
+        'params': {name: value for name, value in params.items() if name != 'apiKey'},
+        'status_code': status_code,
+        'data': data,
+    }
+
+    with record_lock:
+        os.makedirs(RECORD_PATH, exist_ok=True)
+        temporary_path = get_recording_path(RECORD_PATH, cache_key) + '.tmp'
+        with open(temporary_path, 'w') as recording_file:
+            json.dump(recording, recording_file, default=str)
+        os.replace(temporary_path, get_recording_path(RECORD_PATH, cache_key))
+
+
+def load_recordings(record_path):
+    """
+    Returns every recording in the folder 'record_path': cache key -> recording.
+    The key is made again from the recorded path and parameters, so recordings made before the parameter
+    values were turned into text still match
+    """
+    recording_dict = {}
+
+    for recording_path in glob.glob(os.path.join(record_path, '*.json')):
+        with open(recording_path) as recording_file:
+            recording = json.load(recording_file)
+        recording_dict[responseCache.make_cache_key(recording['path'], recording['params'])] = recording
+    return recording_dict
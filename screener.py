@@ -0,0 +1,323 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import ast
+import bisect
+import functools
+import math
+import operator
+import threading
+import numpy
+
+# Short names that can be used in filters and sort keys instead of the column names
+COLUMN_ALIASES = {
+    'beta': 'beta_value',
+    'pe': 'pe_value',
+    'ps': 'ps_value',
+    'high': 'highest_price',
+    'low': 'lowest_price',
+}
+COMPARISON_OPERATORS = {
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+INITIAL_ROW_CAPACITY = 1024  # the columns double in size when they are full, so adding a row is O(1) on average
+
+
+class SortedIndex:
+    """
+    The rows of one column ordered by their value, kept in order as values change,
+    so a ranking is read in order instead of sorting the whole column again. Missing values are left out.
+
+    Attributes:
+        value_list (list): The values, in increasing order.
+        row_list (list): The row of each value in 'value_list'.
+    """
+
+    def __init__(self, values):
+        """Initializes the index with the column 'values' (a numpy array with a value per row)"""
+        rows = numpy.flatnonzero(~numpy.isnan(values))
+        order = numpy.argsort(values[rows], kind='stable')
+        self.value_list = values[rows][order].tolist()
+        self.row_list = rows[order].tolist()
+
+    def insert(self, value, row):
+        """Adds the value 'value' of row 'row' (nothing is added for a missing value)"""
+        if math.isnan(value):
+            return
+        position = bisect.bisect_right(self.value_list, value)
+        self.value_list.insert(position, value)
+        self.row_list.insert(position, row)
+
+    def remove(self, value, row):
+        """Removes the value 'value' of row 'row'"""
+        if math.isnan(value):
+            return
+        position = bisect.bisect_left(self.value_list, value)
+        while self.row_list[position] != row:  # several rows can have the same value
+            position += 1
+        del self.value_list[position]
+        del self.row_list[position]
+
+    def iterate_rows(self, descending=False):
+        """Returns an iterator over the rows in the order of their value"""
+        return reversed(self.row_list) if descending else iter(self.row_list)
+
+
+class MetricTable:
+    """
+    The metrics of every analysed stock as columns (one numpy array per metric, one row per symbol),
+    so a filter is evaluated for every symbol at once. A column that is ranked by gets a sorted index
+    that is kept up to date as new results come in. Every method can be called from any thread.
+
+    Attributes:
+        symbol_list (list): The symbol of each row.
+        row_dict (dict): Symbol -> its row.
+        column_dict (dict): Metric name (f.e 'beta_value') -> numpy array with room for more rows than are used.
+        index_dict (dict): Metric name -> SortedIndex, for every column that has been ranked by.
+        row_capacity (int): How many rows the columns have room for.
+        lock (threading.Lock): Guards the table while it is updated or read.
+    """
+
+    def __init__(self, indexed_column_list=()):
+        """
+        Initializes an empty table. The columns in 'indexed_column_list' (f.e the default ranking) get their sorted
+        index right away, so it is kept up to date from the first result on and never has to be built
+        """
+        self.symbol_list = []
+        self.row_dict = {}
+        self.column_dict = {name: numpy.full(INITIAL_ROW_CAPACITY, numpy.nan) for name in indexed_column_list}
+        self.index_dict = {name: SortedIndex(numpy.empty(0)) for name in indexed_column_list}
+        self.row_capacity = INITIAL_ROW_CAPACITY
+        self.lock = threading.Lock()
+
+    def get_row(self, symbol):
+        """Returns the row of 'symbol', adding it (and doubling the columns if they are full) if it is new"""
+        if symbol in self.row_dict:
+            return self.row_dict[symbol]
+
+        row = len(self.symbol_list)
+        if row >= self.row_capacity:
+            for name, values in self.column_dict.items():
+                self.column_dict[name] = numpy.concatenate([values, numpy.full(self.row_capacity, numpy.nan)])
+            self.row_capacity *= 2
+        self.symbol_list.append(symbol)
+        self.row_dict[symbol] = row
+        return row
+
+    def update(self, symbol, value_dict):
+        """
+        Sets the metrics in 'value_dict' (metric name -> value) of 'symbol'; the other metrics keep their values.
+        A value that isn't a number (f.e None) is stored as missing
+        """
+        with self.lock:
+            row = self.get_row(symbol)
+            for name, value in value_dict.items():
+                if name not in self.column_dict:
+                    self.column_dict[name] = numpy.full(self.row_capacity, numpy.nan)
+                new_value = float(value) if isinstance(value, (int, float, numpy.number)) else math.nan
+
+                old_value = self.column_dict[name][row]
+                if old_value == new_value or (math.isnan(old_value) and math.isnan(new_value)):
+                    continue
+                self.column_dict[name][row] = new_value
+                if name in self.index_dict:
+                    self.index_dict[name].remove(float(old_value), row)
+                    self.index_dict[name].insert(new_value, row)
+
+    def get_column(self, name):
+        """Returns the values of the metric 'name' for every row (all missing if no stock has it)"""
+        name = COLUMN_ALIASES.get(name, name)
+        if name not in self.column_dict:
+            return numpy.full(len(self.symbol_list), numpy.nan)
+        return self.column_dict[name][:len(self.symbol_list)]
+
+    def get_index(self, name):
+        """Returns the sorted index of the metric 'name', building it the first time"""
+        if name not in self.index_dict:
+            self.index_dict[name] = SortedIndex(self.get_column(name))
+        return self.index_dict[name]
+
+    def query(self, filter_text=None, sort_key_list=(('beta_value', True),), limit=None):
+        """
+        Returns the symbols passing the filter 'filter_text' (f.e "beta > 1.2 and pe < 15", see compile_filter),
+        ordered by 'sort_key_list' ((metric name, True for descending) pairs, the first deciding first),
+        and only the first 'limit' if it is given (none if it is 0). Symbols missing the first sort key can't be ranked
+        and are left out.
+        A filter that can't be understood raises a ValueError
+        """
+        row_filter = compile_filter(filter_text) if filter_text else None
+        sort_key_list = [(COLUMN_ALIASES.get(name, name), descending) for name, descending in sort_key_list]
+        if limit is not None and limit <= 0:
+            return []
+
+        with self.lock:
+            if row_filter is None:
+                row_mask = numpy.ones(len(self.symbol_list), dtype=bool)
+            else:
+                row_mask = row_filter(self)
+
+            if len(sort_key_list) == 1:
+                row_list = self.query_sorted_index(row_mask, *sort_key_list[0], limit)
+            else:
+                row_list = self.query_sorted_rows(row_mask, sort_key_list, limit)
+            return [self.symbol_list[row] for row in row_list]
+
+    def query_sorted_index(self, row_mask, name, descending, limit):
+        """
+        Returns the rows in 'row_mask' ordered by the metric 'name', read from its sorted index:
+        only as many rows as are needed to find 'limit' of them are looked at (the caller holds 'lock')
+        """
+        sorted_index = self.get_index(name)
+        if limit is None:  # every row is needed, so they are picked out of the index at once
+            row_array = numpy.array(sorted_index.row_list, dtype=numpy.int64)
+            if descending:
+                row_array = row_array[::-1]
+            return row_array[row_mask[row_array]].tolist()
+
+        row_list = []
+        for row in sorted_index.iterate_rows(descending):
+            if row_mask[row]:
+                row_list.append(row)
+                if len(row_list) == limit:
+                    break
+        return row_list
+
+    def query_sorted_rows(self, row_mask, sort_key_list, limit):
+        """
+        Returns the rows in 'row_mask' ordered by several metrics (the caller holds 'lock').
+        With a 'limit' only the rows that can make the top by their first metric are sorted
+        """
+        first_name, first_descending = sort_key_list[0]
+        first_values = self.get_column(first_name)
+        rows = numpy.flatnonzero(row_mask & ~numpy.isnan(first_values))
+
+        key_list = []
+        for name, descending in sort_key_list:
+            values = self.get_column(name)[rows]
+            values = -values if descending else values
+            key_list.append(numpy.where(numpy.isnan(values), numpy.inf, values))  # missing values last
+
+        if limit is not None and limit < len(rows):
+            kth_value = numpy.partition(key_list[0], limit - 1)[limit - 1]
+            candidates = key_list[0] <= kth_value  # keeps every row tied with the last one, the other keys decide
+            rows = rows[candidates]
+            key_list = [keys[candidates] for keys in key_list]
+
+        order = numpy.lexsort(key_list[::-1])  # lexsort sorts by its last key first
+        return rows[order][:limit].tolist()
+
+    def get_values(self, symbol, name_list):
+        """Returns the metrics 'name_list' of 'symbol' as a list (None where missing)"""
+        with self.lock:
+            row = self.row_dict.get(symbol)
+            value_list = []
+            for name in name_list:
+                value = math.nan if row is None else float(self.get_column(name)[row])
+                value_list.append(None if math.isnan(value) else value)
+            return value_list
+
+
+@functools.lru_cache(maxsize=64)
+def compile_filter(filter_text):
+    """
+    Turns a filter like "beta > 1.2 and pe < 15 and equity_ratio > 0.4" into a function that returns,
+    for a MetricTable, which rows pass it (a numpy boolean array). Comparisons (also chained, f.e "0 < pe < 15"),
+    'and', 'or', 'not' and parentheses can be used; a missing value never passes a comparison.
+    Raises a ValueError if the filter can't be understood
+    """
+    try:
+        expression = ast.parse(filter_text, mode='eval').body
+    except SyntaxError:
+        raise ValueError(f"The filter '{filter_text}' can't be understood")
+    check_filter_node(expression)
+    return lambda table: evaluate_filter_node(expression, table)
+
+
+def check_filter_node(node):
+    """Raises a ValueError if the filter expression 'node' holds anything but metrics, numbers and comparisons"""
+    if isinstance(node, ast.BoolOp):
+        for value in node.values:
+            check_filter_node(value)
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        check_filter_node(node.operand)
+    elif isinstance(node, ast.Compare):
+        if not all(type(comparison) in COMPARISON_OPERATORS for comparison in node.ops):
+            raise ValueError("Only the comparisons >, >=, <, <=, == and != can be used in a filter")
+        for operand in [node.left] + node.comparators:
+            check_operand_node(operand)
+    else:
+        raise ValueError("A filter is made of comparisons joined by 'and', 'or' and 'not'")
+
+
+def check_operand_node(node):
+    """Raises a ValueError if the operand 'node' of a comparison isn't a metric name or a number"""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        node = node.operand  # a negative number
+    if isinstance(node, ast.Name):
+        return
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return
+    raise ValueError("Only metric names and numbers can be compared in a filter")
+
+
+def check_metric_name(name, table):
+    """Raises a ValueError if 'name' is neither a column of the MetricTable 'table' nor an alias (f.e misspelt)"""
+    column_name = COLUMN_ALIASES.get(name, name)
+    if column_name not in table.column_dict and column_name not in COLUMN_ALIASES.values():
+        raise ValueError(f"There is no metric called '{name}'")
+
+
+def evaluate_operand_node(node, table):
+    """
+    Returns the values of the operand 'node' for every row (a column of the table, or a number).
+    Raises a ValueError for a name that is neither a column of the table nor an alias (f.e a misspelt metric)
+    """
+    if isinstance(node, ast.UnaryOp):
+        return -evaluate_operand_node(node.operand, table)
+    if isinstance(node, ast.Name):
+        check_metric_name(node.id, table)
+        return table.get_column(node.id)
+    return float(node.value)
+
+
+def evaluate_filter_node(node, table):
+    """Returns which rows of the table pass the filter expression 'node' (checked by check_filter_node)"""
+    if isinstance(node, ast.BoolOp):
+        row_masks = [evaluate_filter_node(value, table) for value in node.values]
+        return functools.reduce(numpy.logical_and if isinstance(node.op, ast.And) else numpy.logical_or, row_masks)
+
+    if isinstance(node, ast.UnaryOp):
+        return ~evaluate_filter_node(node.operand, table)
+
+    row_mask = numpy.ones(len(table.symbol_list), dtype=bool)
+    left_values = evaluate_operand_node(node.left, table)
+    for comparison, comparator in zip(node.ops, node.comparators):
+        right_values = evaluate_operand_node(comparator, table)
+        with numpy.errstate(invalid='ignore'):
+            row_mask &= COMPARISON_OPERATORS[type(comparison)](left_values, right_values)  # nan compares False
+        left_values = right_values
+    return row_mask
+
+
+def parse_sort_keys(sort_text, table=None):
+    """
+    Turns sort keys like "beta desc, pe" into [('beta_value', True), ('pe_value', False)]:
+    metric names separated by commas, each ascending unless followed by 'desc'.
+    With the MetricTable 'table' a name that is neither its column nor an alias raises a ValueError
+    """
+    sort_key_list = []
+    for sort_key in sort_text.split(','):
+        words = sort_key.split()
+        if not words:
+            continue
+        if len(words) > 2 or (len(words) == 2 and words[1].lower() not in ('asc', 'desc')):
+            raise ValueError(f"The sort key '{sort_key.strip()}' should be a metric name followed by 'asc' or 'desc'")
+        if table is not None:
+            check_metric_name(words[0], table)
+        sort_key_list.append((COLUMN_ALIASES.get(words[0], words[0]), len(words) == 2 and words[1].lower() == 'desc'))
+    return sort_key_list
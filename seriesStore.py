@@ -0,0 +1,211 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import collections
+import datetime
+import json
+import math
+import os
+from dotenv import load_dotenv
+from getBusinessDayDates import SESSIONS_PER_MONTH
+
+load_dotenv()
+# Folder holding the stored closing prices of each symbol, one file per symbol
+SERIES_STORE_PATH = os.getenv('SERIES_STORE_PATH',
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), 'series_store'))
+
+
+class PriceSeries:
+    """
+    The daily closing prices of one stock: a long stored history (the longest lookback, f.e 5 years)
+    and a window of its newest bars (one month) that rolls forward as new sessions are appended.
+    The return, the price extremes and the beta value against the index over the window are kept up to date
+    on every append, without going through the whole window again.
+
+    Attributes:
+        symbol (str): The ticker symbol of the stock.
+        window_bar_count (int): How many of the newest bars the window holds.
+        date_list (collections.deque): The trading day of each closing price in the history, oldest first.
+        closing_price_list (collections.deque): The closing prices in the history, oldest first.
+        index_price_list (collections.deque): The index's closing price on each trading day (None if unknown).
+        return_pair_list (collections.deque): (stock, index) daily return ending on each day, None if not both known.
+        history_from_date (datetime.date): The first trading day the history was requested from.
+        highest_deque (collections.deque): (bar number, price) pairs whose first element is the window's highest price.
+        lowest_deque (collections.deque): (bar number, price) pairs whose first element is the window's lowest price.
+        bar_count (int): How many bars have ever been appended; numbers the bars.
+        window_start_bar (int): The number of the oldest bar in the window.
+        return_sums (list): Running sums of the window's return pairs: [count, stock, index, stock * index, index * index].
+    """
+
+    def __init__(self, symbol, window_bar_count=SESSIONS_PER_MONTH + 1):
+        """Initializes an empty series for 'symbol' whose window holds 'window_bar_count' bars"""
+        self.symbol = symbol
+        self.window_bar_count = window_bar_count
+        self.date_list = collections.deque()
+        self.closing_price_list = collections.deque()
+        self.index_price_list = collections.deque()
+        self.return_pair_list = collections.deque()
+        self.history_from_date = None
+        self.highest_deque = collections.deque()
+        self.lowest_deque = collections.deque()
+        self.bar_count = 0
+        self.window_start_bar = 0
+        self.return_sums = [0, 0.0, 0.0, 0.0, 0.0]
+
+    def first_date(self):
+        """Returns the trading day of the oldest bar in the history, or None if the series is empty"""
+        return self.date_list[0] if self.date_list else None
+
+    def last_date(self):
+        """Returns the trading day of the newest bar, or None if the series is empty"""
+        return self.date_list[-1] if self.date_list else None
+
+    def get_position(self, bar_number):
+        """Returns where the bar 'bar_number' is in the history lists"""
+        return bar_number - (self.bar_count - len(self.date_list))
+
+    def add_return_pair(self, return_pair, sign):
+        """Adds (sign 1) or removes (sign -1) a daily return pair from the running sums"""
+        stock_return, index_return = return_pair
+        self.return_sums[0] += sign
+        self.return_sums[1] += sign * stock_return
+        self.return_sums[2] += sign * index_return
+        self.return_sums[3] += sign * stock_return * index_return
+        self.return_sums[4] += sign * index_return * index_return
+
+    def append(self, date, closing_price, index_price=None):
+        """Appends the bar of the trading day 'date' (newer than the newest bar) and rolls the window forward"""
+        return_pair = None
+        if self.closing_price_list and index_price is not None and self.index_price_list[-1] is not None:
+            return_pair = (closing_price / self.closing_price_list[-1] - 1, index_price / self.index_price_list[-1] - 1)
+            if self.bar_count > self.window_start_bar:  # the previous bar is in the window
+                self.add_return_pair(return_pair, 1)
+
+        self.date_list.append(date)
+        self.closing_price_list.append(closing_price)
+        self.index_price_list.append(index_price)
+        self.return_pair_list.append(return_pair)
+
+        # a price that is beaten by the new one can never be the extreme again, so it is dropped
+        while self.highest_deque and self.highest_deque[-1][1] <= closing_price:
+            self.highest_deque.pop()
+        self.highest_deque.append((self.bar_count, closing_price))
+        while self.lowest_deque and self.lowest_deque[-1][1] >= closing_price:
+            self.lowest_deque.pop()
+        self.lowest_deque.append((self.bar_count, closing_price))
+
+        self.bar_count += 1
+        while self.bar_count - self.window_start_bar > self.window_bar_count:
+            self.move_window_start()
+
+    def move_window_start(self):
+        """Moves the oldest bar out of the window (it stays in the history)"""
+        leaving_bar = self.window_start_bar
+        self.window_start_bar += 1
+
+        # the new oldest bar's return started at the bar that left, so it leaves the window too
+        return_pair = self.return_pair_list[self.get_position(self.window_start_bar)]
+        if return_pair is not None:
+            self.add_return_pair(return_pair, -1)
+
+        if self.highest_deque[0][0] == leaving_bar:
+            self.highest_deque.popleft()
+        if self.lowest_deque[0][0] == leaving_bar:
+            self.lowest_deque.popleft()
+
+    def trim_history(self, from_date):
+        """Drops the history older than 'from_date' (never a bar that is still in the window)"""
+        while self.date_list and self.date_list[0] < from_date and self.get_position(self.window_start_bar) > 0:
+            self.date_list.popleft()
+            self.closing_price_list.popleft()
+            self.index_price_list.popleft()
+            self.return_pair_list.popleft()
+
+    def window_dates(self):
+        """Returns the trading days in the window, oldest first"""
+        return list(self.date_list)[self.get_position(self.window_start_bar):]
+
+    def window_closing_prices(self):
+        """Returns the closing prices in the window, oldest first"""
+        return list(self.closing_price_list)[self.get_position(self.window_start_bar):]
+
+    def stock_return(self):
+        """Returns the latest price divided by the oldest price in the window"""
+        return self.closing_price_list[-1] / self.closing_price_list[self.get_position(self.window_start_bar)]
+
+    def price_extremes(self):
+        """Returns the highest and the lowest price in the window"""
+        return self.highest_deque[0][1], self.lowest_deque[0][1]
+
+    def beta_value(self):
+        """
+        Returns the beta value against the index over the window
+        (the covariance of the daily returns divided by the index's variance), or nan with fewer than two returns
+        """
+        count, stock_sum, index_sum, product_sum, index_square_sum = self.return_sums
+        if count < 2:
+            return math.nan
+
+        covariance = product_sum - stock_sum * index_sum / count
+        index_variance = index_square_sum - index_sum * index_sum / count
+        if index_variance <= 0:
+            return math.nan
+        return covariance / index_variance  # the (count - 1) of both cancels out
+
+    def get_price(self, date):
+        """Returns the closing price of the trading day 'date', or None if it isn't in the history"""
+        for bar_date, closing_price in zip(reversed(self.date_list), reversed(self.closing_price_list)):
+            if bar_date == date:
+                return closing_price
+            if bar_date < date:
+                break  # the newest days are checked first, so it's usually found right away
+        return None
+
+
+loaded_series = {}  # symbol -> PriceSeries, for every series read from disk during this run
+
+
+def get_series_path(symbol):
+    """Returns the path of the file holding the series of 'symbol'"""
+    return os.path.join(SERIES_STORE_PATH, f"{symbol}.json")
+
+
+def load_series(symbol):
+    """Returns the stored series of 'symbol', or an empty one if there is none"""
+    if symbol in loaded_series:
+        return loaded_series[symbol]
+
+    series = PriceSeries(symbol)
+    if os.path.exists(get_series_path(symbol)):
+        with open(get_series_path(symbol)) as series_file:
+            series_data = json.load(series_file)
+        for date, closing_price, index_price in zip(series_data['dates'], series_data['closes'],
+                                                     series_data['index_closes']):
+            series.append(datetime.date.fromisoformat(date), closing_price, index_price)
+        if series_data.get('history_from'):
+            series.history_from_date = datetime.date.fromisoformat(series_data['history_from'])
+
+    loaded_series[symbol] = series
+    return series
+
+
+def save_series(series):
+    """Writes the series to disk (to a temporary file first, so a crash can't destroy the stored series)"""
+    os.makedirs(SERIES_STORE_PATH, exist_ok=True)
+    series_data = {
+        'dates': [date.isoformat() for date in series.date_list],
+        'closes': list(series.closing_price_list),
+        'index_closes': list(series.index_price_list),
+        'history_from': series.history_from_date.isoformat() if series.history_from_date else None,
+    }
+
+    temporary_path = get_series_path(series.symbol) + '.tmp'
+    with open(temporary_path, 'w') as series_file:
+        json.dump(series_data, series_file)
+    os.replace(temporary_path, get_series_path(series.symbol))
+
+
+def reset_series(symbol):
+    """Replaces the series of 'symbol' with an empty one (f.e to rebuild a history that doesn't reach back far enough)"""
+    loaded_series[symbol] = PriceSeries(symbol)
+    return loaded_series[symbol]
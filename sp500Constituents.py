@@ -0,0 +1,143 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import datetime
+import json
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+# SP500_URL can point to any page with the table instead, f.e the mock server's /sp500 page
+SP500_WIKIPEDIA_URL = os.getenv('SP500_URL', 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies')
+# The last fetched list of S&P 500 symbols, so the program starts without waiting for (or needing) the network
+SNAPSHOT_PATH = os.getenv('SP500_SNAPSHOT_PATH',
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sp500_snapshot.json'))
+SNAPSHOT_MAX_AGE = datetime.timedelta(days=1)  # An older snapshot is refreshed in the background
+
+sp500_symbol_list = None  # The symbols of the loaded snapshot, None until they are first needed
+sp500_symbol_set = frozenset()  # The same symbols as a set, so membership is checked without going through the list
+snapshot_version = 0  # Goes up by one every time the fetched list differs from the stored one
+snapshot_fetched_at = None  # When the loaded snapshot was fetched from Wikipedia (datetime.datetime)
+snapshot_lock = threading.Lock()
+refresh_thread = None  # The background refresh, if one has been started
+
+
+def fetch_sp500_tickers():
+    """Gets a list of the current 500 stocks in the S&P 500 index from Wikipedia"""
+    import pandas  # only imported when the list is fetched, so starting the program doesn't wait for it
+    sp_wikipedia_data = pandas.read_html(SP500_WIKIPEDIA_URL)[0]
+    sp_symbol_list = []
+
+    for symbol in sp_wikipedia_data['Symbol']:
+        sp_symbol_list.append(symbol)
+    return sp_symbol_list  # returns a list of all the symbols in the S&P 500
+
+
+def use_symbols(symbol_list, version, fetched_at):
+    """Makes 'symbol_list' the loaded list of S&P 500 symbols"""
+    global sp500_symbol_list
+    global sp500_symbol_set
+    global snapshot_version
+    global snapshot_fetched_at
+
+    sp500_symbol_list = list(symbol_list)
+    sp500_symbol_set = frozenset(symbol_list)
+    snapshot_version = version
+    snapshot_fetched_at = fetched_at
+
+
+def read_snapshot():
+    """Loads the stored snapshot; returns False if there is none"""
+    if not os.path.exists(SNAPSHOT_PATH):
+        return False
+
+    with open(SNAPSHOT_PATH) as snapshot_file:
+        snapshot = json.load(snapshot_file)
+    use_symbols(snapshot['symbols'], snapshot['version'], datetime.datetime.fromisoformat(snapshot['fetched_at']))
+    return True
+
+
+def write_snapshot(symbol_list, version, fetched_at):
+    """Stores the symbols as the snapshot (to a temporary file first, so a crash can't destroy the stored snapshot)"""
+    snapshot = {
+        'version': version,
+        'fetched_at': fetched_at.isoformat(),
+        'symbols': symbol_list,
+    }
+
+    temporary_path = SNAPSHOT_PATH + '.tmp'
+    with open(temporary_path, 'w') as snapshot_file:
+        json.dump(snapshot, snapshot_file, indent=1)
+    os.replace(temporary_path, SNAPSHOT_PATH)
+
+
+def refresh_snapshot():
+    """
+    Fetches the list from Wikipedia and stores it as the new snapshot.
+    The version only goes up if the members have changed.
+    Returns False (and keeps the loaded list) if the list couldn't be fetched, f.e when offline
+    """
+    try:
+        symbol_list = fetch_sp500_tickers()
+    except Exception:
+        return False  # keep using the snapshot we have
+
+    with snapshot_lock:
+        version = snapshot_version
+        if frozenset(symbol_list) != sp500_symbol_set:
+            version += 1
+        fetched_at = datetime.datetime.now()
+        write_snapshot(symbol_list, version, fetched_at)
+        use_symbols(symbol_list, version, fetched_at)  # only once stored, so a caller never sees a half-written snapshot
+    return True
+
+
+def load_symbols():
+    """
+    Makes sure a list of symbols is loaded: from the snapshot if there is one, otherwise fetched right away.
+    A background refresh that is running is waited for instead of fetching the list a second time
+    """
+    if refresh_thread is not None and refresh_thread.is_alive() and sp500_symbol_list is None:
+        refresh_thread.join()
+
+    if sp500_symbol_list is not None:
+        return  # already loaded
+
+    with snapshot_lock:
+        if sp500_symbol_list is None and read_snapshot():
+            return  # loaded from the snapshot, no network needed
+
+    if sp500_symbol_list is None and not refresh_snapshot():
+        use_symbols([], snapshot_version, None)  # offline without a snapshot; nothing is a member
+
+
+def refresh_in_background():
+    """
+    Loads the snapshot and, if it is missing or older than SNAPSHOT_MAX_AGE,
+    starts refreshing it from Wikipedia on a background thread so the caller never waits for the network
+    """
+    global refresh_thread
+
+    with snapshot_lock:
+        if sp500_symbol_list is None:
+            read_snapshot()
+
+    if snapshot_fetched_at is not None and datetime.datetime.now() - snapshot_fetched_at < SNAPSHOT_MAX_AGE:
+        return  # the snapshot is recent enough
+
+    if refresh_thread is None or not refresh_thread.is_alive():
+        refresh_thread = threading.Thread(target=refresh_snapshot, daemon=True)
+        refresh_thread.start()
+
+
+def get_sp500_symbols():
+    """Returns the list of S&P 500 symbols (empty if it has never been fetched and the network is down)"""
+    load_symbols()
+    return sp500_symbol_list
+
+
+def is_member(stock_symbol):
+    """Checks if 'stock_symbol' is in the S&P 500"""
+    load_symbols()
+    return stock_symbol in sp500_symbol_set
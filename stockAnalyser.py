@@ -1,274 +1,40 @@
 # Author: Gustav Lundborg
 # Date: 25-03-2024
-# Revision date: 18-04-2024
-
-import os
-from dotenv import load_dotenv
-import requests
-from getBusinessDayDates import business_day_one_month_ago, last_business_day
-import pandas
-import time
+# Revision date: 17-10-2026
+
+# The GUI of the Stock Analyser; the analyses themselves are in analysisCore.py
+
+import concurrent.futures
+import instrumentation
+import math
+import queue
+import sp500Constituents
+import threading
+from analysisCore import clear_data_error, get_stocks_ranked_by_beta, is_in_sp500, is_valid_symbol, \
+    rate_limit_status, run_fundamental_analysis, run_technical_analysis, screen_stocks, set_error_handler, stock_dict, \
+    worker_state
 from tkinter import *
+from tkinter import ttk
 
-load_dotenv()
-API_KEY = os.getenv('API_KEY')  # API key for the API polygon.io
-INDEX_SYMBOL = 'SPY'  # This is the ticker for the index (SPDR S&P 500 ETF Trust)
-unable_to_get_data = False  # If there was a problem getting data from the API this will be set to True
-start_time_status_code_429 = 0  # Gets the time whenever a (status code 429 = data rate limit) happens
-stock_dict = {}  # main dictionary holding all of the objects of the class Stock
-
-
-class Stock:
-    """
-    Represents a stock and provides methods to gather both technical and fundamental data,
-    calculate various metrics, and interact with the Polygon.io API.
-
-    Attributes:
-        symbol (str): The ticker symbol of the stock.
-        company_name (str): The full name of the company.
-        highest_price (float): The highest price of the stock within a specified period.
-        lowest_price (float): The lowest price of the stock within a specified period.
-        stock_return (float): The return of the stock calculated based on historical prices.
-        beta_value (float): The beta value of the stock, indicating its volatility relative to a market index.
-        closing_price_list (list): A list of the last 30 daily closing prices for the stock.
-        has_beta_value (bool): Flag indicating whether the beta value has been calculated.
-        pe_value (float): The price-to-earnings (P/E) ratio of the stock.
-        ps_value (float): The price-to-sales (P/S) ratio of the stock.
-        equity_ratio (float): The equity ratio of the stock.
-    """
-
-    def __init__(self, symbol):
-        """Initializes the class and declares each attributed that is used"""
-        self.symbol = symbol
-        self.company_name = self.get_company_name()
-        self.highest_price = ""
-        self.lowest_price = ""
-        self.stock_return = ""
-        self.beta_value = ""
-        self.closing_price_list = []
-        self.has_beta_value = False
-
-        self.pe_value = ""
-        self.ps_value = ""
-        self.equity_ratio = ""
-
-    def get_technical_data(self):
-        """Calls each function that is used to gather the technical data for the stock"""
-
-        self.calculate_closing_price_list()
-        if unable_to_get_data:
-            return  # return nothing
-        self.stock_return = self.calculate_stock_return()
-        self.highest_price, self.lowest_price = self.get_price_extremes()
-
-    def calculate_beta_value(self, index_return):
-        """Calculates the beta value by dividing the stock return by the index"""
-        self.beta_value = self.stock_return / index_return
-        self.has_beta_value = True
-
-    def calculate_closing_price_list(self):
-        """Gets a list of the last 30 daily closing prices for the stock"""
-
-        endpoint = (f"https://api.polygon.io/v2/aggs/ticker/{self.symbol}/range/1/day/"
-                    f"{business_day_one_month_ago()}/{last_business_day()}?apiKey={API_KEY}")
-        response = requests.get(endpoint)
-
-        if response_successful(response):
-            global unable_to_get_data
-            self.closing_price_list = []
-
-            try:
-                stock_data = response.json()
-                stock_prices = stock_data['results']
-
-                for price_candle in stock_prices:
-                    current_close = price_candle['c']
-                    self.closing_price_list.append(current_close)
-            except KeyError:
-                unable_to_get_data = True
-                draw_error_window("Unable to get the daily closing prices; try another stock")
-            except Exception as e:
-                unable_to_get_data = True
-                show_error_message(e)
-
-    def calculate_stock_return(self):
-        """Calculates the stock return by getting the latest and the oldest price and dividing it"""
-        latest_price = self.closing_price_list[-1]
-        oldest_price = self.closing_price_list[0]
-
-        stock_return = latest_price / oldest_price
-        return stock_return
-
-    def get_price_extremes(self):
-        """
-        Sorts the closing price list
-        then takes the first and last element to extract the highest and lowest price
-        """
-        temp_price_list = self.closing_price_list
-        temp_price_list.sort()
-        highest_price = temp_price_list[-1]
-        lowest_price = temp_price_list[0]
-
-        return highest_price, lowest_price
-
-    def get_fundamental_data(self):
-        """
-        Gets the relevant fundamental data from the polygon.io API,
-        calculates each fundamental data point and assigns it to the class's attributes.
-        """
-        endpoint_financials = f"https://api.polygon.io/vX/reference/financials?ticker={self.symbol}&apiKey={API_KEY}"
-        endpoint_tickers = f"https://api.polygon.io/v3/reference/tickers/{self.symbol}?apiKey={API_KEY}"
-        response_financials = requests.get(endpoint_financials)
-        response_tickers = requests.get(endpoint_tickers)
-
-        if response_successful(response_financials) and response_successful(response_tickers):
-            global unable_to_get_data
-
-            try:
-                latest_quarter = 0
-                financial_data = response_financials.json()['results'][latest_quarter]['financials']
-
-                eps = financial_data['income_statement']['basic_earnings_per_share']['value']
-                total_revenue = financial_data['income_statement']['revenues']['value']
-                assets = financial_data['balance_sheet']['assets']['value']
-                equity = financial_data['balance_sheet']['equity']['value']
-
-                ticker_data = response_tickers.json()
-                market_cap = ticker_data['results']['market_cap']
-
-                self.calculate_closing_price_list()
-                latest_price = self.closing_price_list[-1]
-
-                self.pe_value = latest_price / eps
-                self.ps_value = market_cap / total_revenue
-                self.equity_ratio = equity / assets
-            except KeyError:
-                draw_error_window("Unable to find latest financial data; try another stock")
-                unable_to_get_data = True
-            except Exception as e:
-                unable_to_get_data = True
-                draw_error_window(e)
-
-    def get_company_name(self):
-        """Gets the full name of the company from the API (polygon.io)"""
-
-        endpoint_financials = f"https://api.polygon.io/vX/reference/financials?ticker={self.symbol}&apiKey={API_KEY}"
-        response_financials = requests.get(endpoint_financials)
-
-        if response_successful(response_financials):
-            global unable_to_get_data
-            try:
-                latest_quarter = 0
-                company_name = response_financials.json()['results'][latest_quarter]['company_name']
-                return company_name  # returns the full company name of the stock
-            except Exception as e:
-                unable_to_get_data = True
-                draw_error_window(e)
-
-
-class Index(Stock):
-    """
-    Subclass of Stock;
-    used to specify Indices which dont need to display a full company name in this program
-    """
-
-    def get_company_name(self):
-        """
-        Used to override the get_company_name method from Stock as to avoid
-        requesting the API for data that is never used for the index
-        """
-        pass
-
-
-def response_successful(response):
-    """
-    Checks if a response is successful by asking for its status code.
-    Takes in the parameter 'response' as the response
-    """
-    global unable_to_get_data
-    global start_time_status_code_429
-
-    if response.status_code == 200:  # status code 200 == successful request
-        return True  # return true
-    elif response.status_code == 429:
-        '''
-        If a status code 429 happens it most likely means 
-        it has reached the data request limit (5 requests per minute) for this API
-        '''
-        unable_to_get_data = True
-        start_time_status_code_429 = get_current_time()
-        draw_error_window("You have surpassed the rate limit for retrieving data; wait 1 minute.")
-        return False  # returns False to avoid gathering data from a failed response
-    else:
-        draw_error_window(f"Failed to retrieve data. Status code: {response.status_code}")
-        unable_to_get_data = True
-        return False  # returns False to avoid gathering data from a failed response
-
-
-def show_error_message(error):
-    draw_error_window(f"There was an error when gathering the data; {error}")
-
-
-def fetch_sp500_tickers():
-    """Gets a list of the current 500 stocks in the S&P 500 index"""
-    sp_wikipedia_data = pandas.read_html('https://en.wikipedia.org/wiki/List_of_S%26P_500_companies')[0]
-    sp_symbol_list = []
-
-    for symbol in sp_wikipedia_data['Symbol']:
-        sp_symbol_list.append(symbol)
-    return sp_symbol_list  # returns a list of all the symbols in the S&P 500
-
-
-sp500_symbol_list = fetch_sp500_tickers()
-
-
-def is_in_sp500(stock_symbol):
-    """Checks if the parameter 'stock symbol' is in the S&P 500 symbol list"""
-    if stock_symbol in sp500_symbol_list:
-        return True  # return True (the stock_symbol is in the list)
-    else:
-        draw_error_window("This ticker is not in the S&P 500")
-        return False  # return False (the stock_symbol is not in the list)
-
-
-def get_current_time():
-    """Gets the current time in seconds since the Epoch"""
-    current_time = time.time()
-    return current_time  # returns the current time since epoch
-
-
-def is_within_rate_limit():
-    """Checks if 60 seconds have gone since the start time (the API has 5 requests per minute limit)"""
-    global unable_to_get_data
-    global start_time_status_code_429
-
-    end_time = get_current_time()
-    elapsed_time = end_time - start_time_status_code_429
-
-    if elapsed_time < 60:
-        time_left = round(60 - elapsed_time, 2)
-        draw_error_window(f"You load data too often; wait {time_left} seconds")
-        return False  # if the elapsed time since the status_code_429 happened is below 60s, return False
-    else:
-        start_time_status_code_429 = 0
-        unable_to_get_data = False
-        return True  # return True
+# The GUI runs the analyses on a background worker so the window never freezes while waiting for the API.
+# The worker only talks to the GUI through 'ui_queue', which the Tk main thread checks every 100 ms
+ui_queue = queue.Queue()  # (job number, kind of message, value) from the worker to the GUI
+analysis_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)  # one analysis at a time
+current_job_number = 0  # messages from any other (cancelled) job are ignored
+current_cancel_event = threading.Event()  # set to cancel the job that is running
+loading_progress_text = None  # StringVar with the progress of the running job, while the loading screen is shown
+loading_rate_limit_text = None  # StringVar with the rate limiter's status, while the loading screen is shown
+pending_draw_results_function = None  # draws the results of the running job once it is done
 
 
 def sort_stocks_by_beta():
     """Sorts each of the Stock objects in 'stock_dict' by their beta value"""
-    temp_stock_list = []
-
-    for stock in stock_dict.values():
-
-        if stock.has_beta_value:
-            temp_stock_list.append(stock)
+    sorted_stocks_by_beta = get_stocks_ranked_by_beta()
 
-    if not temp_stock_list:
+    if not sorted_stocks_by_beta:
         draw_error_window("You need to do to a technical analysis of a stock")
         return  # return nothing, get out of the function
 
-    sorted_stocks_by_beta = sorted(temp_stock_list, key=lambda stock: stock.beta_value, reverse=True)
     draw_stock_ranking(sorted_stocks_by_beta)
 
 
@@ -291,28 +57,29 @@ def create_main_menu():
     ranking_button = Button(root, text="3. Rank stocks by beta value", command=sort_stocks_by_beta)
     ranking_button.grid(row=2, column=0, columnspan=1, sticky=W)
 
-    exit_button = Button(root, text="4. Exit", command=lambda: destroy_window(root))
-    exit_button.grid(row=3, column=0, columnspan=1, sticky=W)
+    screener_button = Button(root, text="4. Screen analysed stocks", command=draw_screener)
+    screener_button.grid(row=3, column=0, columnspan=1, sticky=W)
+
+    exit_button = Button(root, text="5. Exit", command=lambda: destroy_window(root))
+    exit_button.grid(row=4, column=0, columnspan=1, sticky=W)
 
 
 def ask_for_fundamental_ticker():
     """
-    Checks if the API is within in its rate limit, then runs the ask_for_ticker function
+    Runs the ask_for_ticker function
     with the main function that drive the fundamental analysis 'run_fundamental_analysis' as parameter.
     This is so the right type of analysis can be executed in 'ask_for_ticker' depending on which analysis is chosen
     """
-    if is_within_rate_limit():
-        ask_for_ticker(run_fundamental_analysis)
+    ask_for_ticker(run_fundamental_analysis, draw_fundamental_results)
 
 
 def ask_for_technical_ticker():
     """
-    Checks if the API is within in its rate limit, then runs the ask_for_ticker function
+    Runs the ask_for_ticker function
     with the main function that drive the fundamental analysis 'run_technical_analysis' as parameter.
     This is so the right type of analysis can be executed in 'ask_for_ticker' depending on which analysis is chosen
     """
-    if is_within_rate_limit():
-        ask_for_ticker(run_technical_analysis)
+    ask_for_ticker(run_technical_analysis, draw_technical_results)
 
 
 def destroy_window(window):
@@ -322,12 +89,12 @@ def destroy_window(window):
 
 def entry_is_valid_ticker_in_sp_500(entry):
     """
-    If the 'entry' parameter (a string of text) only consists of letters and is in the S&P 500 list:
+    If the 'entry' parameter (a string of text) is written like a ticker symbol and is in the S&P 500 list:
     return True, otherwise False
     """
-    if any(not char.isalpha() for char in entry):
-        draw_error_window("A stock ticker consists only of capital letters")
-        return False  # does not consist of only letters; return True
+    if not is_valid_symbol(entry):
+        draw_error_window("A stock ticker consists of capital letters, and digits, dots or dashes (f.e BRK.B)")
+        return False  # is not written like a ticker symbol; return False
 
     if not is_in_sp500(entry):
         return False  # Is not in the S&P 500, return False
@@ -335,34 +102,38 @@ def entry_is_valid_ticker_in_sp_500(entry):
     return True  # entry is valid; return True
 
 
-def ask_for_ticker(analysis_type_function):
+def ask_for_ticker(analysis_type_function, draw_results_function):
     """
-    This displays the screen asking for a stock ticker
+    This displays the screen asking for one or more stock tickers
     It creates a label, entry and button to get an entry from the user,
     then runs 'get_ticker' the button is clicked
     The parameter 'analysis_type_calculation'
     is used to get the main function for the type of analysis that is being done
+    and 'draw_results_function' to get the function that displays its results
     """
     remove_all_widgets(root)
 
     def get_ticker():
         """
-        This checks if it's within the API rate limit
-        then gets the users entry and does an analysis
+        This gets the users entry (several tickers can be separated by commas or spaces)
+        and if every ticker is a valid ticker in the S&P 500, starts the analysis
         based on the overarching functions parameter 'analysis_type_function',
-        so f.e 'run_fundamental_analysis' can be used
-        if the entry is a valid ticker in the S&P 500; run the analysis function
+        so f.e 'run_fundamental_analysis' can be used, in the background
         """
-        if not is_within_rate_limit():
+        users_stock_symbols = ticker_entry.get().upper().replace(',', ' ').split()
+
+        if not users_stock_symbols:
+            draw_error_window("Input a ticker from the S&P 500")
             return  # return nothing, get out of the function
 
-        users_stock_symbol = ticker_entry.get().upper()
+        for users_stock_symbol in users_stock_symbols:
+            if not entry_is_valid_ticker_in_sp_500(users_stock_symbol):
+                return  # return nothing, get out of the function
 
-        if entry_is_valid_ticker_in_sp_500(users_stock_symbol):
-            analysis_type_function(users_stock_symbol)
+        start_analysis(analysis_type_function, draw_results_function, users_stock_symbols)
 
     # Create all the widgets
-    input_ticker_label = Label(root, text="Input a ticker from the S&P 500")
+    input_ticker_label = Label(root, text="Input one or more tickers from the S&P 500")
     input_ticker_label.grid(row=0, column=0, columnspan=1, sticky=W)
 
     ticker_entry = Entry(root)
@@ -374,61 +145,145 @@ def ask_for_ticker(analysis_type_function):
     back_button = Button(root, text="Back", command=create_main_menu)  # if command is executed; return to the main menu
     back_button.grid(row=3, column=0, columnspan=1, sticky=W)
 
+    rate_limit_lbl = Label(root, text=rate_limit_status())
+    rate_limit_lbl.grid(row=4, column=0, columnspan=1, sticky=W)
+
 
-def run_technical_analysis(stock_symbol):
+def start_analysis(analysis_type_function, draw_results_function, stock_symbol_list):
     """
-    The main function that runs the technical analysis,
-    it takes the stock's symbol as a parameter
-    it gets the technical data from the index and the current stock, so it can print the results in the GUI
-    Inbetween each function that gathers data from the API; it checks if it was unable to get data through this process
-    if so it will return out of the function, so it doesn't waste any more requests to the API.
+    Starts the analysis of every symbol in 'stock_symbol_list' on the background worker
+    and shows the loading screen until 'poll_ui_queue' gets the results and passes them to 'draw_results_function'
     """
-    index = Index(INDEX_SYMBOL)
-    if unable_to_get_data:
-        return  # return nothing
-    index.get_technical_data()
-    if unable_to_get_data:
-        return  # return nothing
+    global current_job_number
+    global current_cancel_event
 
-    current_stock = ""
-    if stock_symbol in stock_dict:  # if the stock already exists as an object
-        current_stock = stock_dict[stock_symbol]
-    else:
-        current_stock = Stock(stock_symbol)
+    current_job_number += 1
+    current_cancel_event = threading.Event()
+    analysis_executor.submit(run_analysis_job, current_job_number, current_cancel_event,
+                             analysis_type_function, stock_symbol_list)
+    draw_loading_screen(draw_results_function)
+
+
+def run_analysis_job(job_number, cancel_event, analysis_type_function, stock_symbol_list):
+    """
+    Runs on the background worker (never touches the widgets):
+    analyses every symbol and sends the progress, the errors and finally the analysed stocks to the GUI
+    through 'ui_queue'. Stops between symbols if 'cancel_event' is set
+    """
+    worker_state.job_number = job_number
+    worker_state.cancel_event = cancel_event
+    analysed_stock_list = []
+
+    try:
+        for number, stock_symbol in enumerate(stock_symbol_list, start=1):
+            if cancel_event.is_set():
+                break  # cancelled; don't waste any more requests
+
+            ui_queue.put((job_number, 'progress', f"Analysing {stock_symbol} ({number}/{len(stock_symbol_list)})"))
+            clear_data_error()
+            analysed_stock = analysis_type_function(stock_symbol)
+            if analysed_stock is not None:
+                analysed_stock_list.append(analysed_stock)
+    except Exception as e:
+        queue_error_message(f"There was an error when gathering the data; {e}")
+    finally:
+        ui_queue.put((job_number, 'done', analysed_stock_list))
+        worker_state.job_number = None
+        worker_state.cancel_event = None
+
+
+def queue_error_message(error_message):
+    """
+    The error handler while the GUI runs: sends the error message to the GUI through 'ui_queue',
+    so it is drawn by the Tk main thread whichever thread reported it
+    """
+    ui_queue.put((getattr(worker_state, 'job_number', None), 'error', error_message))
 
-    if unable_to_get_data:
-        return  # return nothing
-    current_stock.get_technical_data()
-    if unable_to_get_data:
-        return  # return nothing
-    current_stock.calculate_beta_value(index.stock_return)
 
-    draw_technical_data(current_stock)
-    stock_dict[stock_symbol] = current_stock
+def cancel_analysis():
+    """Cancels the running analysis and returns to the main menu; the worker stops before its next request"""
+    global current_job_number
 
+    current_cancel_event.set()
+    current_job_number += 1  # anything the cancelled job still sends is ignored
+    create_main_menu()
 
-def run_fundamental_analysis(stock_symbol):
+
+def draw_loading_screen(draw_results_function):
+    """
+    Cleans the root window and shows the progress of the running analysis,
+    the rate limiter's queue and a button to cancel the analysis.
+    'draw_results_function' is kept so 'poll_ui_queue' knows how to display the results
     """
-    The main function that runs the fundamental analysis,
-    it takes the stock's symbol as a parameter
-    it gets the fundamental data from the current stock, so it can print the results in the GUI
-    Inbetween each function that gathers data from the API; it checks if it was unable to get data through this process
-    if so it will return out of the function, so it doesn't waste any more requests to the API.
+    global loading_progress_text
+    global loading_rate_limit_text
+    global pending_draw_results_function
+
+    remove_all_widgets(root)
+    pending_draw_results_function = draw_results_function
+    loading_progress_text = StringVar(root, value="Starting the analysis")
+    loading_rate_limit_text = StringVar(root, value=rate_limit_status())
+
+    progress_lbl = Label(root, textvariable=loading_progress_text)
+    progress_lbl.grid(row=0, column=0, columnspan=1, sticky=W)
+    progress_bar = ttk.Progressbar(root, mode='indeterminate', length=200)
+    progress_bar.grid(row=1, column=0, columnspan=1, sticky=W)
+    progress_bar.start()
+    rate_limit_lbl = Label(root, textvariable=loading_rate_limit_text)
+    rate_limit_lbl.grid(row=2, column=0, columnspan=1, sticky=W)
+    cancel_button = Button(root, text="Cancel", command=cancel_analysis)  # stop the analysis; return to main menu
+    cancel_button.grid(row=3, column=0, columnspan=1, sticky=W)
+
+
+def poll_ui_queue():
     """
-    current_stock = ""
-    if stock_symbol in stock_dict:  # if the stock already exists as an object
-        current_stock = stock_dict[stock_symbol]
+    Runs on the Tk main thread every 100 ms:
+    handles every message the background worker has sent and updates the loading screen
+    """
+    global loading_progress_text
+    global loading_rate_limit_text
+
+    while True:
+        try:
+            job_number, message_kind, value = ui_queue.get_nowait()
+        except queue.Empty:
+            break  # every message has been handled
+
+        if job_number is not None and job_number != current_job_number:
+            continue  # from a cancelled analysis
+
+        if message_kind == 'error':
+            draw_error_window(value)
+        elif message_kind == 'progress' and loading_progress_text is not None:
+            loading_progress_text.set(value)
+        elif message_kind == 'done':
+            loading_progress_text = None
+            loading_rate_limit_text = None
+            if value:
+                pending_draw_results_function(value)
+            else:
+                create_main_menu()  # nothing could be analysed; the errors have been shown
+
+    if loading_rate_limit_text is not None:
+        loading_rate_limit_text.set(rate_limit_status())
+
+    root.after(100, poll_ui_queue)
+
+
+def draw_technical_results(stock_list):
+    """Draws the technical data of one analysed stock, or the beta ranking of several"""
+    if len(stock_list) == 1:
+        draw_technical_data(stock_list[0])
     else:
-        current_stock = Stock(stock_symbol)
+        draw_stock_ranking(sorted(stock_list, key=lambda stock: stock.beta_value, reverse=True))
 
-    if unable_to_get_data:
-        return  # return nothing
-    current_stock.get_fundamental_data()
-    if unable_to_get_data:
-        return  # return nothing
 
-    stock_dict[stock_symbol] = current_stock
-    draw_fundamental_data(current_stock)
+def draw_fundamental_results(stock_list):
+    """Draws the fundamental data of one analysed stock, or a summary line for each of several"""
+    if len(stock_list) == 1:
+        draw_fundamental_data(stock_list[0])
+    else:
+        draw_fundamental_summary(stock_list)
 
 
 def draw_technical_data(stock):
@@ -455,8 +310,50 @@ def draw_technical_data(stock):
     lowest_price_lbl.grid(row=3, column=0, columnspan=1, sticky=W)
     highest_price_lbl = Label(root, text=f"The highest price is {highest_price}")
     highest_price_lbl.grid(row=4, column=0, columnspan=1, sticky=W)
+    next_row = draw_window_metrics(stock, 5)
+    next_row = draw_indicators(stock, next_row)
     continue_lbl = Button(root, text="Continue", command=create_main_menu)  # Go back button; return to main menu
-    continue_lbl.grid(row=5, column=0, columnspan=1, sticky=W)
+    continue_lbl.grid(row=next_row, column=0, columnspan=1, sticky=W)
+
+
+def draw_indicators(stock, first_row):
+    """Draws the values of the stock's streaming indicators, two to a line, starting at the row 'first_row'"""
+    text_list = [f"{name.replace('_', ' ').upper()}: {value:.2f}" for name, value in stock.indicator_dict.items()]
+
+    for line_number in range(0, len(text_list), 2):
+        indicator_lbl = Label(root, text="    ".join(text_list[line_number:line_number + 2]))
+        indicator_lbl.grid(row=first_row + line_number // 2, column=0, columnspan=1, sticky=W)
+    return first_row + (len(text_list) + 1) // 2
+
+
+def draw_window_metrics(stock, first_row):
+    """
+    Draws a table of the stock's metrics over every lookback and bar size, starting at the row 'first_row'.
+    Returns the first row below the table
+    """
+    if not stock.window_metric_dict:
+        return first_row  # nothing to draw
+
+    metric_table = ttk.Treeview(root, columns=('return', 'low', 'high', 'volatility', 'beta'), height=10)
+    metric_table.heading('#0', text="Lookback")
+    for column, heading in [('return', "Return"), ('low', "Lowest"), ('high', "Highest"),
+                            ('volatility', "Volatility"), ('beta', "Beta")]:
+        metric_table.heading(column, text=heading)
+        metric_table.column(column, width=80, anchor=E)
+    metric_table.column('#0', width=120)
+
+    for bar_size, window_metrics in stock.window_metric_dict.items():
+        for window_name, metrics in window_metrics.items():
+            metric_table.insert('', END, text=f"{window_name} ({bar_size})", values=(
+                "{:.2f}%".format(metrics['stock_return'] * 100 - 100),
+                "{:.2f}".format(metrics['lowest_price']),
+                "{:.2f}".format(metrics['highest_price']),
+                "{:.1f}%".format(metrics['volatility'] * 100),
+                "{:.3f}".format(metrics['beta_value']),
+            ))
+
+    metric_table.grid(row=first_row, column=0, columnspan=1, sticky=W)
+    return first_row + 1
 
 
 def draw_fundamental_data(stock):
@@ -484,24 +381,181 @@ def draw_fundamental_data(stock):
     continue_lbl.grid(row=4, column=0, columnspan=1, sticky=W)
 
 
+def draw_fundamental_summary(stock_list):
+    """
+    Cleans the root window,
+    Takes a list of stock objects as parameter
+    and creates one label per stock with its fundamental data points
+    """
+    remove_all_widgets(root)
+
+    for row_iteration, stock in enumerate(stock_list):
+        equity_ratio = round(stock.equity_ratio, 2)
+        pe_value = round(stock.pe_value, 2)
+        ps_value = round(stock.ps_value, 2)
+
+        stock_lbl = Label(root, text=f"{stock.company_name}: p/e {pe_value}, p/s {ps_value}, equity ratio {equity_ratio}")
+        stock_lbl.grid(row=row_iteration, column=0, columnspan=1, sticky=W)
+
+    continue_lbl = Button(root, text="Continue", command=create_main_menu)  # Continue button; return to main menu
+    continue_lbl.grid(row=len(stock_list), column=0, columnspan=1, sticky=W)
+
+
+class VirtualResultList:
+    """
+    A scrollable list of results that only has as many rows as are visible. Scrolling fills those rows
+    with the results that have come into view, so a list of thousands of stocks is drawn as fast as a short one.
+
+    Attributes:
+        visible_row_count (int): How many results are shown at a time.
+        result_count (int): How many results there are.
+        format_result (function): Returns the values shown for the result with a given number (from 0).
+        first_result (int): The number of the result in the top row.
+        item_list (list): The rows of the Treeview.
+        tree (ttk.Treeview): Shows the results.
+        scrollbar (ttk.Scrollbar): Shows and moves the part of the list that is visible.
+    """
+
+    def __init__(self, parent, column_list, visible_row_count=20):
+        """Creates the widgets in 'parent' with the columns 'column_list' ((name, heading, width) tuples)"""
+        self.visible_row_count = visible_row_count
+        self.result_count = 0
+        self.format_result = None
+        self.first_result = 0
+        self.item_list = []
+
+        self.tree = ttk.Treeview(parent, columns=[column for column, heading, width in column_list],
+                                 show='headings', height=visible_row_count)
+        for column, heading, width in column_list:
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor=W if column == 'name' else E)
+
+        self.scrollbar = ttk.Scrollbar(parent, orient=VERTICAL, command=self.scroll)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll('scroll', -1 if event.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda event: self.scroll('scroll', -1, 'units'))  # the mouse wheel on Linux
+        self.tree.bind('<Button-5>', lambda event: self.scroll('scroll', 1, 'units'))
+
+    def grid(self, row):
+        """Places the list and its scrollbar at the row 'row' of the parent"""
+        self.tree.grid(row=row, column=0, columnspan=1, sticky=W)
+        self.scrollbar.grid(row=row, column=1, sticky=N + S)
+
+    def show_results(self, result_count, format_result):
+        """Shows 'result_count' results, each formatted by 'format_result' only when it is scrolled into view"""
+        self.result_count = result_count
+        self.format_result = format_result
+        self.first_result = 0
+
+        row_count = min(result_count, self.visible_row_count)
+        while len(self.item_list) < row_count:
+            self.item_list.append(self.tree.insert('', END))
+        while len(self.item_list) > row_count:
+            self.tree.delete(self.item_list.pop())
+        self.fill_rows()
+
+    def fill_rows(self):
+        """Fills the rows with the results from 'first_result' on and moves the scrollbar to match"""
+        for offset, item in enumerate(self.item_list):
+            self.tree.item(item, values=self.format_result(self.first_result + offset))
+
+        if self.result_count:
+            self.scrollbar.set(self.first_result / self.result_count,
+                               (self.first_result + len(self.item_list)) / self.result_count)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll(self, action, amount, unit=None):
+        """Scrolls the list; called by the scrollbar ('moveto' a fraction, or 'scroll' a number of units or pages)"""
+        if action == 'moveto':
+            first_result = int(float(amount) * self.result_count)
+        elif unit == 'pages':
+            first_result = self.first_result + int(amount) * len(self.item_list)
+        else:
+            first_result = self.first_result + int(amount)
+
+        self.first_result = max(0, min(first_result, self.result_count - len(self.item_list)))
+        self.fill_rows()
+
+
+def format_metric(value, decimals):
+    """Formats a metric for a result list; a metric that hasn't been calculated is shown as '-'"""
+    if not isinstance(value, (int, float)) or math.isnan(value):
+        return "-"
+    return f"{value:.{decimals}f}"
+
+
 def draw_stock_ranking(sorted_stocks_by_beta):
     """
     Takes a list of sorted stocks objects by their beta value as parameter
-    Creates the widgets and displays the stocks sorted by their beta value procedurally
-    by how many stocks that have calculated a beta value
+    and displays them in a scrollable list, however many stocks have a beta value
     """
-    row_iteration = 0
     remove_all_widgets(root)
-    for rank, stock in enumerate(sorted_stocks_by_beta, start=1):
-        company_name = stock.company_name
-        beta_value = round(stock.beta_value, 3)
-        row_iteration = rank - 1
 
-        rank_lbl = Label(root, text=f"{rank}. {company_name} {beta_value}")
-        rank_lbl.grid(row=row_iteration, column=0, columnspan=1, sticky=W)
+    ranking_list = VirtualResultList(root, [('rank', "Rank", 50), ('name', "Company", 240), ('beta', "Beta", 80)])
+    ranking_list.show_results(len(sorted_stocks_by_beta), lambda number: (
+        number + 1, sorted_stocks_by_beta[number].company_name, format_metric(sorted_stocks_by_beta[number].beta_value, 3)))
+    ranking_list.grid(0)
+
+    back_button = Button(root, text="Back", command=create_main_menu)  # Go back button; return to main menu
+    back_button.grid(row=1, column=0, columnspan=1, sticky=W)
+
+
+def draw_screener():
+    """
+    Cleans the root window and shows the screener over every analysed stock: a filter
+    (f.e "beta > 1.2 and pe < 15 and equity_ratio > 0.4"), the sort keys, how many stocks to show at most,
+    and a scrollable list of the stocks that pass
+    """
+    remove_all_widgets(root)
+
+    def screen():
+        """Screens the analysed stocks with the entries and shows the stocks that pass"""
+        limit_text = limit_entry.get().strip()
+        if limit_text and not limit_text.isdigit():
+            draw_error_window("The number of stocks to show has to be a whole number")
+            return  # return nothing, get out of the function
+
+        try:
+            stock_list = screen_stocks(filter_entry.get().strip(), sort_entry.get(), int(limit_text) if limit_text else None)
+        except ValueError as e:
+            draw_error_window(e)
+            return  # return nothing, get out of the function
+
+        result_count_text.set(f"{len(stock_list)} of {len(stock_dict)} analysed stocks pass")
+        result_list.show_results(len(stock_list), lambda number: (
+            stock_list[number].symbol, stock_list[number].company_name,
+            format_metric(stock_list[number].beta_value, 3), format_metric(stock_list[number].pe_value, 2),
+            format_metric(stock_list[number].ps_value, 2), format_metric(stock_list[number].equity_ratio, 2)))
+
+    filter_lbl = Label(root, text="Filter, f.e beta > 1.2 and pe < 15 and equity_ratio > 0.4")
+    filter_lbl.grid(row=0, column=0, columnspan=1, sticky=W)
+    filter_entry = Entry(root, width=60)
+    filter_entry.grid(row=1, column=0, columnspan=1, sticky=W)
+
+    sort_lbl = Label(root, text="Sort by, f.e beta desc, pe")
+    sort_lbl.grid(row=2, column=0, columnspan=1, sticky=W)
+    sort_entry = Entry(root, width=60)
+    sort_entry.insert(0, "beta desc")
+    sort_entry.grid(row=3, column=0, columnspan=1, sticky=W)
+
+    limit_lbl = Label(root, text="Show at most (empty for every stock)")
+    limit_lbl.grid(row=4, column=0, columnspan=1, sticky=W)
+    limit_entry = Entry(root, width=10)
+    limit_entry.grid(row=5, column=0, columnspan=1, sticky=W)
+
+    screen_button = Button(root, text="Screen", command=screen)
+    screen_button.grid(row=6, column=0, columnspan=1, sticky=W)
+
+    result_count_text = StringVar(root, value="")
+    result_count_lbl = Label(root, textvariable=result_count_text)
+    result_count_lbl.grid(row=7, column=0, columnspan=1, sticky=W)
+
+    result_list = VirtualResultList(root, [('symbol', "Symbol", 70), ('name', "Company", 240), ('beta', "Beta", 70),
+                                           ('pe', "P/E", 70), ('ps', "P/S", 70), ('equity_ratio', "Equity ratio", 90)])
+    result_list.grid(8)
 
     back_button = Button(root, text="Back", command=create_main_menu)  # Go back button; return to main menu
-    back_button.grid(row=row_iteration + 1, column=0, columnspan=1, sticky=W)
+    back_button.grid(row=9, column=0, columnspan=1, sticky=W)
 
 
 def draw_error_window(show_error_message):
@@ -510,18 +564,22 @@ def draw_error_window(show_error_message):
     Creates a new window to display this error message
     as well creates a 'OK' button that closes the window
     """
-    error_window = Tk()
+    error_window = Toplevel(root)  # a child of the main window, so no second mainloop is needed
     error_window.title("Attention")
 
     error_lbl = Label(error_window, text=show_error_message)
     error_lbl.pack()
     ok_button = Button(error_window, text="OK", command=lambda: destroy_window(error_window))
     ok_button.pack()
-    error_window.mainloop()
 
 
-# root window
-root = Tk()
-root.title("Stock Analyser")
-create_main_menu()
-root.mainloop()
+if __name__ == '__main__':
+    # root window, only created when the program is started (not when it is imported f.e by batchAnalyser)
+    root = Tk()
+    root.title("Stock Analyser")
+    set_error_handler(queue_error_message)  # errors from the background worker are drawn by the main thread
+    instrumentation.start_from_environment()  # the Prometheus endpoint, if METRICS_PORT is set
+    sp500Constituents.refresh_in_background()  # the window is shown right away, even when offline
+    create_main_menu()
+    root.after(100, poll_ui_queue)
+    root.mainloop()
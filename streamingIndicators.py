@@ -0,0 +1,382 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import collections
+import math
+
+# Every indicator is fed one bar at a time with 'update' and keeps just enough state to give its value
+# without going through its window again, so adding a bar costs O(1) however long the window is.
+# 'revise' replaces the newest bar instead (f.e the session still in progress getting a new price every minute).
+# Until an indicator has seen enough bars its value is math.nan
+
+
+class RollingWindow:
+    """
+    The newest 'length' entries (tuples of numbers) and the running sum of each element of them.
+    The sums are added up again from the entries every 'length' removals,
+    so the rounding errors of adding and subtracting can't build up (still O(1) per entry on average).
+
+    Attributes:
+        length (int): How many entries the window holds.
+        entry_deque (collections.deque): The entries in the window, oldest first.
+        sums (list): The sum of each element over the entries in the window.
+        removed_entry (tuple): The entry the newest one pushed out of the window, None if it pushed out none.
+        removal_count (int): How many entries have left the window.
+    """
+
+    def __init__(self, length, width):
+        """Initializes an empty window of 'length' entries of 'width' numbers each"""
+        self.length = length
+        self.entry_deque = collections.deque()
+        self.sums = [0.0] * width
+        self.removed_entry = None
+        self.removal_count = 0
+
+    def add_to_sums(self, entry, sign):
+        """Adds (sign 1) or subtracts (sign -1) the entry from the sums"""
+        for position, value in enumerate(entry):
+            self.sums[position] += sign * value
+
+    def append(self, entry):
+        """Adds 'entry' as the newest entry, pushing out the oldest if the window is full"""
+        self.entry_deque.append(entry)
+        self.add_to_sums(entry, 1)
+        self.removed_entry = None
+
+        if len(self.entry_deque) > self.length:
+            self.removed_entry = self.entry_deque.popleft()
+            self.add_to_sums(self.removed_entry, -1)
+            self.removal_count += 1
+            if self.removal_count % self.length == 0:
+                self.sums = [math.fsum(values) for values in zip(*self.entry_deque)]
+
+    def replace_newest(self, entry):
+        """Replaces the newest entry with 'entry' (the entry it had pushed out comes back first)"""
+        self.add_to_sums(self.entry_deque.pop(), -1)
+        if self.removed_entry is not None:
+            self.entry_deque.appendleft(self.removed_entry)
+            self.add_to_sums(self.removed_entry, 1)
+        self.append(entry)
+
+    def is_full(self):
+        """Checks if the window holds 'length' entries"""
+        return len(self.entry_deque) == self.length
+
+
+class SimpleMovingAverage:
+    """The average of the last 'length' prices"""
+
+    def __init__(self, length):
+        """Initializes the average over 'length' prices"""
+        self.window = RollingWindow(length, 1)
+
+    def update(self, price):
+        """Adds the price of a new bar"""
+        self.window.append((price,))
+
+    def revise(self, price):
+        """Replaces the price of the newest bar"""
+        self.window.replace_newest((price,))
+
+    def value(self):
+        """Returns the average, or nan before 'length' prices"""
+        if not self.window.is_full():
+            return math.nan
+        return self.window.sums[0] / self.window.length
+
+
+class ExponentialMovingAverage:
+    """
+    The average of the prices where every older price weighs less, by the factor 2 / (length + 1) per bar.
+    It starts at the first price
+
+    Attributes:
+        smoothing (float): How much the newest price weighs.
+        average (float): The average including the newest bar.
+        previous_average (float): The average before the newest bar, so the newest bar can be revised.
+    """
+
+    def __init__(self, length):
+        """Initializes the average with the weight of a 'length' bar average"""
+        self.smoothing = 2 / (length + 1)
+        self.average = math.nan
+        self.previous_average = math.nan
+
+    def update(self, price):
+        """Adds the price of a new bar"""
+        self.previous_average = self.average
+        if math.isnan(self.average):
+            self.average = price
+        else:
+            self.average += self.smoothing * (price - self.average)
+
+    def revise(self, price):
+        """Replaces the price of the newest bar"""
+        self.average = self.previous_average
+        self.update(price)
+
+    def value(self):
+        """Returns the average, or nan before the first price"""
+        return self.average
+
+
+class RollingVolatility:
+    """
+    The annualised volatility of the last 'length' returns:
+    their standard deviation times the square root of the number of bars in a year ('periods_per_year')
+    """
+
+    def __init__(self, length, periods_per_year=252):
+        """Initializes the volatility over 'length' returns"""
+        self.window = RollingWindow(length, 2)  # (return, return * return)
+        self.periods_per_year = periods_per_year
+        self.last_price = None
+        self.previous_price = None
+
+    def update(self, price):
+        """Adds the price of a new bar"""
+        if self.last_price is not None:
+            price_return = price / self.last_price - 1
+            self.window.append((price_return, price_return * price_return))
+        self.previous_price = self.last_price
+        self.last_price = price
+
+    def revise(self, price):
+        """Replaces the price of the newest bar"""
+        if self.previous_price is None:
+            self.last_price = price  # the first bar has no return yet
+            return
+        price_return = price / self.previous_price - 1
+        self.window.replace_newest((price_return, price_return * price_return))
+        self.last_price = price
+
+    def value(self):
+        """Returns the volatility, or nan before 'length' returns"""
+        if not self.window.is_full():
+            return math.nan
+
+        count = self.window.length
+        return_sum, square_sum = self.window.sums
+        variance = max(0.0, (square_sum - return_sum * return_sum / count) / (count - 1))
+        return math.sqrt(variance * self.periods_per_year)
+
+
+class RelativeStrengthIndex:
+    """
+    Wilder's relative strength index (0 to 100) over 'length' bars: the average gain compared to the average loss,
+    where each new change weighs 1 / length (the first averages are the plain averages of the first 'length' changes)
+
+    Attributes:
+        length (int): The number of bars the averages are over.
+        change_count (int): How many price changes have been seen.
+        average_gain (float): The average gain per bar.
+        average_loss (float): The average loss per bar (a positive number).
+        last_price (float): The price of the newest bar.
+        previous_state (tuple): The state before the newest bar, so the newest bar can be revised.
+    """
+
+    def __init__(self, length=14):
+        """Initializes the index over 'length' bars"""
+        self.length = length
+        self.change_count = 0
+        self.average_gain = 0.0
+        self.average_loss = 0.0
+        self.last_price = None
+        self.previous_state = (0, 0.0, 0.0, None)
+
+    def update(self, price):
+        """Adds the price of a new bar"""
+        self.previous_state = (self.change_count, self.average_gain, self.average_loss, self.last_price)
+        if self.last_price is not None:
+            change = price - self.last_price
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            self.change_count += 1
+
+            if self.change_count <= self.length:  # the plain average of the first changes
+                self.average_gain += (gain - self.average_gain) / self.change_count
+                self.average_loss += (loss - self.average_loss) / self.change_count
+            else:
+                self.average_gain += (gain - self.average_gain) / self.length
+                self.average_loss += (loss - self.average_loss) / self.length
+        self.last_price = price
+
+    def revise(self, price):
+        """Replaces the price of the newest bar"""
+        self.change_count, self.average_gain, self.average_loss, self.last_price = self.previous_state
+        self.update(price)
+
+    def value(self):
+        """Returns the index, or nan before 'length' price changes"""
+        if self.change_count < self.length:
+            return math.nan
+        if self.average_loss == 0:
+            return 100.0 if self.average_gain > 0 else 50.0
+        return 100 - 100 / (1 + self.average_gain / self.average_loss)
+
+
+class MaxDrawdown:
+    """
+    The largest fall from a peak to a later price seen so far, as a fraction of the peak (0.25 is a 25% fall),
+    and the fall of the newest price from the peak before it
+
+    Attributes:
+        peak_price (float): The highest price so far.
+        max_drawdown (float): The largest fall so far.
+        current_drawdown (float): The fall of the newest price from the peak.
+        previous_state (tuple): The state before the newest bar, so the newest bar can be revised.
+    """
+
+    def __init__(self):
+        """Initializes the drawdown before any price"""
+        self.peak_price = math.nan
+        self.max_drawdown = math.nan
+        self.current_drawdown = math.nan
+        self.previous_state = (math.nan, math.nan, math.nan)
+
+    def update(self, price):
+        """Adds the price of a new bar"""
+        self.previous_state = (self.peak_price, self.max_drawdown, self.current_drawdown)
+        if math.isnan(self.peak_price) or price > self.peak_price:
+            self.peak_price = price
+
+        self.current_drawdown = 1 - price / self.peak_price
+        if math.isnan(self.max_drawdown) or self.current_drawdown > self.max_drawdown:
+            self.max_drawdown = self.current_drawdown
+
+    def revise(self, price):
+        """Replaces the price of the newest bar"""
+        self.peak_price, self.max_drawdown, self.current_drawdown = self.previous_state
+        self.update(price)
+
+    def value(self):
+        """Returns the largest fall so far, or nan before the first price"""
+        return self.max_drawdown
+
+
+class RollingRegression:
+    """
+    The beta value and the correlation of the stock's returns against the index's over the last 'length' bars.
+    A bar where either price is missing doesn't count (and the next bar's return starts from the bar before it)
+    """
+
+    def __init__(self, length):
+        """Initializes the regression over 'length' returns"""
+        # (stock, index, stock * index, index * index, stock * stock)
+        self.window = RollingWindow(length, 5)
+        self.last_prices = None
+        self.previous_prices = None
+        self.newest_bar_counted = False  # False if the newest bar was skipped (no index price), so it has no entry
+
+    def get_entry(self, price, index_price, from_prices):
+        """Returns the window entry for the returns from 'from_prices' to this bar"""
+        stock_return = price / from_prices[0] - 1
+        index_return = index_price / from_prices[1] - 1
+        return (stock_return, index_return, stock_return * index_return, index_return * index_return,
+                stock_return * stock_return)
+
+    def update(self, price, index_price):
+        """Adds the prices of the stock and the index in a new bar"""
+        if index_price is None or math.isnan(index_price):
+            self.newest_bar_counted = False
+            return  # the bar doesn't count
+
+        if self.last_prices is not None:
+            self.window.append(self.get_entry(price, index_price, self.last_prices))
+        self.previous_prices = self.last_prices
+        self.last_prices = (price, index_price)
+        self.newest_bar_counted = True
+
+    def revise(self, price, index_price):
+        """
+        Replaces the prices of the newest bar. A newest bar that was skipped (f.e a live bar fed before the
+        index had a price that session) is added now instead, so the return before it is left as it is
+        """
+        if index_price is None or math.isnan(index_price):
+            return  # the bar doesn't count
+        if not self.newest_bar_counted:
+            self.update(price, index_price)
+            return
+        if self.previous_prices is None:
+            self.last_prices = (price, index_price)  # the first bar has no return yet
+            return
+
+        self.window.replace_newest(self.get_entry(price, index_price, self.previous_prices))
+        self.last_prices = (price, index_price)
+
+    def co_moments(self):
+        """Returns (covariance, index variance, stock variance) times (count - 1), or None before 'length' returns"""
+        if not self.window.is_full():
+            return None
+
+        count = self.window.length
+        stock_sum, index_sum, product_sum, index_square_sum, stock_square_sum = self.window.sums
+        return (product_sum - stock_sum * index_sum / count,
+                index_square_sum - index_sum * index_sum / count,
+                stock_square_sum - stock_sum * stock_sum / count)
+
+    def beta_value(self):
+        """Returns the beta value (covariance divided by the index's variance), or nan"""
+        co_moments = self.co_moments()
+        if co_moments is None or co_moments[1] <= 0:
+            return math.nan
+        return co_moments[0] / co_moments[1]
+
+    def correlation(self):
+        """Returns the correlation of the returns (-1 to 1), or nan"""
+        co_moments = self.co_moments()
+        if co_moments is None or co_moments[1] <= 0 or co_moments[2] <= 0:
+            return math.nan
+        return co_moments[0] / math.sqrt(co_moments[1] * co_moments[2])
+
+
+class IndicatorSet:
+    """
+    Every indicator of one stock, fed together with the stock's and the index's (SPY) price of each bar.
+
+    Attributes:
+        symbol (str): The ticker symbol of the stock.
+        last_date (datetime.date): The trading day of the newest bar fed, None before the first.
+        newest_bar_closed (bool): False while the newest bar is a session still in progress (it will be revised).
+        indicator_dict (dict): Name of the indicator (f.e 'sma_20') -> the indicator, fed with the stock's price.
+        regression_length (int): The number of returns the beta value and correlation are over.
+        regression (RollingRegression): The rolling beta value and correlation against the index.
+    """
+
+    def __init__(self, symbol, regression_length=63):
+        """Initializes the indicators of 'symbol'; the beta value and correlation are over 'regression_length' bars"""
+        self.symbol = symbol
+        self.last_date = None
+        self.newest_bar_closed = True
+        self.indicator_dict = {
+            'sma_20': SimpleMovingAverage(20),
+            'sma_50': SimpleMovingAverage(50),
+            'ema_12': ExponentialMovingAverage(12),
+            'ema_26': ExponentialMovingAverage(26),
+            'volatility_21': RollingVolatility(21),
+            'rsi_14': RelativeStrengthIndex(14),
+            'max_drawdown': MaxDrawdown(),
+        }
+        self.regression_length = regression_length
+        self.regression = RollingRegression(regression_length)
+
+    def update(self, date, price, index_price=None, closed=True):
+        """Adds the bar of the trading day 'date' (newer than the newest bar); 'closed' is False for a live session"""
+        for indicator in self.indicator_dict.values():
+            indicator.update(price)
+        self.regression.update(price, index_price)
+        self.last_date = date
+        self.newest_bar_closed = closed
+
+    def revise(self, price, index_price=None, closed=False):
+        """Replaces the prices of the newest bar (f.e with the latest price of the session in progress)"""
+        for indicator in self.indicator_dict.values():
+            indicator.revise(price)
+        self.regression.revise(price, index_price)
+        self.newest_bar_closed = closed
+
+    def values(self):
+        """Returns the value of every indicator: name -> value"""
+        value_dict = {name: indicator.value() for name, indicator in self.indicator_dict.items()}
+        value_dict[f"beta_{self.regression_length}"] = self.regression.beta_value()
+        value_dict[f"correlation_{self.regression_length}"] = self.regression.correlation()
+        return value_dict
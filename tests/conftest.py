@@ -0,0 +1,55 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import os
+import sys
+
+# The modules are at the top of the repository, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mockPolygonServer  # noqa: E402
+import polygonClient  # noqa: E402
+import priceStore  # noqa: E402
+import pytest  # noqa: E402
+import rateLimiter  # noqa: E402
+
+
+@pytest.fixture
+def empty_store(tmp_path, monkeypatch):
+    """Points the price store at an empty folder for one test"""
+    monkeypatch.setattr(priceStore, 'PRICE_STORE_PATH', str(tmp_path / 'price_store'))
+    monkeypatch.setattr(priceStore, 'loaded_partitions', {})
+    monkeypatch.setattr(priceStore, 'symbol_list', None)
+    monkeypatch.setattr(priceStore, 'symbol_row_dict', {})
+
+
+@pytest.fixture
+def fresh_client(monkeypatch):
+    """An API client with empty session caches, no disk cache and a rate limit that never makes a test wait"""
+    monkeypatch.setattr(polygonClient, 'session_responses', {})
+    monkeypatch.setattr(polygonClient, 'in_flight_requests', {})
+    monkeypatch.setattr(polygonClient, 'DISK_CACHE_ENABLED', False)
+    monkeypatch.setattr(rateLimiter, 'rate_limiter', rateLimiter.TokenBucket(1000, 1))
+    return polygonClient
+
+
+@pytest.fixture
+def mock_api(fresh_client, monkeypatch):
+    """
+    Starts a mock server with made-up data and points the client at it.
+    Returns a function starting another one with the given recordings (and pointing the client at that one)
+    """
+    server_list = []
+
+    def start_mock(recording_dict=None):
+        mock = mockPolygonServer.MockPolygon(recording_dict or {}, mockPolygonServer.read_universe(None))
+        server, base_url = mockPolygonServer.start_in_background(mock)
+        server_list.append(server)
+        monkeypatch.setattr(polygonClient, 'POLYGON_URL', base_url)
+        return mock
+
+    start_mock()
+    yield start_mock
+    for server in server_list:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,107 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import datetime
+import fundamentalStore
+import metricEngine
+import numpy
+import pytest
+
+QUARTER_ENDS = ['2024-03-31', '2024-06-30', '2024-09-30', '2024-12-31', '2025-03-31', '2025-06-30']
+
+
+def ordinals(date_text_list):
+    """Returns the date ordinals of the ISO dates in 'date_text_list'"""
+    return numpy.array([datetime.date.fromisoformat(date_text).toordinal() for date_text in date_text_list])
+
+
+def make_result(fiscal_year, fiscal_period, end_date, eps, revenue, filing_date=None):
+    """Returns one report the way the financials endpoint answers it"""
+    return {
+        'fiscal_year': fiscal_year,
+        'fiscal_period': fiscal_period,
+        'end_date': end_date,
+        'filing_date': filing_date,
+        'financials': {
+            'income_statement': {'basic_earnings_per_share': {'value': eps}, 'revenues': {'value': revenue},
+                                 'basic_average_shares': {'value': 1000}},
+            'balance_sheet': {'assets': {'value': 500}, 'equity': {'value': 200}},
+        },
+    }
+
+
+def test_trailing_sums():
+    """Each quarter is summed with the three before it; too few quarters, a gap or a missing value gives nan"""
+    trailing_sums = metricEngine.calculate_trailing_sums(ordinals(QUARTER_ENDS), [1, 2, 3, 4, 5, 6])
+    assert trailing_sums == pytest.approx([numpy.nan, numpy.nan, numpy.nan, 10, 14, 18], nan_ok=True)
+
+    with_gap = QUARTER_ENDS[:2] + ['2024-12-31', '2025-03-31', '2025-06-30', '2025-09-30']  # 2024-09-30 is missing
+    assert metricEngine.calculate_trailing_sums(ordinals(with_gap), [1, 2, 3, 4, 5, 6]) == pytest.approx(
+        [numpy.nan] * 5 + [18], nan_ok=True)  # only the last four quarters follow one another
+
+    with_missing_value = metricEngine.calculate_trailing_sums(ordinals(QUARTER_ENDS), [1, numpy.nan, 3, 4, 5, 6])
+    assert with_missing_value == pytest.approx([numpy.nan] * 5 + [18], nan_ok=True)
+    assert numpy.isnan(metricEngine.calculate_trailing_sums(ordinals(QUARTER_ENDS[:3]), [1, 2, 3])).all()
+
+
+def test_as_of_values():
+    """Each day gets the latest value known on it; nan before the first one is known"""
+    known_ordinals = ordinals(['2024-05-01', '2024-08-01'])
+    date_ordinals = ordinals(['2024-04-30', '2024-05-01', '2024-07-31', '2024-08-02'])
+    assert metricEngine.as_of_values(known_ordinals, [1.5, 2.5], date_ordinals) == pytest.approx(
+        [numpy.nan, 1.5, 1.5, 2.5], nan_ok=True)
+    assert numpy.isnan(metricEngine.as_of_values([], [], date_ordinals)).all()
+
+
+def test_fourth_quarter_is_made_from_the_annual_report():
+    """A year with three quarterly reports and an annual one gets its fourth quarter as the difference"""
+    report_list = [fundamentalStore.extract_report(result) for result in [
+        make_result(2024, 'Q1', '2024-03-31', 1.0, 100),
+        make_result(2024, 'Q2', '2024-06-30', 1.5, 110),
+        make_result(2024, 'Q3', '2024-09-30', 0.5, 90),
+        make_result(2024, 'FY', '2024-12-31', 4.0, 420),
+        make_result(2025, 'Q1', '2025-03-31', 1.2, 105),
+        make_result(2025, 'FY', '2025-12-31', 5.0, 450),  # no Q2 and Q3 of 2025, so no Q4 can be made
+    ]]
+
+    quarter_list = fundamentalStore.get_quarterly_reports(report_list)
+    assert [(report['fiscal_year'], report['fiscal_period']) for report in quarter_list] == [
+        (2024, 'Q1'), (2024, 'Q2'), (2024, 'Q3'), (2024, 'Q4'), (2025, 'Q1')]
+    fourth_quarter = quarter_list[3]
+    assert fourth_quarter['eps'] == pytest.approx(1.0)
+    assert fourth_quarter['revenue'] == 120
+    assert fourth_quarter['start_date'] == '2024-10-01'
+    assert fourth_quarter['equity'] == 200  # the balance sheet at the end of the year
+
+
+def test_filed_fourth_quarter_is_kept():
+    """A fourth quarter report that was filed is used as it is, not made from the annual report"""
+    report_list = [fundamentalStore.extract_report(result) for result in [
+        make_result(2024, 'Q1', '2024-03-31', 1.0, 100),
+        make_result(2024, 'Q2', '2024-06-30', 1.5, 110),
+        make_result(2024, 'Q3', '2024-09-30', 0.5, 90),
+        make_result(2024, 'Q4', '2024-12-31', 0.9, 118),
+        make_result(2024, 'FY', '2024-12-31', 4.0, 420),
+    ]]
+    assert fundamentalStore.get_quarterly_reports(report_list)[-1]['eps'] == 0.9
+
+
+def test_fundamental_series_from_stored_reports(tmp_path, monkeypatch):
+    """The stored reports give the trailing twelve months EPS in the order the reports were filed"""
+    monkeypatch.setattr(fundamentalStore, 'FUNDAMENTAL_STORE_PATH', str(tmp_path))
+    monkeypatch.setattr(fundamentalStore, 'loaded_reports', {})
+    fundamentalStore.store_financials('AAA', [
+        make_result(2024, 'Q1', '2024-03-31', 1.0, 100, '2024-05-01'),
+        make_result(2024, 'Q2', '2024-06-30', 1.5, 110, '2024-08-01'),
+        make_result(2024, 'Q3', '2024-09-30', 0.5, 90, '2024-11-01'),
+        make_result(2024, 'FY', '2024-12-31', 4.0, 420, '2025-02-15'),
+        make_result(2025, 'Q1', '2025-03-31', 1.2, 105, '2025-05-01'),
+    ])
+    fundamentalStore.store_financials('AAA', [make_result(2025, 'Q1', '2025-03-31', 1.4, 105, '2025-05-01')])
+
+    fundamentalStore.loaded_reports.clear()  # read back from the file
+    series_dict = fundamentalStore.get_fundamental_series('AAA')
+    assert list(series_dict['known']) == list(ordinals(['2024-05-01', '2024-08-01', '2024-11-01', '2025-02-15',
+                                                        '2025-05-01']))
+    assert series_dict['ttm_eps'] == pytest.approx([numpy.nan, numpy.nan, numpy.nan, 4.0, 4.4], nan_ok=True)
+    assert series_dict['equity_ratio'] == pytest.approx([0.4] * 5)
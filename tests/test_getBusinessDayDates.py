@@ -0,0 +1,66 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import datetime
+import getBusinessDayDates
+import pytest
+import types
+
+date = datetime.date
+
+
+def test_holidays_and_weekends_are_no_sessions():
+    """The NYSE holidays and the weekends are left out of the calendar, the days around them are in it"""
+    assert not getBusinessDayDates.is_business_day(date(2025, 1, 1))  # New Year's Day
+    assert not getBusinessDayDates.is_business_day(date(2025, 4, 18))  # Good Friday
+    assert not getBusinessDayDates.is_business_day(date(2025, 7, 4))  # Independence Day
+    assert not getBusinessDayDates.is_business_day(date(2025, 12, 27))  # Saturday
+    assert getBusinessDayDates.is_business_day(date(2025, 7, 3))
+    assert getBusinessDayDates.business_days_between(date(2025, 12, 22), date(2025, 12, 31)) == [
+        date(2025, 12, 22), date(2025, 12, 23), date(2025, 12, 24), date(2025, 12, 26),
+        date(2025, 12, 29), date(2025, 12, 30), date(2025, 12, 31)]
+    assert getBusinessDayDates.sessions_between(date(2025, 12, 22), date(2025, 12, 31)) == 7
+
+
+def test_session_arithmetic_skips_the_days_without_a_session():
+    """Counting sessions back and forward steps over the weekends and the holidays"""
+    assert getBusinessDayDates.next_business_day(date(2025, 7, 3)) == date(2025, 7, 7)
+    assert getBusinessDayDates.previous_business_day(date(2025, 1, 2)) == date(2024, 12, 31)
+    assert getBusinessDayDates.previous_session(date(2025, 12, 25), include_date=True) == date(2025, 12, 24)
+    assert getBusinessDayDates.sessions_back(date(2025, 1, 6), 1) == date(2025, 1, 3)
+    assert getBusinessDayDates.sessions_back(date(2025, 12, 27), 2) == date(2025, 12, 23)
+
+    # a lookback further back than the calendar's first year grows it
+    assert getBusinessDayDates.sessions_back(date(2000, 1, 4), 1) == date(2000, 1, 3)
+    assert getBusinessDayDates.sessions_back(date(2000, 1, 3), 1) == date(1999, 12, 31)
+
+
+def test_half_days_close_early():
+    """The day before Independence Day, the day after Thanksgiving and Christmas Eve close at 13:00"""
+    for half_day in [date(2025, 7, 3), date(2025, 11, 28), date(2025, 12, 24)]:
+        assert getBusinessDayDates.is_half_day(half_day)
+        assert getBusinessDayDates.session_close_time(half_day) == getBusinessDayDates.EARLY_CLOSE_TIME
+    assert not getBusinessDayDates.is_half_day(date(2025, 11, 27))  # Thanksgiving, no session at all
+    assert getBusinessDayDates.session_close_time(date(2025, 12, 23)) == getBusinessDayDates.REGULAR_CLOSE_TIME
+
+
+@pytest.mark.skipif(getBusinessDayDates.NEW_YORK_TIME_ZONE is None, reason="no time zone data")
+@pytest.mark.parametrize('new_york_time, expected_date', [
+    (datetime.datetime(2025, 12, 23, 15, 59), date(2025, 12, 22)),  # a regular session still open
+    (datetime.datetime(2025, 12, 23, 16, 0), date(2025, 12, 23)),
+    (datetime.datetime(2025, 12, 24, 12, 0), date(2025, 12, 23)),  # a half-day still open
+    (datetime.datetime(2025, 12, 24, 13, 30), date(2025, 12, 24)),  # a half-day closed at 13:00
+    (datetime.datetime(2025, 12, 25, 12, 0), date(2025, 12, 24)),  # a holiday
+    (datetime.datetime(2025, 12, 27, 9, 0), date(2025, 12, 26)),  # a Saturday
+])
+def test_last_closed_business_day(monkeypatch, new_york_time, expected_date):
+    """Today's session counts as closed once its closing time has passed in New York"""
+    class FrozenDatetime(datetime.datetime):
+        @classmethod
+        def now(cls, time_zone=None):
+            return new_york_time.replace(tzinfo=getBusinessDayDates.NEW_YORK_TIME_ZONE).astimezone(time_zone)
+
+    # only the module's own 'datetime' is replaced; the holidays library keeps the real one
+    monkeypatch.setattr(getBusinessDayDates, 'datetime', types.SimpleNamespace(
+        date=datetime.date, time=datetime.time, timedelta=datetime.timedelta, datetime=FrozenDatetime))
+    assert getBusinessDayDates.last_closed_business_day() == expected_date
@@ -0,0 +1,70 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import polygonClient
+import responseCache
+import threading
+import time
+
+TICKER_PATH = '/v3/reference/tickers/AAA'
+
+
+def test_disk_cache_expires(tmp_path, monkeypatch):
+    """A stored response is found until its time to live has passed; one stored without a time to live never expires"""
+    monkeypatch.setattr(responseCache, 'CACHE_PATH', str(tmp_path / 'cache.sqlite3'))
+    monkeypatch.setattr(responseCache, 'cache_connection', None)
+    responseCache.store('short', {'results': [1]}, 0.1)
+    responseCache.store('forever', {'results': [2]}, None)
+    assert responseCache.load('short') == {'results': [1]}
+    assert responseCache.load('missing') is None
+
+    time.sleep(0.15)
+    assert responseCache.load('short') is None
+    assert responseCache.load('forever') == {'results': [2]}
+    responseCache.get_connection().close()
+
+
+def test_disk_cache_is_used_by_the_next_run(mock_api, tmp_path, monkeypatch):
+    """A response stored on disk is read by a run with an empty session cache, without a request"""
+    mock = mock_api()
+    monkeypatch.setattr(responseCache, 'CACHE_PATH', str(tmp_path / 'cache.sqlite3'))
+    monkeypatch.setattr(responseCache, 'cache_connection', None)
+    monkeypatch.setattr(polygonClient, 'DISK_CACHE_ENABLED', True)
+    data = polygonClient.get_ticker_details('AAA').json()
+
+    polygonClient.session_responses.clear()  # the next run
+    assert polygonClient.get_ticker_details('AAA').json() == data
+    assert mock.get_stats()['requests'] == 1
+    responseCache.get_connection().close()
+
+
+def test_session_response_expires(mock_api):
+    """A response is shared within the run until its time to live has passed, then it is requested again"""
+    mock = mock_api()
+    polygonClient.get(TICKER_PATH, time_to_live=0.1)
+    polygonClient.get(TICKER_PATH, time_to_live=0.1)
+    assert mock.get_stats()['requests'] == 1
+
+    time.sleep(0.15)
+    polygonClient.get(TICKER_PATH, time_to_live=0.1)
+    assert mock.get_stats()['requests'] == 2
+
+
+def test_concurrent_callers_share_one_request(mock_api):
+    """Callers asking for a request that is already being made wait for it instead of sending it again"""
+    mock = mock_api()
+    mock.latency = 0.2  # the first request is still on its way when the others ask
+    data_list = []
+
+    def get_details():
+        data_list.append(polygonClient.get(TICKER_PATH).json())
+
+    thread_list = [threading.Thread(target=get_details) for caller in range(5)]
+    for thread in thread_list:
+        thread.start()
+    for thread in thread_list:
+        thread.join()
+
+    assert mock.get_stats()['requests'] == 1
+    assert len(data_list) == 5 and all(data == data_list[0] for data in data_list)
+    assert not polygonClient.in_flight_requests
@@ -0,0 +1,31 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import datetime
+import numpy
+import priceStore
+
+
+def store_closing_prices(date, symbol_list, price):
+    """Stores the same price in every field for every symbol in 'symbol_list' on 'date'"""
+    prices = numpy.full(len(symbol_list), price, dtype=priceStore.PRICE_DTYPE)
+    priceStore.store_day(date, symbol_list, {field: prices for field in priceStore.PRICE_FIELDS})
+
+
+def test_price_matrix_spans_a_year_with_fewer_rows(empty_store):
+    """The symbols added after a year was stored have no rows in it; a read over both years still works"""
+    new_symbol_list = [f"S{number:04d}" for number in range(priceStore.SYMBOL_ROW_STEP + 77)]
+    store_closing_prices(datetime.date(2024, 12, 31), ['OLD'], 10.0)
+    store_closing_prices(datetime.date(2025, 1, 2), ['OLD'] + new_symbol_list, 20.0)
+
+    date_list, price_matrix = priceStore.get_price_matrix(None, datetime.date(2024, 12, 1), datetime.date(2025, 1, 10))
+    assert date_list == [datetime.date(2024, 12, 31), datetime.date(2025, 1, 2)]
+    assert price_matrix.shape == (len(new_symbol_list) + 1, 2)
+    assert price_matrix[0].tolist() == [10.0, 20.0]
+    assert numpy.isnan(price_matrix[-1, 0]) and price_matrix[-1, 1] == 20.0
+
+    date_list, price_matrix = priceStore.get_price_matrix([new_symbol_list[-1], 'OLD', 'UNKNOWN'],
+                                                          datetime.date(2024, 12, 1), datetime.date(2025, 1, 10))
+    assert numpy.isnan(price_matrix[0, 0]) and price_matrix[0, 1] == 20.0
+    assert price_matrix[1].tolist() == [10.0, 20.0]
+    assert numpy.isnan(price_matrix[2]).all()
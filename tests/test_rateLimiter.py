@@ -0,0 +1,67 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import pytest
+import rateLimiter
+import threading
+import time
+
+PERIOD = 0.2  # seconds; short so the tests don't wait long
+
+
+def test_no_period_sees_more_than_the_capacity():
+    """The first 'capacity' requests go through at once, the next one waits for the first token to come back"""
+    bucket = rateLimiter.TokenBucket(3, PERIOD)
+    started_at = time.monotonic()
+    assert [bucket.acquire() for request in range(3)] == pytest.approx([0, 0, 0], abs=0.05)
+    assert bucket.available_tokens() == 0
+
+    bucket.acquire()
+    assert time.monotonic() - started_at >= PERIOD
+
+
+def test_waiting_callers_are_released_in_order():
+    """The callers that find the bucket empty get their tokens in the order they asked for them"""
+    bucket = rateLimiter.TokenBucket(1, PERIOD / 4)
+    bucket.acquire()
+    order_list = []
+
+    def take_token(number):
+        bucket.acquire()
+        order_list.append(number)
+
+    thread_list = []
+    for number in range(4):
+        thread = threading.Thread(target=take_token, args=(number,))
+        thread.start()
+        thread_list.append(thread)
+        while bucket.queue_depth() < number + 1 and thread.is_alive():  # in line before the next one starts
+            time.sleep(0.001)
+    for thread in thread_list:
+        thread.join()
+    assert order_list == [0, 1, 2, 3]
+
+
+def test_expected_wait():
+    """A free token means no wait; an empty bucket means a wait until its oldest token is back"""
+    bucket = rateLimiter.TokenBucket(2, PERIOD)
+    assert bucket.expected_wait() == 0.0
+
+    bucket.acquire()
+    assert bucket.expected_wait() == 0.0
+    bucket.acquire()
+    assert 0 < bucket.expected_wait() <= PERIOD
+
+    bucket.drain()
+    assert bucket.expected_wait() == pytest.approx(PERIOD, abs=0.05)
+
+
+def test_plan_limits():
+    """Every plan gets its own limit, and a plan that doesn't exist is refused with the valid ones named"""
+    free_bucket = rateLimiter.create_rate_limiter('basic')
+    assert (free_bucket.capacity, free_bucket.period) == (5, 60)
+    paid_bucket = rateLimiter.create_rate_limiter('advanced')
+    assert (paid_bucket.capacity, paid_bucket.period) == (100, 1)
+
+    with pytest.raises(ValueError, match='basic'):
+        rateLimiter.create_rate_limiter('basik')
@@ -0,0 +1,38 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import datetime
+import json
+import os
+import polygonClient
+import responseCache
+import responseRecorder
+
+
+def test_cache_key_matches_the_parameters_as_sent():
+    """The client's typed parameters and the text the mock server reads from the URL give the same key"""
+    typed_params = {'ticker': 'AAA', 'limit': 1, 'adjusted': True, 'date': datetime.date(2025, 1, 2)}
+    text_params = {'ticker': 'AAA', 'limit': '1', 'adjusted': 'True', 'date': '2025-01-02'}
+    assert responseCache.make_cache_key('/path', typed_params) == responseCache.make_cache_key('/path', text_params)
+
+
+def test_recorded_responses_are_replayed_by_the_mock_server(mock_api, tmp_path, monkeypatch):
+    """Responses recorded from one server are answered by a mock server replaying them, parameters of any type"""
+    monkeypatch.setattr(responseRecorder, 'RECORD_PATH', str(tmp_path))
+    assert polygonClient.get_financials('AAA').status_code == 200  # 'limit': 1
+    assert polygonClient.get_financial_history('AAA').status_code == 200  # 'limit': 100
+
+    for recording_path in os.listdir(tmp_path):  # marks every recording, so a replay can be told from made-up data
+        with open(tmp_path / recording_path) as recording_file:
+            recording = json.load(recording_file)
+        recording['data']['results'][0]['company_name'] = 'Recorded Inc.'
+        with open(tmp_path / recording_path, 'w') as recording_file:
+            json.dump(recording, recording_file)
+
+    monkeypatch.setattr(responseRecorder, 'RECORD_PATH', None)
+    replaying_mock = mock_api(responseRecorder.load_recordings(str(tmp_path)))
+    monkeypatch.setattr(polygonClient, 'session_responses', {})
+
+    assert polygonClient.get_financials('AAA').json()['results'][0]['company_name'] == 'Recorded Inc.'
+    assert polygonClient.get_financial_history('AAA').json()['results'][0]['company_name'] == 'Recorded Inc.'
+    assert replaying_mock.get_stats()['requests'] == 2
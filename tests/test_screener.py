@@ -0,0 +1,92 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import math
+import numpy
+import pytest
+import screener
+
+random_generator = numpy.random.default_rng(3)
+SYMBOLS = [f"S{number:03d}" for number in range(300)]
+
+
+def make_table(indexed_column_list=('beta_value',)):
+    """Returns a table of made-up metrics, a few missing, and the same metrics as a dictionary per symbol"""
+    table = screener.MetricTable(list(indexed_column_list))
+    value_dict = {}
+    for symbol in SYMBOLS:
+        values = {'beta_value': float(random_generator.normal(1, 0.5)),
+                  'pe_value': float(random_generator.uniform(5, 40)),
+                  'equity_ratio': float(random_generator.uniform(0, 1))}
+        if random_generator.random() < 0.1:
+            values['pe_value'] = None  # f.e the fundamental analysis failed
+        table.update(symbol, values)
+        value_dict[symbol] = {name: math.nan if value is None else value for name, value in values.items()}
+    return table, value_dict
+
+
+def test_sorted_index_stays_in_order():
+    """Inserting and removing values keeps the rows ordered by value, missing values left out"""
+    index = screener.SortedIndex(numpy.array([3.0, numpy.nan, 1.0, 2.0]))
+    assert list(index.iterate_rows()) == [2, 3, 0]
+    index.insert(2.0, 4)
+    index.remove(3.0, 0)
+    index.insert(math.nan, 5)
+    assert list(index.iterate_rows(descending=True)) == [4, 3, 2]
+
+
+def test_query_matches_brute_force():
+    """Filtering and sorting on one or more keys, with and without a limit, gives what sorting every row gives"""
+    table, value_dict = make_table()
+    passing = [symbol for symbol, values in value_dict.items()
+               if values['beta_value'] > 1 and values['pe_value'] < 20 or values['equity_ratio'] > 0.9]
+
+    by_beta = sorted(passing, key=lambda symbol: -value_dict[symbol]['beta_value'])
+    assert table.query("beta > 1 and pe < 20 or equity_ratio > 0.9") == by_beta
+    assert table.query("beta > 1 and pe < 20 or equity_ratio > 0.9", limit=7) == by_beta[:7]
+
+    ranked = [symbol for symbol in passing if not math.isnan(value_dict[symbol]['pe_value'])]
+    by_pe_then_beta = sorted(ranked, key=lambda symbol: (value_dict[symbol]['pe_value'],
+                                                         -value_dict[symbol]['beta_value']))
+    sort_key_list = screener.parse_sort_keys("pe, beta desc", table)
+    assert table.query("beta > 1 and pe < 20 or equity_ratio > 0.9", sort_key_list) == by_pe_then_beta
+    assert table.query("beta > 1 and pe < 20 or equity_ratio > 0.9", sort_key_list, 5) == by_pe_then_beta[:5]
+
+
+def test_ranking_follows_updates():
+    """A changed value moves the symbol in the ranking without sorting again"""
+    table, value_dict = make_table()
+    table.update(SYMBOLS[0], {'beta_value': 99.0})
+    table.update(SYMBOLS[1], {'beta_value': None})
+    assert table.query(limit=1) == [SYMBOLS[0]]
+    assert SYMBOLS[1] not in table.query()
+
+
+def test_limit_of_zero_returns_nothing():
+    """A limit of 0 gives no symbols on the sorted index and on several sort keys alike"""
+    table, value_dict = make_table()
+    assert table.query(limit=0) == []
+    assert table.query(sort_key_list=[('beta_value', True), ('pe_value', False)], limit=0) == []
+
+
+def test_filter_parsing():
+    """Chained comparisons, 'not' and negative numbers work; anything else is refused"""
+    table, value_dict = make_table()
+    expected = {symbol for symbol, values in value_dict.items() if not -0.5 < values['beta_value'] <= 1}
+    assert set(table.query("not -0.5 < beta <= 1")) == expected
+
+    for filter_text in ["beta >", "beta + 1 > 2", "__import__('os')", "beta in [1]", "beta"]:
+        with pytest.raises(ValueError):
+            table.query(filter_text)
+
+
+def test_unknown_metric_names_are_refused():
+    """A misspelt metric in a filter or a sort key raises a ValueError instead of matching nothing"""
+    table, value_dict = make_table()
+    with pytest.raises(ValueError, match="bta"):
+        table.query("bta > 1")
+    with pytest.raises(ValueError, match="bta"):
+        screener.parse_sort_keys("bta desc", table)
+    with pytest.raises(ValueError):
+        screener.parse_sort_keys("beta sideways", table)
+    assert screener.parse_sort_keys("beta desc, ps", table) == [('beta_value', True), ('ps_value', False)]
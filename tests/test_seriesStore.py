@@ -0,0 +1,73 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import datetime
+import metricEngine
+import numpy
+import pytest
+import seriesStore
+
+random_generator = numpy.random.default_rng(11)
+BAR_COUNT = 120
+WINDOW_BAR_COUNT = 22
+PRICES = (100 * numpy.cumprod(1 + random_generator.normal(0, 0.02, BAR_COUNT))).tolist()
+INDEX_PRICES = (400 * numpy.cumprod(1 + random_generator.normal(0, 0.01, BAR_COUNT))).tolist()
+for missing_bar in [30, 31, 75]:
+    INDEX_PRICES[missing_bar] = None  # f.e the index's bar of that day couldn't be read
+DATES = [datetime.date(2025, 1, 1) + datetime.timedelta(days=day) for day in range(BAR_COUNT)]
+
+
+def batch_metrics(last_bar):
+    """The metrics of the window ending with bar 'last_bar', recalculated from every price in it by metricEngine"""
+    first_bar = max(0, last_bar + 1 - WINDOW_BAR_COUNT)
+    index_prices = [numpy.nan if price is None else price for price in INDEX_PRICES[first_bar:last_bar + 1]]
+    metric_dict = metricEngine.calculate_technical_metrics(metricEngine.to_price_matrix(PRICES[first_bar:last_bar + 1]),
+                                                           index_prices)
+    return {name: values[0] for name, values in metric_dict.items()}
+
+
+def test_window_metrics_match_metric_engine():
+    """After every append the kept return, extremes and beta value are what metricEngine gives over the window"""
+    series = seriesStore.PriceSeries('AAA', WINDOW_BAR_COUNT)
+    for bar in range(BAR_COUNT):
+        series.append(DATES[bar], PRICES[bar], INDEX_PRICES[bar])
+
+        expected_dict = batch_metrics(bar)
+        assert series.window_closing_prices() == PRICES[max(0, bar + 1 - WINDOW_BAR_COUNT):bar + 1]
+        assert series.stock_return() == pytest.approx(expected_dict['stock_return'])
+        assert series.price_extremes() == pytest.approx((expected_dict['highest_price'], expected_dict['lowest_price']))
+        assert series.beta_value() == pytest.approx(expected_dict['beta_value'], nan_ok=True)
+
+
+def test_trimmed_history_keeps_the_window():
+    """Dropping the old history never drops a bar of the window, so its metrics don't change"""
+    series = seriesStore.PriceSeries('AAA', WINDOW_BAR_COUNT)
+    for bar in range(BAR_COUNT):
+        series.append(DATES[bar], PRICES[bar], INDEX_PRICES[bar])
+    beta_value = series.beta_value()
+
+    series.trim_history(DATES[-1] + datetime.timedelta(days=1))
+    assert series.first_date() == DATES[-WINDOW_BAR_COUNT]
+    assert series.window_dates() == DATES[-WINDOW_BAR_COUNT:]
+    assert series.beta_value() == beta_value
+    assert series.get_price(DATES[-5]) == PRICES[-5]
+    assert series.get_price(DATES[0]) is None
+
+
+def test_saved_series_is_loaded_the_same(tmp_path, monkeypatch):
+    """A series written to disk and read back has the same bars and metrics"""
+    monkeypatch.setattr(seriesStore, 'SERIES_STORE_PATH', str(tmp_path))
+    monkeypatch.setattr(seriesStore, 'loaded_series', {})
+    series = seriesStore.load_series('AAA')
+    for bar in range(BAR_COUNT):
+        series.append(DATES[bar], PRICES[bar], INDEX_PRICES[bar])
+    series.history_from_date = DATES[0]
+    seriesStore.save_series(series)
+
+    seriesStore.loaded_series.clear()
+    loaded_series = seriesStore.load_series('AAA')
+    assert loaded_series is not series
+    assert list(loaded_series.index_price_list) == INDEX_PRICES
+    assert loaded_series.history_from_date == DATES[0]
+    assert loaded_series.stock_return() == series.stock_return()
+    assert loaded_series.beta_value() == pytest.approx(series.beta_value())
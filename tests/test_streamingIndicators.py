@@ -0,0 +1,69 @@
+# Author: Gustav Lundborg
+# Date: 17-10-2026
+
+import datetime
+import math
+import numpy
+import pytest
+import streamingIndicators
+
+random_generator = numpy.random.default_rng(7)
+PRICES = (100 * numpy.cumprod(1 + random_generator.normal(0, 0.02, 120))).tolist()
+INDEX_PRICES = (400 * numpy.cumprod(1 + random_generator.normal(0, 0.01, 120))).tolist()
+DATES = [datetime.date(2025, 1, 1) + datetime.timedelta(days=day) for day in range(120)]
+
+
+def feed(indicator_set, prices, index_prices):
+    """Feeds every bar to 'indicator_set' as a closed session"""
+    for date, price, index_price in zip(DATES, prices, index_prices):
+        indicator_set.update(date, price, index_price)
+    return indicator_set
+
+
+def batch_regression(prices, index_prices, length):
+    """The beta value and correlation of the last 'length' returns, recalculated from every price"""
+    stock_returns = numpy.diff(prices)[-length:] / numpy.array(prices[:-1])[-length:]
+    index_returns = numpy.diff(index_prices)[-length:] / numpy.array(index_prices[:-1])[-length:]
+    covariance = numpy.cov(stock_returns, index_returns)
+    return covariance[0, 1] / covariance[1, 1], numpy.corrcoef(stock_returns, index_returns)[0, 1]
+
+
+def test_indicators_match_batch_recalculation():
+    """Every indicator fed one bar at a time gives what a calculation over the whole window gives"""
+    value_dict = feed(streamingIndicators.IndicatorSet('AAA'), PRICES, INDEX_PRICES).values()
+
+    returns = numpy.diff(PRICES) / numpy.array(PRICES[:-1])
+    peaks = numpy.maximum.accumulate(PRICES)
+    beta_value, correlation = batch_regression(PRICES, INDEX_PRICES, 63)
+    assert value_dict['sma_20'] == pytest.approx(numpy.mean(PRICES[-20:]))
+    assert value_dict['sma_50'] == pytest.approx(numpy.mean(PRICES[-50:]))
+    assert value_dict['volatility_21'] == pytest.approx(numpy.std(returns[-21:], ddof=1) * math.sqrt(252))
+    assert value_dict['max_drawdown'] == pytest.approx(numpy.max(1 - numpy.array(PRICES) / peaks))
+    assert value_dict['beta_63'] == pytest.approx(beta_value)
+    assert value_dict['correlation_63'] == pytest.approx(correlation)
+
+
+def test_revised_live_bar_matches_the_closed_bar():
+    """A live bar revised a few times and then closed gives the same values as the closed bar fed once"""
+    indicator_set = feed(streamingIndicators.IndicatorSet('AAA'), PRICES[:-1], INDEX_PRICES[:-1])
+    indicator_set.update(DATES[-1], PRICES[-1] * 1.05, INDEX_PRICES[-1] * 0.98, closed=False)
+    indicator_set.revise(PRICES[-1] * 0.97, INDEX_PRICES[-1] * 1.01)
+    indicator_set.revise(PRICES[-1], INDEX_PRICES[-1], closed=True)
+
+    expected_dict = feed(streamingIndicators.IndicatorSet('AAA'), PRICES, INDEX_PRICES).values()
+    assert indicator_set.values() == pytest.approx(expected_dict, nan_ok=True)
+
+
+def test_live_bar_without_index_price_is_added_when_it_closes():
+    """
+    A live bar fed before the index had a price that session is skipped by the regression;
+    when it closes with the index price it is added, not written over the return of the day before
+    """
+    indicator_set = feed(streamingIndicators.IndicatorSet('AAA', regression_length=5), PRICES[:-1], INDEX_PRICES[:-1])
+    indicator_set.update(DATES[-1], PRICES[-1] * 1.05, None, closed=False)
+    indicator_set.revise(PRICES[-1] * 0.97, None)
+    indicator_set.revise(PRICES[-1], INDEX_PRICES[-1], closed=True)
+
+    beta_value, correlation = batch_regression(PRICES, INDEX_PRICES, 5)
+    assert indicator_set.values()['beta_5'] == pytest.approx(beta_value)
+    assert indicator_set.values()['correlation_5'] == pytest.approx(correlation)